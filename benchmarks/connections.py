@@ -0,0 +1,103 @@
+"""Стоимость холодных соединений с DNS-кешем, TLS-сессиями и прогревом.
+
+Запуск из корня репозитория (нужен локальный сертификат из tests/):
+
+    python -m benchmarks.connections --requests 20 --dns-delay 0.02
+
+Задержка DNS эмулируется: localhost разрешается мгновенно, поэтому к
+каждому вызову getaddrinfo добавляется --dns-delay секунд.
+"""
+import argparse
+import os
+import socket
+import statistics
+import time
+
+import requests
+
+from network import DnsCache, ResumingSSLContext, make_session, prewarm
+from stubs import start_https_stub
+
+CERT = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'tests', 'localhost.pem'
+)
+
+
+def slow_resolver(delay, resolve=socket.getaddrinfo):
+    """Функция getaddrinfo с искусственной задержкой сетевого DNS."""
+    def getaddrinfo(*args, **kwargs):
+        time.sleep(delay)
+        return resolve(*args, **kwargs)
+    return getaddrinfo
+
+
+def wave(get, url, count):
+    """Задержки count последовательных запросов в миллисекундах."""
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        get(url, timeout=5).raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def summary(latencies):
+    """Первый запрос и среднее по волне."""
+    return (f'первый {latencies[0]:7.2f} мс, '
+            f'среднее {statistics.mean(latencies):7.2f} мс')
+
+
+def run(count, dns_delay, warm):
+    """Сравнивает холодные запросы с прогретой сессией."""
+    server = start_https_stub(CERT)
+    url = f'https://localhost:{server.server_port}/'
+    resolve = socket.getaddrinfo
+    socket.getaddrinfo = slow_resolver(dns_delay, resolve)
+    try:
+        def cold_get(target, timeout):
+            return requests.get(target, timeout=timeout, verify=CERT)
+
+        results = {'холодные соединения': wave(cold_get, url, count)}
+
+        DnsCache(resolve=socket.getaddrinfo).install()
+        context = ResumingSSLContext()
+        session = make_session(ssl_context=context)
+        session.verify = CERT
+        session.trust_env = False
+        prewarm(session, [url], warm)
+        results['DNS-кеш и прогрев'] = wave(session.get, url, count)
+        session.close()
+
+        for name, ssl_context in (
+                ('новый пул, полное рукопожатие', ResumingSSLContext()),
+                ('новый пул, возобновление TLS', context),
+        ):
+            restarted = make_session(ssl_context=ssl_context)
+            restarted.verify = CERT
+            restarted.trust_env = False
+            results[name] = wave(restarted.get, url, count)
+            restarted.close()
+        results['возобновлено TLS-сессий'] = context.resumed
+    finally:
+        socket.getaddrinfo = resolve
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def main():
+    """Запуск из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--dns-delay', type=float, default=0.02)
+    parser.add_argument('--warm', type=int, default=2)
+    args = parser.parse_args()
+    for name, value in run(args.requests, args.dns_delay,
+                           args.warm).items():
+        if isinstance(value, list):
+            value = summary(value)
+        print(f'{name:<30} {value}')
+
+
+if __name__ == '__main__':
+    main()
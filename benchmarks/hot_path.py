@@ -0,0 +1,222 @@
+"""Микробенчмарки разбора, проверки и рендеринга ответа API.
+
+Каждый случай замеряется REPEAT раз вперемешку с эталонной нагрузкой
+reference_load, а результатом служит медиана отношений их времен. Так
+колебания скорости машины во время прогона почти не влияют на сравнение
+с baseline. Замедлившиеся случаи перемеряются перед отчетом.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.hot_path            # сравнить с baseline.json
+    python -m benchmarks.hot_path --save     # записать новый baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import timeit
+
+import requests
+
+import homework
+import json_codec
+from history import STATUS_CODES
+from templates import TEMPLATES
+
+SIZES = (0, 10, 100, 1000, 10000)
+REPEAT = 7
+FANOUT = 10
+TOLERANCE = 0.25
+REFERENCE = 'reference'
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def make_payload(size):
+    """Синтетический ответ API с size домашками."""
+    statuses = tuple(homework.HOMEWORK_VERDICTS)
+    return {
+        'homeworks': [
+            {
+                'id': 100000 + index,
+                'status': statuses[index % len(statuses)],
+                'homework_name': f'student__hw{index:05d}.zip',
+                'reviewer_comment': 'Отличная работа, но есть замечания.',
+                'date_updated': '2024-02-13T14:40:57Z',
+                'lesson_name': f'Спринт {index % 20}: финальный проект',
+            }
+            for index in range(size)
+        ],
+        'current_date': 1707835257,
+    }
+
+
+def make_response(raw):
+    """Ответ requests с готовым телом."""
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = 'utf-8'
+    response._content = raw
+    return response
+
+
+def render_all(homeworks):
+    """Рендерит сообщение для каждой домашки."""
+    return [homework.parse_status(item) for item in homeworks]
+
+
+def render_templates(homeworks):
+    """Рендерит сообщение для каждой домашки по шаблонам."""
+    return [
+        TEMPLATES.render(
+            STATUS_CODES[item['status']], 'ru', item['homework_name']
+        )
+        for item in homeworks
+    ]
+
+
+def render_fanout(homeworks, chats=FANOUT):
+    """Рендерит домашки для chats чатов с общим токеном за один цикл."""
+    rendered = {}
+    return [
+        TEMPLATES.render_once(
+            rendered, STATUS_CODES[item['status']], 'ru',
+            item['homework_name']
+        )
+        for item in homeworks
+        for _ in range(chats)
+    ]
+
+
+def reference_load():
+    """Эталонная нагрузка на интерпретатор для нормировки замеров."""
+    return sorted(str(index) for index in range(1000))
+
+
+def cases(size):
+    """Пары (имя, функция без аргументов) для размера ответа."""
+    payload = make_payload(size)
+    raw = json.dumps(payload, ensure_ascii=False).encode()
+    homeworks = payload['homeworks']
+    return {
+        'json_decode': lambda: json.loads(raw),
+        'response_json': lambda: make_response(raw).json(),
+        'decode_response': lambda: homework.decode_response(
+            make_response(raw)
+        ),
+        'fast_decode': lambda: json_codec.loads(raw),
+        'render_all': lambda: render_all(homeworks),
+        'render_templates': lambda: render_templates(homeworks),
+        'render_fanout': lambda: render_fanout(homeworks),
+    }
+
+
+def fixed_cases():
+    """Случаи, время которых не зависит от размера ответа."""
+    payload = make_payload(10)
+    return {
+        'check_response': lambda: homework.check_response(payload),
+        'parse_status': lambda: homework.parse_status(
+            payload['homeworks'][0]
+        ),
+    }
+
+
+def all_cases(sizes=SIZES):
+    """Все случаи по ключам результатов."""
+    funcs = fixed_cases()
+    for size in sizes:
+        for name, func in cases(size).items():
+            funcs[f'{name}[{size}]'] = func
+    return funcs
+
+
+def calls_per_round(timer):
+    """Число вызовов в одном замере, около 50 мс."""
+    number, _ = timer.autorange()
+    return max(number // 4, 1)
+
+
+def measure(func, repeat=REPEAT):
+    """Время вызова в долях эталонной нагрузки: медиана по замерам."""
+    timer = timeit.Timer(func)
+    reference = timeit.Timer(reference_load)
+    number = calls_per_round(timer)
+    reference_number = calls_per_round(reference)
+    ratios = []
+    for _ in range(repeat):
+        elapsed = timer.timeit(number) / number
+        ratios.append(
+            elapsed / (reference.timeit(reference_number) / reference_number)
+        )
+    return statistics.median(ratios)
+
+
+def run(funcs, repeat=REPEAT):
+    """Прогоняет бенчмарки и возвращает результаты по ключам.
+
+    Под ключом REFERENCE - время эталонной нагрузки в секундах.
+    """
+    reference = timeit.Timer(reference_load)
+    number = calls_per_round(reference)
+    results = {
+        REFERENCE: min(reference.repeat(repeat, number)) / number
+    }
+    results.update(
+        (key, measure(func, repeat)) for key, func in funcs.items()
+    )
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Возвращает список ключей, замедлившихся сильнее допуска."""
+    seconds = results.get(REFERENCE, 1)
+    regressions = []
+    for key, relative in results.items():
+        if key == REFERENCE:
+            continue
+        reference = baseline.get(key)
+        ratio = relative / reference if reference else float('nan')
+        print(f'{key:<28} {relative * seconds * 1e6:>12.2f} us  '
+              f'x{ratio:.2f}')
+        if reference and ratio > 1 + tolerance:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    """Запуск бенчмарков из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--save', action='store_true',
+                        help='сохранить результаты как baseline')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    funcs = all_cases()
+    results = run(funcs)
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+        print(f'Baseline записан в {args.baseline}')
+        return
+    try:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+    except FileNotFoundError:
+        baseline = {}
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f'Перемеряю: {", ".join(regressions)}')
+        regressions = compare(
+            run({key: funcs[key] for key in regressions}, REPEAT * 3),
+            baseline, args.tolerance
+        )
+    if regressions:
+        print(f'Замедлились: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Пропускная способность отправки сообщений в локальный Telegram.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.telegram --messages 500 --concurrency 8 --delay 0.02
+
+Сравнивает TeleBot, который отправляет сообщения по одному и разбирает
+каждый ответ в объект Message, с TelegramClient - последовательно и в
+concurrency потоков. Задержка ответа
+Bot API эмулируется: сервер отвечает через --delay секунд.
+"""
+import argparse
+import time
+
+import telebot
+from telebot import apihelper
+
+from stubs import start_telegram_stub
+from telegram_client import TelegramClient
+
+TOKEN = '123:stub'
+
+
+def throughput(send, count, mapper=map):
+    """Число сообщений в секунду при отправке count сообщений."""
+    started = time.perf_counter()
+    list(mapper(lambda chat_id: send(chat_id, 'статус'), range(count)))
+    return count / (time.perf_counter() - started)
+
+
+def run(count, concurrency, delay):
+    """Замеряет отправку через TeleBot и через TelegramClient."""
+    server = start_telegram_stub(delay=delay)
+    api_url = f'http://127.0.0.1:{server.server_port}'
+    default_url, default_session = apihelper.API_URL, apihelper.session
+    apihelper.API_URL = api_url + '/bot{0}/{1}'
+    apihelper.session = None
+    try:
+        bot = telebot.TeleBot(TOKEN)
+        results = {'TeleBot': throughput(bot.send_message, count)}
+        client = TelegramClient(TOKEN, api_url=api_url,
+                                concurrency=concurrency)
+        client.session.trust_env = False
+        results['TelegramClient, 1 поток'] = throughput(
+            client.send_message, count
+        )
+        results[f'TelegramClient, {concurrency} потоков'] = throughput(
+            client.send_message, count, client.map
+        )
+        client.close()
+    finally:
+        apihelper.API_URL, apihelper.session = default_url, default_session
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def main():
+    """Запуск из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--delay', type=float, default=0.02)
+    args = parser.parse_args()
+    for name, value in run(args.messages, args.concurrency,
+                           args.delay).items():
+        print(f'{name:<30} {value:8.0f} сообщений/с')
+
+
+if __name__ == '__main__':
+    main()
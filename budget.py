@@ -0,0 +1,131 @@
+import os
+
+from history import STATUS_CODES
+from state_table import NO_STATUS
+
+REQUESTS_PER_MINUTE = float(os.getenv('REQUESTS_PER_MINUTE', 0))
+MIN_INTERVAL = 60
+BURST_SECONDS = 10
+TOKEN_EPSILON = 1e-6
+MIN_WAIT = 0.001
+RECENT_CHANGE_WINDOW = 24 * 60 * 60
+IDLE_WEIGHT = 1
+REVIEWING_WEIGHT = 4
+RECENT_CHANGE_WEIGHT = 2
+REVIEWING = STATUS_CODES['reviewing']
+
+
+def activity_weight(status, changed, now):
+    """Вес студента по активности: работа на ревью и недавние изменения."""
+    weight = IDLE_WEIGHT
+    if status == REVIEWING:
+        weight *= REVIEWING_WEIGHT
+    if status != NO_STATUS and now - changed < RECENT_CHANGE_WINDOW:
+        weight *= RECENT_CHANGE_WEIGHT
+    return weight
+
+
+class BudgetPlanner:
+    """Делит общий бюджет запросов к API между студентами по весам.
+
+    Желаемый интервал студента - retry_period / вес, но не чаще
+    min_interval. Если сумма желаемых частот превышает бюджет, все
+    интервалы растягиваются в одно и то же число раз, так что доли
+    студентов остаются пропорциональны весам, а суммарная нагрузка - в
+    пределах бюджета. Всплески (например, при старте, когда пора опросить
+    всех) сглаживает ведро токенов на BURST_SECONDS секунд бюджета.
+    """
+
+    def __init__(self, requests_per_minute, retry_period,
+                 min_interval=MIN_INTERVAL, burst_seconds=BURST_SECONDS):
+        self.retry_period = retry_period
+        self.min_interval = min_interval
+        self.burst_seconds = burst_seconds
+        self.tokens = float('inf')
+        self.set_rate(requests_per_minute)
+        self.updated = None
+        self.demand = 0.0
+        self.exhausted_since = None
+
+    def set_rate(self, requests_per_minute):
+        """Меняет бюджет, например при смене числа процессов."""
+        self.rate = requests_per_minute / 60
+        self.capacity = max(1.0, self.rate * self.burst_seconds)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def desired(self, weight):
+        """Интервал опроса студента при неограниченном бюджете."""
+        return max(self.min_interval, self.retry_period / weight)
+
+    def change(self, old_weight, new_weight):
+        """Учитывает смену веса студента; вес 0 - студента нет."""
+        if old_weight:
+            self.demand -= 1 / self.desired(old_weight)
+        if new_weight:
+            self.demand += 1 / self.desired(new_weight)
+        self.demand = max(self.demand, 0.0)
+
+    def scale(self):
+        """Во сколько раз интервалы растянуты из-за бюджета."""
+        return max(1.0, self.demand / self.rate)
+
+    def interval(self, weight):
+        """Эффективный интервал опроса студента с данным весом."""
+        return self.desired(weight) * self.scale()
+
+    def _refill(self, now):
+        if self.updated is not None:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+        self.updated = now
+
+    def available(self, now):
+        """Сколько запросов можно отправить сейчас."""
+        self._refill(now)
+        return int(self.tokens + TOKEN_EPSILON)
+
+    def spend(self, count):
+        """Списывает отправленные запросы."""
+        self.tokens -= count
+
+    def track_exhaustion(self, now, exhausted):
+        """Отмечает, остались ли после цикла опросы, не вошедшие в бюджет."""
+        if not exhausted:
+            self.exhausted_since = None
+        elif self.exhausted_since is None:
+            self.exhausted_since = now
+
+    def wait(self, now, due):
+        """Сколько опрос со сроком due ждет только из-за бюджета.
+
+        Пока бюджет исчерпан, опросы ждут своей очереди на токены по плану,
+        и эта часть опоздания не говорит о перегрузке.
+        """
+        if self.exhausted_since is None:
+            return 0
+        return now - max(self.exhausted_since, due)
+
+    def next_token(self, now):
+        """Когда появится токен на следующий запрос."""
+        if self.available(now):
+            return now
+        return now + max((1 - self.tokens) / self.rate, MIN_WAIT)
+
+    def snapshot(self):
+        """Сводка бюджета для проверки живости."""
+        return {
+            'requests_per_minute': round(self.rate * 60, 3),
+            'planned_per_minute': round(
+                min(self.demand, self.rate) * 60, 3
+            ),
+            'demanded_per_minute': round(self.demand * 60, 3),
+            'interval_scale': round(self.scale(), 3),
+        }
+
+
+def make_planner(retry_period, processes=1):
+    """Планировщик с долей бюджета REQUESTS_PER_MINUTE или None."""
+    if not REQUESTS_PER_MINUTE:
+        return None
+    return BudgetPlanner(REQUESTS_PER_MINUTE / processes, retry_period)
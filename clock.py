@@ -0,0 +1,28 @@
+import time
+
+
+class SystemClock:
+    """Настоящие время и паузы."""
+
+    def time(self):
+        """Текущее время в секундах."""
+        return time.time()
+
+    def sleep(self, seconds):
+        """Пауза в seconds секунд."""
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """Виртуальное время: пауза мгновенно сдвигает часы вперед."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def time(self):
+        """Текущее виртуальное время."""
+        return self.now
+
+    def sleep(self, seconds):
+        """Сдвигает часы на seconds секунд."""
+        self.now += max(seconds, 0)
@@ -0,0 +1,311 @@
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import homework
+from leases import LEADER_SHARD, shard_of
+from templates import DEFAULT_LOCALE, TEMPLATES
+
+TIME_FORMAT = '%d.%m.%Y %H:%M UTC'
+COMMAND_TTL = 60
+
+
+def format_moment(timestamp):
+    """Время смены статуса для сообщения."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        TIME_FORMAT
+    )
+
+
+def format_status(history, locale=DEFAULT_LOCALE):
+    """Текст ответа на /status: последний статус каждой работы."""
+    if not history:
+        return TEMPLATES.reply(locale, 'status_unknown')
+    return '\n'.join(
+        TEMPLATES.reply(
+            locale, 'status', name=name,
+            verdict=TEMPLATES.verdict(status, locale),
+            moment=format_moment(timestamp)
+        )
+        for name, entries in history.items()
+        for status, timestamp, _ in entries[-1:]
+    )
+
+
+def format_interval(seconds, locale=DEFAULT_LOCALE):
+    """Строка о частоте опроса для ответа на /status."""
+    return TEMPLATES.reply(
+        locale, 'interval', minutes=round(seconds / 60, 1)
+    )
+
+
+def format_history(history, locale=DEFAULT_LOCALE):
+    """Текст ответа на /history."""
+    if not history:
+        return TEMPLATES.reply(locale, 'history_empty')
+    blocks = []
+    for name, entries in history.items():
+        lines = [TEMPLATES.reply(locale, 'history_title', name=name)]
+        for status, timestamp, comment in entries:
+            line = TEMPLATES.reply(
+                locale, 'history_entry', moment=format_moment(timestamp),
+                verdict=TEMPLATES.verdict(status, locale)
+            )
+            if comment:
+                line += TEMPLATES.reply(
+                    locale, 'history_comment', comment=comment
+                )
+            lines.append(line)
+        blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks)
+
+
+class CommandHandler:
+    """Отвечает на команды студентов из кеша, не обращаясь к API."""
+
+    def __init__(self, bot, worker):
+        self.bot = bot
+        self.worker = worker
+        self.answers = {
+            'history': self.answer_history,
+            'status': self.answer_status,
+            'refresh': self.answer_refresh,
+        }
+
+    def tenants_for_chat(self, chat_id):
+        """Студенты, уведомления которых приходят в чат."""
+        chat_id = str(chat_id)
+        return [
+            tenant for tenant in self.worker.registry
+            if tenant.telegram_chat_id == chat_id
+        ]
+
+    def send(self, chat_id, text):
+        """Отвечает в чат, из которого пришла команда."""
+        try:
+            homework.send_chat_message(self.bot, chat_id, text)
+        except Exception as error:
+            logging.error(f'Не удалось ответить на команду: {error}')
+
+    def handle(self, message, command):
+        """Отвечает на команду из входящего сообщения."""
+        chat_id = message.chat.id
+        tenants = self.tenants_for_chat(chat_id)
+        if not tenants:
+            self.send(chat_id, 'Этот чат не подписан на уведомления.')
+            return
+        self.answers[command](chat_id, tenants)
+
+    def answer_history(self, chat_id, tenants):
+        """Ответ на /history: история статусов домашек."""
+        self.send(chat_id, '\n\n'.join(
+            format_history(self.worker.history.get(tenant.id), tenant.locale)
+            for tenant in tenants
+        ))
+
+    def answer_status(self, chat_id, tenants):
+        """Ответ на /status: текущие статусы домашек из кеша."""
+        worker = self.worker
+        with worker.lock:
+            text = '\n\n'.join(
+                format_status(worker.history.get(tenant.id), tenant.locale)
+                + '\n' + format_interval(
+                    worker.poll_interval(tenant.id), tenant.locale
+                )
+                for tenant in tenants
+                if tenant.id in worker.states
+            )
+        if not text:
+            text = TEMPLATES.reply(tenants[0].locale, 'status_unknown')
+        self.send(chat_id, text)
+
+    def refresh_reply(self, tenants):
+        """Ключ ответа на /refresh; вызывается под worker.lock."""
+        worker = self.worker
+        polled = [
+            tenant for tenant in tenants
+            if tenant.id in worker.states and tenant.id not in worker.stopped
+        ]
+        if not polled:
+            return 'refresh_stopped'
+        if worker.outage.active:
+            return 'refresh_outage'
+        now = worker.clock.time()
+        accepted = [
+            worker.request_refresh(tenant.id, now) for tenant in polled
+        ]
+        return 'refresh_accepted' if any(accepted) else 'refresh_recent'
+
+    def answer_refresh(self, chat_id, tenants):
+        """Ответ на /refresh: внеочередной опрос через планировщик.
+
+        Состояние опроса читается под worker.lock, а ответ уходит без
+        блокировки, чтобы не задерживать цикл опроса.
+        """
+        with self.worker.lock:
+            key = self.refresh_reply(tenants)
+        self.send(chat_id, TEMPLATES.reply(tenants[0].locale, key))
+
+    def history(self, message):
+        """Команда /history."""
+        self.handle(message, 'history')
+
+    def status(self, message):
+        """Команда /status."""
+        self.handle(message, 'status')
+
+    def refresh(self, message):
+        """Команда /refresh."""
+        self.handle(message, 'refresh')
+
+    def register(self):
+        """Регистрирует обработчики команд в боте."""
+        self.bot.register_message_handler(self.history, commands=['history'])
+        self.bot.register_message_handler(self.status, commands=['status'])
+        self.bot.register_message_handler(self.refresh, commands=['refresh'])
+
+    def start(self):
+        """Запускает long polling входящих сообщений в отдельном потоке."""
+        self.register()
+        thread = threading.Thread(
+            target=self.bot.infinity_polling,
+            name='commands',
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+
+class CommandQueue:
+    """Очередь команд в общем файле SQLite для узлов с арендой шардов.
+
+    Команда кладется отдельной строкой для каждого шарда студентов чата;
+    строки забирает узел, арендующий шард. Строки старше ttl секунд
+    удаляются без ответа.
+    """
+
+    def __init__(self, path, ttl=COMMAND_TTL, timeout=30):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None,
+            check_same_thread=False
+        )
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS commands ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, shard INTEGER NOT NULL, '
+            'chat_id TEXT NOT NULL, command TEXT NOT NULL, '
+            'created REAL NOT NULL)'
+        )
+
+    def put(self, chat_id, command, shards, now):
+        """Ставит команду в очередь; возвращает False при ошибке."""
+        try:
+            with self.lock:
+                self.db.executemany(
+                    'INSERT INTO commands (shard, chat_id, command, created) '
+                    'VALUES (?, ?, ?, ?)',
+                    [(shard, str(chat_id), command, now) for shard in shards]
+                )
+        except sqlite3.Error as error:
+            logging.error(f'Команда не поставлена в очередь: {error}')
+            return False
+        return True
+
+    def take(self, shards, now):
+        """Забирает команды для шардов: список (шард, чат, команда)."""
+        if not shards:
+            return []
+        marks = ', '.join('?' * len(shards))
+        try:
+            with self.lock:
+                self.db.execute('BEGIN IMMEDIATE')
+                try:
+                    self.db.execute(
+                        'DELETE FROM commands WHERE created < ?',
+                        (now - self.ttl,)
+                    )
+                    rows = self.db.execute(
+                        'SELECT id, shard, chat_id, command FROM commands '
+                        f'WHERE shard IN ({marks}) ORDER BY id',
+                        list(shards)
+                    ).fetchall()
+                    self.db.executemany(
+                        'DELETE FROM commands WHERE id = ?',
+                        [(row[0],) for row in rows]
+                    )
+                except Exception:
+                    self.db.execute('ROLLBACK')
+                    raise
+                self.db.execute('COMMIT')
+        except sqlite3.Error as error:
+            logging.error(f'Команды не прочитаны: {error}')
+            return []
+        return [row[1:] for row in rows]
+
+
+class SharedCommandHandler(CommandHandler):
+    """Команды на нескольких узлах с общим файлом аренды.
+
+    Входящие сообщения читает только узел, арендующий шард LEADER_SHARD,
+    иначе Telegram отвечает 409 Conflict на параллельные getUpdates.
+    Команды он кладет в CommandQueue, а отвечает каждый узел за студентов
+    своих шардов, потому что кеш статусов есть только у владельца.
+    """
+
+    def __init__(self, bot, worker, leases, queue):
+        super().__init__(bot, worker)
+        self.leases = leases
+        self.queue = queue
+        self.thread = None
+        self.registered = False
+
+    def handle(self, message, command):
+        """Передает команду владельцам шардов студентов чата."""
+        chat_id = message.chat.id
+        tenants = self.tenants_for_chat(chat_id)
+        if not tenants:
+            self.send(chat_id, 'Этот чат не подписан на уведомления.')
+            return
+        shards = {shard_of(tenant, self.leases.shards) for tenant in tenants}
+        if not self.queue.put(
+                chat_id, command, shards, self.worker.clock.time()
+        ):
+            self.send(
+                chat_id, TEMPLATES.reply(tenants[0].locale, 'command_failed')
+            )
+
+    def process(self, now):
+        """Отвечает на команды для студентов арендованных шардов."""
+        commands = {}
+        for shard, chat_id, command in self.queue.take(
+                self.leases.owned, now
+        ):
+            commands.setdefault((chat_id, command), set()).add(shard)
+        for (chat_id, command), shards in commands.items():
+            tenants = [
+                tenant for tenant in self.tenants_for_chat(chat_id)
+                if shard_of(tenant, self.leases.shards) in shards
+            ]
+            if tenants:
+                self.answers[command](chat_id, tenants)
+
+    def lead(self):
+        """Читает входящие сообщения, пока узел арендует LEADER_SHARD."""
+        leading = LEADER_SHARD in self.leases.owned
+        if leading and self.thread is None:
+            if not self.registered:
+                self.register()
+                self.registered = True
+            self.thread = threading.Thread(
+                target=self.bot.polling, kwargs={'non_stop': True},
+                name='commands', daemon=True
+            )
+            self.thread.start()
+            logging.info(f'{self.leases.node_id}: читаю команды')
+        elif not leading and self.thread is not None:
+            self.bot.stop_polling()
+            self.thread = None
+            logging.info(f'{self.leases.node_id}: команды читает другой узел')
@@ -0,0 +1,67 @@
+import logging
+import os
+from enum import IntEnum
+
+LAG_DEGRADED = int(os.getenv('LAG_DEGRADED', 60))
+LAG_OVERLOADED = int(os.getenv('LAG_OVERLOADED', 600))
+RECOVERY_RATIO = 0.5
+IDLE_STRETCH = 4
+
+
+class Level(IntEnum):
+    """Режим работы в зависимости от отставания опроса."""
+
+    NORMAL = 0
+    DEGRADED = 1
+    OVERLOADED = 2
+
+
+class DegradationPolicy:
+    """Переключает режимы деградации по отставанию расписания опроса.
+
+    Отставание - сколько секунд ждет самый старый просроченный опрос.
+    С отставанием от degraded секунд просроченные опросы разбираются по
+    срочности (сначала работы на ревью), а уведомления об ошибках не
+    отправляются. С отставанием от overloaded секунд интервалы студентов
+    без работ на ревью дополнительно растягиваются в IDLE_STRETCH раз.
+    Режим снижается, когда отставание падает ниже половины порога.
+    """
+
+    def __init__(self, degraded=LAG_DEGRADED, overloaded=LAG_OVERLOADED):
+        self.thresholds = {
+            Level.DEGRADED: degraded,
+            Level.OVERLOADED: overloaded,
+        }
+        self.level = Level.NORMAL
+        self.lag = 0.0
+
+    def update(self, lag):
+        """Пересчитывает режим по текущему отставанию."""
+        self.lag = lag
+        level = self.level
+        while level < Level.OVERLOADED and lag >= self.thresholds[level + 1]:
+            level = Level(level + 1)
+        while level > Level.NORMAL and (
+                lag < self.thresholds[level] * RECOVERY_RATIO
+        ):
+            level = Level(level - 1)
+        if level != self.level:
+            log = logging.warning if level > self.level else logging.info
+            log(f'Отставание опроса {lag:.0f} с: режим {level.name}')
+            self.level = level
+        return level
+
+    @property
+    def prioritize(self):
+        """Разбирать просроченные опросы по срочности."""
+        return self.level >= Level.DEGRADED
+
+    @property
+    def shed_errors(self):
+        """Не отправлять уведомления об ошибках."""
+        return self.level >= Level.DEGRADED
+
+    @property
+    def idle_stretch(self):
+        """Во сколько раз растянуть интервал студента без работ на ревью."""
+        return IDLE_STRETCH if self.level >= Level.OVERLOADED else 1
@@ -0,0 +1,188 @@
+import contextlib
+import logging
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import exceptions
+
+MAX_MESSAGE_LENGTH = 4096
+SEPARATOR = '\n\n'
+MAX_PENDING = 50
+WINDOW_PATTERN = re.compile(r'^(\d{1,2})-(\d{1,2})$')
+
+
+def parse_window(value):
+    """Разбирает окно тихих часов вида "23-8" (часы UTC)."""
+    if not value:
+        return None
+    match = WINDOW_PATTERN.match(str(value))
+    if match is None or not all(
+            0 <= int(hour) <= 23 for hour in match.groups()
+    ):
+        raise exceptions.TenantConfigError(
+            f'Некорректные тихие часы "{value}", нужен формат "23-8".'
+        )
+    return tuple(map(int, match.groups()))
+
+
+def in_window(window, now):
+    """Попадает ли момент now в окно тихих часов."""
+    if window is None:
+        return False
+    start, end = window
+    hour = datetime.fromtimestamp(now, timezone.utc).hour
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def pack_entries(entries, limit=MAX_MESSAGE_LENGTH):
+    """Склеивает пары (текст, метки) в сообщения не длиннее limit.
+
+    Метки склеенных текстов объединяются; метки длинного текста
+    достаются последней его части.
+    """
+    chunk, marks = '', ()
+    for text, text_marks in entries:
+        while len(text) > limit:
+            if chunk:
+                yield chunk, marks
+                chunk, marks = '', ()
+            yield text[:limit], ()
+            text = text[limit:]
+        if not chunk:
+            chunk, marks = text, text_marks
+        elif len(chunk) + len(SEPARATOR) + len(text) <= limit:
+            chunk += SEPARATOR + text
+            marks += text_marks
+        else:
+            yield chunk, marks
+            chunk, marks = text, text_marks
+    if chunk:
+        yield chunk, marks
+
+
+def pack(texts, limit=MAX_MESSAGE_LENGTH):
+    """Склеивает тексты в сообщения не длиннее limit символов."""
+    for chunk, _ in pack_entries(((text, ()) for text in texts), limit):
+        yield chunk
+
+
+class Outbox:
+    """Копит уведомления за цикл опроса и отправляет их пачками.
+
+    Все уведомления одного чата за цикл уходят одним сообщением (или
+    несколькими, если не помещаются в лимит Telegram). Несрочные
+    уведомления чата с тихими часами откладываются до конца окна и
+    приходят одной сводкой. Не доставленные из-за ошибки Telegram тексты
+    остаются в очереди до следующего цикла, не больше MAX_PENDING на чат.
+    Если Telegram ответил retry_after, отправка приостанавливается на
+    указанное время. К тексту можно приложить метки, которые передаются
+    в on_sent вместе со временем подтверждения отправки.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.held = {}
+        self.windows = {}
+        self.paused_until = 0
+
+    def __bool__(self):
+        return bool(self.pending or self.held)
+
+    def __len__(self):
+        return sum(map(len, self.pending.values())) + sum(
+            map(len, self.held.values())
+        )
+
+    def add(self, chat_id, text, now, urgent=True, window=None, marks=()):
+        """Ставит уведомление в очередь чата."""
+        self.windows[chat_id] = window
+        if not urgent and in_window(window, now):
+            queue = self.held
+        else:
+            queue = self.pending
+        queue.setdefault(chat_id, deque(maxlen=MAX_PENDING)).append(
+            (text, marks)
+        )
+
+    def ready(self, now):
+        """Чаты с уведомлениями, которые пора отправить."""
+        chats = list(self.pending)
+        for chat_id in self.held:
+            if chat_id not in self.pending and not in_window(
+                    self.windows.get(chat_id), now
+            ):
+                chats.append(chat_id)
+        return chats
+
+    def take(self, chat_id, now):
+        """Забирает из очереди тексты чата, которые пора отправить."""
+        entries = list(self.pending.pop(chat_id, ()))
+        if not in_window(self.windows.get(chat_id), now):
+            entries = list(self.held.pop(chat_id, ())) + entries
+        return entries
+
+    @staticmethod
+    def send_chunks(send, clock, chat_id, chunks):
+        """Отправляет сообщения чата по порядку до первой ошибки.
+
+        Возвращает время подтверждения каждого отправленного сообщения и
+        ошибку, на которой отправка остановилась.
+        """
+        acks = []
+        for chunk, _ in chunks:
+            try:
+                send(chat_id, chunk)
+            except exceptions.MessageError as error:
+                return acks, error
+            acks.append(clock())
+        return acks, None
+
+    def flush(self, send, now, mapper=map, clock=time.time, on_sent=None,
+              lock=None):
+        """Отправляет накопленное через send(chat_id, text).
+
+        Чаты обрабатываются через mapper(func, batches), например пулом
+        потоков, а сообщения одного чата уходят по порядку. Для каждого
+        отправленного сообщения с метками вызывается on_sent(marks, ack).
+        Очередь читается и меняется под lock, а сама отправка идет без
+        него. Возвращает число отправленных сообщений.
+        """
+        lock = lock or contextlib.nullcontext()
+        with lock:
+            if now < self.paused_until:
+                return 0
+            batches = [
+                (chat_id, list(pack_entries(self.take(chat_id, now))))
+                for chat_id in self.ready(now)
+            ]
+        results = list(mapper(
+            lambda batch: self.send_chunks(send, clock, *batch), batches
+        ))
+        with lock:
+            return self._settle(batches, results, now, on_sent)
+
+    def _settle(self, batches, results, now, on_sent):
+        sent = 0
+        for (chat_id, chunks), (acks, error) in zip(batches, results):
+            count = len(acks)
+            sent += count
+            if on_sent is not None:
+                for (_, marks), ack in zip(chunks, acks):
+                    if marks:
+                        on_sent(marks, ack)
+            if error is not None:
+                logging.error(f'Уведомления отложены: {error}')
+                self.pending.setdefault(
+                    chat_id, deque(maxlen=MAX_PENDING)
+                ).extend(chunks[count:])
+                if isinstance(error, exceptions.RetryAfter):
+                    self.paused_until = max(
+                        self.paused_until, now + error.retry_after
+                    )
+            if chat_id not in self.pending and chat_id not in self.held:
+                self.windows.pop(chat_id, None)
+        return sent
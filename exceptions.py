@@ -16,3 +16,19 @@ class MessageError(Exception):
 
 class WrongStatusCode(Exception):
     """Не правильный статус код."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TenantConfigError(Exception):
+    """Некорректный файл реестра студентов."""
+
+
+class RetryAfter(MessageError):
+    """Telegram просит повторить отправку позже."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
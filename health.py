@@ -0,0 +1,45 @@
+import json
+import logging
+import os
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HEALTH_PORT = int(os.getenv('HEALTH_PORT', 0))
+HEALTH_PATHS = ('/health', '/healthz')
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+    """Отдает сводку о свежести опроса в формате JSON."""
+
+    def do_GET(self):
+        """GET /health: 200, если опрос идет, иначе 503."""
+        if self.path.split('?')[0] not in HEALTH_PATHS:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        worker = self.server.worker
+        report = worker.health(worker.clock.time())
+        body = json.dumps(report).encode()
+        self.send_response(
+            HTTPStatus.OK if report['healthy']
+            else HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Пишет запросы к эндпоинту в лог уровня DEBUG."""
+        logging.debug(f'health: {format % args}')
+
+
+def start_health_server(worker, port=HEALTH_PORT, host='0.0.0.0'):
+    """Запускает HTTP-сервер проверки живости в отдельном потоке."""
+    server = ThreadingHTTPServer((host, port), HealthHandler)
+    server.worker = worker
+    threading.Thread(
+        target=server.serve_forever, name='health', daemon=True
+    ).start()
+    logging.info(f'Health endpoint на порту {server.server_port}')
+    return server
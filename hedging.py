@@ -0,0 +1,143 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+HEDGE_RATIO = float(os.getenv('HEDGE_RATIO', 0))
+HEDGE_QUANTILE = 0.95
+LATENCY_WINDOW = 1000
+MIN_SAMPLES = 50
+
+
+class LatencyWindow:
+    """Задержки последних запросов для оценки квантилей."""
+
+    def __init__(self, size=LATENCY_WINDOW, min_samples=MIN_SAMPLES):
+        self.samples = deque(maxlen=size)
+        self.min_samples = min_samples
+        self.refresh_every = max(1, size // 10)
+        self._added = 0
+        self._sorted = None
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        """Добавляет задержку запроса."""
+        with self._lock:
+            self.samples.append(seconds)
+            self._added += 1
+            if self._added >= self.refresh_every:
+                self._sorted = None
+
+    def quantile(self, q):
+        """Квантиль задержки или None, пока данных мало."""
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            if self._sorted is None:
+                self._sorted = sorted(self.samples)
+                self._added = 0
+            return self._sorted[int(q * (len(self._sorted) - 1))]
+
+
+class Hedger:
+    """Дублирует запросы, которые отвечают дольше обычного.
+
+    Если запрос не ответил за наблюдаемый квантиль задержки (p95), тот же
+    запрос отправляется еще раз в отдельном потоке, то есть по другому
+    соединению из пула, и используется ответ, пришедший первым. Доля
+    дублей ограничена ratio от всех запросов: место под дубль занимается
+    под блокировкой в момент его отправки. Задержка отсчитывается с начала
+    выполнения запроса, а не с постановки в очередь пула; пул из threads
+    потоков должен вмещать основной запрос и дубль каждого потока опроса.
+    """
+
+    def __init__(self, ratio=HEDGE_RATIO, quantile=HEDGE_QUANTILE,
+                 latencies=None, threads=2):
+        self.ratio = ratio
+        self.quantile = quantile
+        self.latencies = latencies or LatencyWindow()
+        self.executor = ThreadPoolExecutor(
+            threads, thread_name_prefix='hedge'
+        )
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+        self._lock = threading.Lock()
+
+    def _timed(self, func, args, started=None):
+        if started is not None:
+            started.set()
+        begin = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.latencies.add(time.perf_counter() - begin)
+
+    def _submit(self, func, args, started=None):
+        context = contextvars.copy_context()
+        return self.executor.submit(
+            context.run, self._timed, func, args, started
+        )
+
+    def _reserve(self):
+        """Занимает место под дубль, если позволяет доля ratio."""
+        with self._lock:
+            if self.ratio * self.requests - self.hedges < 1:
+                return False
+            self.hedges += 1
+            return True
+
+    def call(self, func, *args):
+        """Выполняет func(*args), при задержке дублируя вызов."""
+        with self._lock:
+            self.requests += 1
+            budget = self.ratio * self.requests - self.hedges
+        delay = self.latencies.quantile(self.quantile)
+        if delay is None or budget < 1:
+            return self._timed(func, args)
+        started = threading.Event()
+        primary = self._submit(func, args, started)
+        started.wait()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._reserve():
+            return primary.result()
+        hedge = self._submit(func, args)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self.wins += 1
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    def snapshot(self):
+        """Сводка для проверки живости."""
+        p95 = self.latencies.quantile(self.quantile)
+        with self._lock:
+            requests, hedges, wins = self.requests, self.hedges, self.wins
+        return {
+            'requests': requests,
+            'hedges': hedges,
+            'wins': wins,
+            'hedge_rate': round(hedges / requests, 4) if requests else 0,
+            'win_rate': round(wins / hedges, 4) if hedges else 0,
+            'p95_ms': None if p95 is None else round(p95 * 1000, 3),
+        }
+
+
+def make_hedger(poll_threads=0):
+    """Дублирование запросов по HEDGE_RATIO или None, если выключено.
+
+    Пул вмещает основной запрос и дубль каждого из poll_threads потоков
+    опроса, чтобы ожидание в очереди пула не вызывало лишних дублей.
+    """
+    if not HEDGE_RATIO:
+        return None
+    return Hedger(threads=2 * max(poll_threads, 1))
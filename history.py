@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+HISTORY_SIZE = 10
+MAX_HOMEWORKS = 30
+MAX_COMMENT_LENGTH = 300
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+STATUSES = ('reviewing', 'approved', 'rejected')
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+def parse_date(value, default):
+    """Переводит date_updated из ответа API в timestamp."""
+    try:
+        return int(
+            datetime.strptime(value, DATE_FORMAT)
+            .replace(tzinfo=timezone.utc)
+            .timestamp()
+        )
+    except (TypeError, ValueError):
+        return int(default)
+
+
+class HistoryBook:
+    """История статусов домашек с ограниченным объемом памяти.
+
+    Для каждой домашки хранится кольцевой буфер из HISTORY_SIZE записей
+    (код статуса, timestamp, комментарий ревьюера), для студента - не более
+    MAX_HOMEWORKS последних домашек.
+    """
+
+    def __init__(self, size=HISTORY_SIZE, max_homeworks=MAX_HOMEWORKS):
+        self.size = size
+        self.max_homeworks = max_homeworks
+        self.tenants = {}
+        self._lock = threading.Lock()
+
+    def record(self, tenant_id, homework, now):
+        """Добавляет статус домашки, если он отличается от последнего."""
+        code = STATUS_CODES.get(homework.get('status'))
+        name = homework.get('homework_name')
+        if code is None or name is None:
+            return False
+        timestamp = parse_date(homework.get('date_updated'), now)
+        comment = (homework.get('reviewer_comment') or '')[
+            :MAX_COMMENT_LENGTH
+        ]
+        with self._lock:
+            homeworks = self.tenants.setdefault(tenant_id, OrderedDict())
+            entries = homeworks.get(name)
+            if entries is None:
+                entries = homeworks[name] = deque(maxlen=self.size)
+            elif entries and entries[-1][:2] == (code, timestamp):
+                return False
+            entries.append((code, timestamp, comment))
+            homeworks.move_to_end(name)
+            while len(homeworks) > self.max_homeworks:
+                homeworks.popitem(last=False)
+        return True
+
+    def get(self, tenant_id):
+        """Копия истории студента: записи по каждой домашке."""
+        with self._lock:
+            return {
+                name: [
+                    (STATUSES[code], timestamp, comment)
+                    for code, timestamp, comment in entries
+                ]
+                for name, entries in self.tenants.get(tenant_id, {}).items()
+            }
+
+    def forget(self, tenant_id):
+        """Удаляет историю студента."""
+        with self._lock:
+            self.tenants.pop(tenant_id, None)
+
+    def dump(self, tenant_ids):
+        """Данные для сохранения на диск."""
+        with self._lock:
+            return {
+                tenant_id: {
+                    name: [list(entry) for entry in entries]
+                    for name, entries in self.tenants[tenant_id].items()
+                }
+                for tenant_id in tenant_ids if tenant_id in self.tenants
+            }
+
+    def load(self, data):
+        """Восстанавливает историю, сохраненную методом dump."""
+        with self._lock:
+            for tenant_id, homeworks in data.items():
+                self.tenants[tenant_id] = OrderedDict(
+                    (name, deque(map(tuple, entries), maxlen=self.size))
+                    for name, entries in homeworks.items()
+                )
@@ -9,6 +9,10 @@ import telebot
 import requests
 
 import exceptions
+import json_codec
+import json_logging
+import retry_policy
+from transfer import ACCEPT_ENCODING
 
 load_dotenv()
 
@@ -18,8 +22,15 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_PERIOD = 600
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+HEADERS = {
+    'Authorization': f'OAuth {PRACTICUM_TOKEN}',
+    'Accept-Encoding': ACCEPT_ENCODING
+}
 ERROR_NOTIFICATION_INTERVAL = 3600
+REQUEST_TIMEOUT = 30
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+TEXT_LOG_FORMAT = ('%(asctime)s - %(levelname)s'
+                   ' - %(message)s - %(funcName)s - %(lineno)d')
 
 
 HOMEWORK_VERDICTS = {
@@ -46,45 +57,118 @@ def check_tokens():
     return tokens_availability
 
 
-def send_message(bot, message):
-    """Отправка сообщений."""
+def send_chat_message(bot, chat_id, message):
+    """Отправляет сообщение в указанный чат."""
     try:
         logging.debug(f'Отправлено сообщение: "{message}"')
-        return bot.send_message(TELEGRAM_CHAT_ID, message)
+        return bot.send_message(chat_id, message)
     except Exception as error:
         logging.error(f'Ошибка отправки сообщения: {error}')
+        if isinstance(error, exceptions.MessageError):
+            raise
         raise exceptions.MessageError(
             f'Боту не удалось отправить сообщение: "{error}"'
         )
 
 
-def get_api_answer(timestamp):
-    """Делает запрос к эндпоинту API сервиса Практикум.Домашка."""
+def send_tenant_message(bot, context, message):
+    """Отправляет сообщение в чат студента из контекста."""
+    return send_chat_message(bot, context.chat_id, message)
+
+
+def send_message(bot, message):
+    """Отправка сообщений."""
+    return send_tenant_message(bot, environment_context(), message)
+
+
+def make_headers(token):
+    """Формирует заголовки запроса для токена студента."""
+    return {
+        'Authorization': f'OAuth {token}',
+        'Accept-Encoding': ACCEPT_ENCODING
+    }
+
+
+class TenantContext:
+    """Все, что нужно для опроса одного студента.
+
+    Передается по цепочке запрос - проверка - отправка вместо глобальных
+    HEADERS, ENDPOINT и TELEGRAM_CHAT_ID, поэтому студентов можно
+    опрашивать одновременно в разных потоках.
+    """
+
+    __slots__ = (
+        'tenant_id', 'token', 'chat_id', 'headers', 'endpoint', 'session',
+        'timeout',
+    )
+
+    def __init__(self, token, chat_id, tenant_id=None, session=None,
+                 endpoint=None, timeout=None, headers=None):
+        self.tenant_id = tenant_id
+        self.token = token
+        self.chat_id = chat_id
+        self.headers = headers or make_headers(token)
+        self.endpoint = endpoint or ENDPOINT
+        self.session = session
+        self.timeout = timeout or REQUEST_TIMEOUT
+
+
+def environment_context():
+    """Контекст единственного студента из переменных окружения."""
+    return TenantContext(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, headers=HEADERS)
+
+
+def send_tenant_request(context, timestamp):
+    """Отправляет запрос к API от имени студента из контекста."""
     params = {'from_date': timestamp}
     try:
-        homework_statuses = requests.get(
-            ENDPOINT,
-            headers=HEADERS,
-            params=params
+        homework_statuses = (context.session or requests).get(
+            context.endpoint,
+            headers=context.headers,
+            params=params,
+            timeout=context.timeout
         )
     except Exception as error:
         raise exceptions.EndpointException(
-            f'Эндпоинт {ENDPOINT} недоступен: {error}. Время: {timestamp}'
+            f'Эндпоинт {context.endpoint} недоступен: {error}. '
+            f'Время: {timestamp}'
         )
 
     if homework_statuses.status_code != HTTPStatus.OK:
         raise exceptions.WrongStatusCode(
-            f'Статус код: {homework_statuses.status_code}'
+            f'Статус код: {homework_statuses.status_code}',
+            homework_statuses.status_code
         )
+    return homework_statuses
+
+
+def decode_response(homework_statuses):
+    """Преобразует тело ответа API из JSON.
 
+    Разбирает байты тела быстрым декодером; у ответов без content
+    используется их собственный метод json().
+    """
+    content = getattr(homework_statuses, 'content', None)
     try:
-        return homework_statuses.json()
+        if content is None:
+            return homework_statuses.json()
+        return json_codec.loads(content)
     except Exception as error:
         raise exceptions.ResponseException(
             f'Невозможно преобразовать к формату json: {error}'
         )
 
 
+def get_tenant_answer(context, timestamp):
+    """Делает запрос к API от имени студента из контекста."""
+    return decode_response(send_tenant_request(context, timestamp))
+
+
+def get_api_answer(timestamp):
+    """Делает запрос к эндпоинту API сервиса Практикум.Домашка."""
+    return get_tenant_answer(environment_context(), timestamp)
+
+
 def check_response(response):
     """Проверяет ответ API на соответствие."""
     if not isinstance(response, dict):
@@ -108,8 +192,8 @@ def check_response(response):
     return homeworks
 
 
-def parse_status(homework):
-    """Извлекает статус конкретной домашки."""
+def validate_status(homework):
+    """Проверяет домашку и возвращает ее имя и статус."""
     if 'homework_name' not in homework:
         raise KeyError(
             'Ключ "homework_name" отсутствует в коллекции "homework".'
@@ -126,6 +210,12 @@ def parse_status(homework):
         raise exceptions.ParseException(
             f'Неизвестный статус работы {homework_name}: {homework_status}.'
         )
+    return homework_name, homework_status
+
+
+def parse_status(homework):
+    """Извлекает статус конкретной домашки."""
+    homework_name, homework_status = validate_status(homework)
     verdict = HOMEWORK_VERDICTS[homework_status]
     return f'Изменился статус проверки работы "{homework_name}". {verdict}'
 
@@ -137,11 +227,14 @@ def main():
 
     bot = telebot.TeleBot(token=TELEGRAM_TOKEN)
     timestamp = 0
+    failures = 0
     current_status = {'message': '', 'time': 0}
     while True:
+        delay = RETRY_PERIOD
         try:
             response = get_api_answer(timestamp)
             homework = check_response(response)
+            failures = 0
             if not homework:
                 logging.debug('Статус не обновлен')
                 continue
@@ -154,6 +247,10 @@ def main():
                     'time': time.time()
                 }
         except Exception as error:
+            failures += 1
+            delay = retry_policy.retry_delay(
+                retry_policy.classify(error), failures, RETRY_PERIOD
+            )
             error_message = f'Сбой в работе программы: {error}'
             current_time = time.time()
             logging.error(error_message)
@@ -165,22 +262,34 @@ def main():
                     'message': error_message,
                     'time': current_time
                 }
+            if delay is None:
+                break
         finally:
-            time.sleep(RETRY_PERIOD)
+            if delay is not None:
+                time.sleep(delay)
+    logging.critical('Опрос остановлен до исправления настроек.')
 
 
-if __name__ == '__main__':
+def configure_logging():
+    """Настраивает вывод логов в файл и в консоль."""
+    handlers = [
+        logging.FileHandler(
+            os.path.join(os.path.dirname(__file__), 'logs.log'),
+            encoding='utf-8'
+        ),
+        logging.StreamHandler(sys.stdout),
+    ]
+    json_logging.install(
+        handlers, json_format=LOG_FORMAT == 'json',
+        text_format=TEXT_LOG_FORMAT
+    )
     logging.basicConfig(
         level=logging.DEBUG,
-        encoding='utf-8',
-        format=('%(asctime)s - %(levelname)s'
-                ' - %(message)s - %(funcName)s - %(lineno)d'),
-        handlers=[
-            logging.FileHandler(
-                os.path.join(os.path.dirname(__file__), 'logs.log')
-            ),
-            logging.StreamHandler(sys.stdout),
-        ]
+        format=TEXT_LOG_FORMAT,
+        handlers=handlers
     )
 
+
+if __name__ == '__main__':
+    configure_logging()
     main()
@@ -0,0 +1,34 @@
+import json
+import logging
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_DECODER = os.getenv('JSON_DECODER', 'auto')
+
+DECODERS = {'json': json.loads}
+if orjson is not None:
+    DECODERS['orjson'] = orjson.loads
+
+
+def get_decoder(name=JSON_DECODER):
+    """Функция разбора JSON из bytes: orjson, если установлен, иначе json.
+
+    Обе функции принимают bytes без промежуточной строки и бросают
+    наследников ValueError на некорректном JSON.
+    """
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'json'
+    decoder = DECODERS.get(name)
+    if decoder is None:
+        logging.warning(
+            f'Декодер JSON "{name}" недоступен, используется json'
+        )
+        decoder = json.loads
+    return decoder
+
+
+loads = get_decoder()
@@ -0,0 +1,156 @@
+import contextvars
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+SUMMARY_PERIOD = 300
+TENANT_LOG_LIMIT = 20
+MAX_TRACKED_EVENTS = 100_000
+FIELDS = (
+    'tenant', 'homework', 'latency_ms', 'exception_class', 'repeated',
+    'dropped',
+)
+
+_context = contextvars.ContextVar('log_context', default={})
+
+
+@contextmanager
+def log_context(**fields):
+    """Добавляет поля ко всем записям лога внутри блока."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Переносит поля из log_context в запись лога."""
+
+    def filter(self, record):
+        """Дополняет запись полями контекста."""
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class RepeatFilter(logging.Filter):
+    """Схлопывает повторяющиеся записи и ограничивает объем по студенту.
+
+    Одинаковая запись проходит раз в SUMMARY_PERIOD секунд, а следующая
+    прошедшая получает поле repeated с числом пропущенных повторов. Один
+    студент пишет не больше TENANT_LOG_LIMIT записей за период; число
+    отброшенных попадает в поле dropped первой записи следующего периода.
+    Записи уровня CRITICAL проходят всегда. Сверх tracked ключей
+    забываются самые старые из истекших; записи идут из нескольких
+    потоков, поэтому счетчики меняются под блокировкой.
+    """
+
+    def __init__(self, period=SUMMARY_PERIOD, tenant_limit=TENANT_LOG_LIMIT,
+                 tracked=MAX_TRACKED_EVENTS):
+        super().__init__()
+        self.period = period
+        self.tenant_limit = tenant_limit
+        self.tracked = tracked
+        self.events = {}
+        self.tenants = {}
+        self._lock = threading.Lock()
+
+    def _evict(self, entries, now):
+        while len(entries) > self.tracked:
+            key = next(iter(entries))
+            if now - entries[key][0] < self.period:
+                break
+            del entries[key]
+
+    def filter(self, record):
+        """Решает, пропустить ли запись."""
+        if record.levelno >= logging.CRITICAL:
+            return True
+        now = record.created
+        tenant = getattr(record, 'tenant', None)
+        key = (tenant, record.levelno, record.getMessage())
+        with self._lock:
+            event = self.events.get(key)
+            if event is not None and now - event[0] < self.period:
+                event[1] += 1
+                return False
+            if tenant is not None and not self._within_budget(tenant, now,
+                                                              record):
+                return False
+            if event is not None:
+                if event[1]:
+                    record.repeated = event[1]
+                del self.events[key]
+            self.events[key] = [now, 0]
+            self._evict(self.events, now)
+            self._evict(self.tenants, now)
+        return True
+
+    def _within_budget(self, tenant, now, record):
+        budget = self.tenants.get(tenant)
+        if budget is None or now - budget[0] >= self.period:
+            if budget is not None:
+                if budget[2]:
+                    record.dropped = budget[2]
+                del self.tenants[tenant]
+            budget = self.tenants[tenant] = [now, 0, 0]
+        if budget[1] >= self.tenant_limit:
+            budget[2] += 1
+            return False
+        budget[1] += 1
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON."""
+
+    def format(self, record):
+        """Сериализует запись."""
+        data = {
+            'time': datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'message': record.getMessage(),
+            'func': record.funcName,
+            'line': record.lineno,
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data.setdefault('exception_class', record.exc_info[0].__name__)
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Текстовая запись лога с полями контекста в конце строки."""
+
+    def format(self, record):
+        """Дописывает к строке заданные поля из FIELDS."""
+        text = super().format(record)
+        fields = ' '.join(
+            f'{field}={getattr(record, field)}' for field in FIELDS
+            if getattr(record, field, None) is not None
+        )
+        if not fields:
+            return text
+        head, newline, tail = text.partition('\n')
+        return f'{head} [{fields}]{newline}{tail}'
+
+
+def install(handlers, json_format=False, text_format=None):
+    """Подключает контекст и схлопывание повторов к корневому логгеру."""
+    root = logging.getLogger()
+    root.addFilter(ContextFilter())
+    root.addFilter(RepeatFilter())
+    for handler in handlers:
+        handler.setFormatter(
+            JsonFormatter() if json_format else TextFormatter(text_format)
+        )
@@ -0,0 +1,141 @@
+import bisect
+import heapq
+import os
+from array import array
+from collections import deque
+
+LATENCY_SLO = int(os.getenv('LATENCY_SLO', 900))
+LATENCY_OBJECTIVE = float(os.getenv('LATENCY_OBJECTIVE', 0.95))
+LATENCY_BUCKETS = (
+    15, 30, 60, 120, 180, 300, 450, 600, 900, 1200, 1800, 3600, 7200,
+    21600, 86400,
+)
+BURN_WINDOWS = {'1h': 3600, '6h': 6 * 3600}
+SLOWEST_TENANTS = 5
+
+
+class Histogram:
+    """Гистограмма задержек с фиксированными границами корзин."""
+
+    __slots__ = ('counts', 'total', 'maximum')
+
+    def __init__(self):
+        self.counts = array('L', [0]) * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        """Добавляет задержку в секундах."""
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    def quantile(self, q):
+        """Квантиль q с линейной интерполяцией внутри корзины.
+
+        Для задержек больше последней границы возвращается максимум;
+        без данных - None.
+        """
+        count = len(self)
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                break
+            seen += bucket_count
+        if index == len(LATENCY_BUCKETS):
+            return round(self.maximum, 3)
+        lower = LATENCY_BUCKETS[index - 1] if index else 0
+        upper = min(LATENCY_BUCKETS[index], self.maximum)
+        return round(
+            lower + (upper - lower) * (rank - seen) / bucket_count, 3
+        )
+
+    def snapshot(self):
+        """Сводка: число уведомлений, среднее и квантили в секундах."""
+        count = len(self)
+        return {
+            'count': count,
+            'mean': round(self.total / count, 3) if count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+class LatencyTracker:
+    """Задержка уведомлений от date_updated до подтверждения Telegram.
+
+    Ведет гистограммы по студентам и общую, а для SLO "доля objective
+    уведомлений доставлена быстрее slo секунд" считает скорость
+    расходования бюджета ошибок (burn rate) в окнах BURN_WINDOWS:
+    1 - расход ровно в темпе SLO, больше 1 - бюджет кончится раньше.
+    """
+
+    def __init__(self, slo=LATENCY_SLO, objective=LATENCY_OBJECTIVE,
+                 windows=BURN_WINDOWS):
+        self.slo = slo
+        self.objective = objective
+        self.windows = windows
+        self.overall = Histogram()
+        self.tenants = {}
+        self.minutes = deque()
+
+    def observe(self, tenant_id, latency, now):
+        """Учитывает доставленное уведомление."""
+        latency = max(latency, 0)
+        self.overall.observe(latency)
+        histogram = self.tenants.get(tenant_id)
+        if histogram is None:
+            histogram = self.tenants[tenant_id] = Histogram()
+        histogram.observe(latency)
+        minute = int(now // 60)
+        minutes = self.minutes
+        if not minutes or minutes[-1][0] != minute:
+            minutes.append([minute, 0, 0])
+        minutes[-1][1 if latency <= self.slo else 2] += 1
+        horizon = minute - max(self.windows.values()) // 60
+        while minutes[0][0] <= horizon:
+            minutes.popleft()
+
+    def forget(self, tenant_id):
+        """Удаляет гистограмму студента."""
+        self.tenants.pop(tenant_id, None)
+
+    def burn_rate(self, window, now):
+        """Скорость расходования бюджета ошибок за window секунд."""
+        since = int(now // 60) - window // 60
+        good = bad = 0
+        for minute, minute_good, minute_bad in reversed(self.minutes):
+            if minute <= since:
+                break
+            good += minute_good
+            bad += minute_bad
+        if not good + bad:
+            return None
+        return round(bad / (good + bad) / (1 - self.objective), 3)
+
+    def snapshot(self, now):
+        """Сводка для проверки живости."""
+        slowest = heapq.nlargest(
+            SLOWEST_TENANTS, self.tenants.items(),
+            key=lambda item: item[1].total / len(item[1])
+        )
+        return {
+            'slo_seconds': self.slo,
+            'objective': self.objective,
+            'overall': self.overall.snapshot(),
+            'burn_rate': {
+                name: self.burn_rate(window, now)
+                for name, window in self.windows.items()
+            },
+            'slowest': {
+                tenant_id: histogram.snapshot()
+                for tenant_id, histogram in slowest
+            },
+        }
@@ -0,0 +1,200 @@
+import logging
+import math
+import os
+import socket
+import sqlite3
+import threading
+
+from budget import REQUESTS_PER_MINUTE
+from sharding import hash_key
+
+SHARDS = 64
+# Узел с этим шардом читает команды из Telegram. При перераспределении
+# узел сохраняет шарды с меньшими номерами, поэтому шард 0 переходит к
+# другому узлу, только если его владелец перестал продлевать аренду.
+LEADER_SHARD = 0
+LEASE_TTL = 30
+NODE_ID = os.getenv('NODE_ID', f'{socket.gethostname()}-{os.getpid()}')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS leases (
+    shard INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    node TEXT PRIMARY KEY,
+    expires REAL NOT NULL
+);
+'''
+
+
+def shard_of(tenant, shards=SHARDS):
+    """Номер шарда, к которому относится студент."""
+    return hash_key(tenant.practicum_token) % shards
+
+
+class LeaseManager:
+    """Аренда шардов студентов через общее хранилище SQLite."""
+
+    def __init__(self, path, node_id=NODE_ID, ttl=LEASE_TTL, shards=SHARDS):
+        self.node_id = node_id
+        self.ttl = ttl
+        self.shards = shards
+        self.owned = frozenset()
+        self.live_nodes = 1
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=ttl, isolation_level=None)
+        self.db.executescript(SCHEMA)
+
+    def owns(self, tenant):
+        """Принадлежит ли студент одному из арендованных шардов."""
+        return shard_of(tenant, self.shards) in self.owned
+
+    def _balance(self, now):
+        db = self.db
+        db.execute(
+            'INSERT INTO nodes VALUES (?, ?) '
+            'ON CONFLICT(node) DO UPDATE SET expires = excluded.expires',
+            (self.node_id, now + self.ttl)
+        )
+        live_nodes = db.execute(
+            'SELECT COUNT(*) FROM nodes WHERE expires > ?', (now,)
+        ).fetchone()[0]
+        self.live_nodes = max(live_nodes, 1)
+        share = math.ceil(self.shards / self.live_nodes)
+        taken = dict(db.execute(
+            'SELECT shard, owner FROM leases WHERE expires > ?', (now,)
+        ).fetchall())
+        mine = sorted(
+            shard for shard, owner in taken.items() if owner == self.node_id
+        )
+        for shard in mine[share:]:
+            db.execute(
+                'DELETE FROM leases WHERE shard = ? AND owner = ?',
+                (shard, self.node_id)
+            )
+        mine = mine[:share]
+        free = [shard for shard in range(self.shards) if shard not in taken]
+        mine.extend(free[:share - len(mine)])
+        db.executemany(
+            'INSERT INTO leases VALUES (?, ?, ?) '
+            'ON CONFLICT(shard) DO UPDATE SET '
+            'owner = excluded.owner, expires = excluded.expires',
+            [(shard, self.node_id, now + self.ttl) for shard in mine]
+        )
+        return frozenset(mine)
+
+    def heartbeat(self, now):
+        """Продлевает аренду и перераспределяет шарды.
+
+        Возвращает True, если набор арендованных шардов изменился.
+        """
+        try:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                owned = self._balance(now)
+            except Exception:
+                self.db.execute('ROLLBACK')
+                raise
+            self.db.execute('COMMIT')
+        except sqlite3.Error as error:
+            logging.error(f'{self.node_id}: аренда не продлена: {error}')
+            owned = frozenset()
+        changed = owned != self.owned
+        if changed:
+            logging.info(
+                f'{self.node_id}: получено {len(owned - self.owned)}, '
+                f'отдано {len(self.owned - owned)} шардов'
+            )
+        self.owned = owned
+        return changed
+
+    def extend(self, db, now):
+        """Продлевает уже арендованные шарды, не перераспределяя их."""
+        try:
+            with db:
+                db.execute(
+                    'UPDATE leases SET expires = ? WHERE owner = ?',
+                    (now + self.ttl, self.node_id)
+                )
+                db.execute(
+                    'UPDATE nodes SET expires = ? WHERE node = ?',
+                    (now + self.ttl, self.node_id)
+                )
+        except sqlite3.Error as error:
+            logging.error(f'{self.node_id}: аренда не продлена: {error}')
+
+    def keep_alive(self, clock, period=None):
+        """Продлевает аренду из отдельного потока.
+
+        Цикл опроса может идти дольше ttl, и без этого шарды узла забрали
+        бы другие узлы, пока он еще отправляет уведомления. Возвращает
+        Event, который останавливает поток.
+        """
+        period = self.ttl / 3 if period is None else period
+        stop = threading.Event()
+
+        def run():
+            db = sqlite3.connect(self.path, timeout=self.ttl)
+            try:
+                while not stop.wait(period):
+                    self.extend(db, clock.time())
+            finally:
+                db.close()
+
+        threading.Thread(target=run, name='leases', daemon=True).start()
+        return stop
+
+    def release(self):
+        """Освобождает все шарды при остановке узла."""
+        self.db.execute(
+            'DELETE FROM leases WHERE owner = ?', (self.node_id,)
+        )
+        self.db.execute('DELETE FROM nodes WHERE node = ?', (self.node_id,))
+        self.owned = frozenset()
+
+
+def renew(worker, leases, now, commands=None):
+    """Продлевает аренду и подстраивает узел под новый состав.
+
+    Бюджет запросов REQUESTS_PER_MINUTE делится поровну между живыми
+    узлами, как между процессами в supervisor.py.
+    """
+    nodes = leases.live_nodes
+    if leases.heartbeat(now):
+        worker.set_owner(leases.owns, now)
+    if worker.budget is not None and leases.live_nodes != nodes:
+        worker.budget.set_rate(REQUESTS_PER_MINUTE / leases.live_nodes)
+    if commands is not None:
+        commands.lead()
+
+
+def run_with_leases(worker, leases, commands=None):
+    """Цикл опроса, в котором узел обслуживает только свои шарды.
+
+    commands - SharedCommandHandler, отвечающий на команды студентов
+    арендованных шардов.
+    """
+    clock = worker.clock
+    worker.set_owner(leases.owns, clock.time())
+    next_heartbeat = 0
+    stop = leases.keep_alive(clock)
+    try:
+        while True:
+            now = clock.time()
+            if now >= next_heartbeat:
+                renew(worker, leases, now, commands)
+                next_heartbeat = now + leases.ttl / 3
+            if commands is not None:
+                commands.process(now)
+            worker.run_once(now)
+            now = clock.time()
+            clock.sleep(
+                min(worker.seconds_to_wait(now), max(next_heartbeat - now, 0))
+            )
+    finally:
+        stop.set()
+        leases.release()
+        if commands is not None:
+            commands.lead()
@@ -0,0 +1,176 @@
+import logging
+import os
+import socket
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from telebot import apihelper
+
+DNS_TTL = int(os.getenv('DNS_TTL', 300))
+PREWARM_CONNECTIONS = int(os.getenv('PREWARM_CONNECTIONS', 2))
+POOL_SIZE = 10
+PREWARM_TIMEOUT = 5
+TELEGRAM_URL = 'https://api.telegram.org/'
+
+
+class DnsCache:
+    """Кеш результатов getaddrinfo с ограниченным временем жизни."""
+
+    def __init__(self, ttl=DNS_TTL, resolve=socket.getaddrinfo,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.resolve = resolve
+        self.clock = clock
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def getaddrinfo(self, host, port, *args, **kwargs):
+        """Замена socket.getaddrinfo, отдающая адреса из кеша."""
+        key = (host, port, args, tuple(sorted(kwargs.items())))
+        now = self.clock()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+        result = self.resolve(host, port, *args, **kwargs)
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = (now + self.ttl, result)
+        return result
+
+    def install(self):
+        """Подменяет socket.getaddrinfo для всего процесса."""
+        socket.getaddrinfo = self.getaddrinfo
+        return self
+
+
+class ResumableSocket(ssl.SSLSocket):
+    """TLS-сокет, отдающий контексту сессию перед закрытием."""
+
+    def close(self):
+        """Запоминает сессию и закрывает соединение."""
+        self.context.remember(self.server_hostname, self.session)
+        super().close()
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """TLS-контекст, возобновляющий сессии по имени хоста.
+
+    Билет сессии TLS 1.3 приходит уже после рукопожатия, поэтому сессия
+    берется из последнего открытого сокета хоста или запоминается при
+    закрытии соединения.
+    """
+
+    def __new__(cls, protocol=ssl.PROTOCOL_TLS_CLIENT):
+        """Создает клиентский контекст."""
+        return super().__new__(cls, protocol)
+
+    def __init__(self, protocol=ssl.PROTOCOL_TLS_CLIENT):
+        self.sslsocket_class = ResumableSocket
+        self.minimum_version = ssl.TLSVersion.TLSv1_2
+        self.latest = {}
+        self.sessions = {}
+        self.handshakes = 0
+        self.resumed = 0
+        self._lock = threading.Lock()
+
+    def remember(self, host, session):
+        """Сохраняет сессию хоста, если по ней можно возобновиться."""
+        if session is not None and session.has_ticket:
+            with self._lock:
+                self.sessions[host] = session
+
+    def session_for(self, host):
+        """Сессия для возобновления соединения с хостом."""
+        with self._lock:
+            previous = self.latest.get(host)
+            session = previous.session if previous is not None else None
+            if session is None or not session.has_ticket:
+                session = self.sessions.get(host)
+        return session
+
+    def wrap_socket(self, sock, server_hostname=None, **kwargs):
+        """Открывает TLS-соединение, предлагая сохраненную сессию."""
+        session = self.session_for(server_hostname)
+        if session is not None:
+            kwargs.setdefault('session', session)
+        tls = super().wrap_socket(
+            sock, server_hostname=server_hostname, **kwargs
+        )
+        with self._lock:
+            self.latest[server_hostname] = tls
+            self.handshakes += 1
+            self.resumed += tls.session_reused
+        return tls
+
+
+class ResumingAdapter(HTTPAdapter):
+    """Адаптер requests с общим TLS-контекстом для всех соединений."""
+
+    def __init__(self, ssl_context, **kwargs):
+        self.ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        """Передает TLS-контекст пулу соединений."""
+        kwargs['ssl_context'] = self.ssl_context
+        super().init_poolmanager(*args, **kwargs)
+
+
+def make_session(pool_size=POOL_SIZE, ssl_context=None):
+    """Сессия requests с пулом соединений и возобновлением TLS."""
+    session = requests.Session()
+    session.mount('https://', ResumingAdapter(
+        ssl_context or ResumingSSLContext(),
+        pool_connections=pool_size,
+        pool_maxsize=pool_size
+    ))
+    session.mount('http://', HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size
+    ))
+    return session
+
+
+def prewarm(session, urls, count=PREWARM_CONNECTIONS,
+            timeout=PREWARM_TIMEOUT):
+    """Заранее открывает count соединений к каждому адресу.
+
+    Запросы HEAD идут параллельно, поэтому каждый занимает отдельное
+    соединение, которое потом остается в пуле. Возвращает число удачных
+    запросов.
+    """
+    if count <= 0:
+        return 0
+
+    def head(url):
+        try:
+            session.head(url, timeout=timeout)
+        except requests.RequestException as error:
+            logging.warning(f'Не удалось прогреть соединение {url}: {error}')
+            return False
+        return True
+
+    with ThreadPoolExecutor(count * len(urls)) as executor:
+        warmed = sum(executor.map(head, list(urls) * count))
+    logging.info(f'Прогрето соединений: {warmed}')
+    return warmed
+
+
+def configure(urls, warm=PREWARM_CONNECTIONS, pool_size=POOL_SIZE):
+    """Готовит сеть процесса: DNS-кеш, общий пул соединений и прогрев.
+
+    Сессия используется и для API Практикума, и для Telegram.
+    """
+    if DNS_TTL > 0:
+        DnsCache().install()
+    session = make_session(pool_size)
+    apihelper.session = session
+    prewarm(session, urls, warm)
+    return session
@@ -0,0 +1,154 @@
+import itertools
+import os
+from http import HTTPStatus
+
+import exceptions
+
+OUTAGE_TENANTS = int(os.getenv('OUTAGE_TENANTS', 5))
+OUTAGE_RATIO = float(os.getenv('OUTAGE_RATIO', 0.8))
+OUTAGE_WINDOW = 120
+CANARIES = 3
+RECOVERY_SPREAD = int(os.getenv('RECOVERY_SPREAD', 300))
+OUTAGE_TIMEOUT = int(os.getenv('OUTAGE_TIMEOUT', 1800))
+OPERATOR_CHAT_ID = os.getenv('OPERATOR_CHAT_ID')
+UPSTREAM_STATUSES = {
+    HTTPStatus.REQUEST_TIMEOUT,
+    HTTPStatus.TOO_MANY_REQUESTS,
+}
+
+
+def is_upstream(error):
+    """Ошибка на стороне API, а не в настройках студента."""
+    if isinstance(error, exceptions.WrongStatusCode):
+        status_code = error.status_code or 0
+        return (status_code in UPSTREAM_STATUSES
+                or status_code >= HTTPStatus.INTERNAL_SERVER_ERROR)
+    return isinstance(
+        error, (exceptions.EndpointException, exceptions.ResponseException)
+    )
+
+
+class OutageDetector:
+    """Распознает сбой API по ошибкам у многих студентов сразу.
+
+    Хранит результат последнего опроса каждого студента за window секунд.
+    Сбой объявляется, когда ошибки API получили не меньше tenants
+    студентов и не меньше доли ratio опрошенных. Во время сбоя
+    опрашиваются только canaries проверочных студентов, остальные
+    откладываются; выбывшего проверочного студента заменяет один из
+    отложенных. Первый успешный опрос завершает сбой и начинает окно
+    наблюдения заново. Если за timeout секунд не пришло ни одного ответа
+    проверочных студентов, сбой тоже завершается: подтвердить его нечем.
+    """
+
+    def __init__(self, tenants=OUTAGE_TENANTS, ratio=OUTAGE_RATIO,
+                 window=OUTAGE_WINDOW, canaries=CANARIES,
+                 timeout=OUTAGE_TIMEOUT):
+        self.tenants = tenants
+        self.ratio = ratio
+        self.window = window
+        self.canary_count = canaries
+        self.timeout = timeout
+        self.latest = {}
+        self.failed = 0
+        self.active = False
+        self.since = None
+        self.probed = None
+        self.canaries = set()
+        self.paused = set()
+
+    def _evict(self, now):
+        latest = self.latest
+        while latest:
+            tenant_id = next(iter(latest))
+            moment, failed = latest[tenant_id]
+            if now - moment < self.window:
+                break
+            del latest[tenant_id]
+            self.failed -= failed
+
+    def record(self, tenant_id, now, failed):
+        """Учитывает опрос; возвращает True при начале или конце сбоя."""
+        self._evict(now)
+        previous = self.latest.pop(tenant_id, None)
+        if previous is not None:
+            self.failed -= previous[1]
+        self.latest[tenant_id] = (now, failed)
+        self.failed += failed
+        if self.active:
+            self.probed = now
+            if not failed:
+                self.end()
+                self.latest = {tenant_id: (now, failed)}
+                return True
+            return False
+        if self.failed >= max(self.tenants, self.ratio * len(self.latest)):
+            self.active = True
+            self.since = self.probed = now
+            self.canaries = set(itertools.islice((
+                tenant_id for tenant_id, (_, failed)
+                in reversed(self.latest.items()) if failed
+            ), self.canary_count))
+            return True
+        return False
+
+    def end(self):
+        """Завершает сбой и очищает окно наблюдения."""
+        self.active = False
+        self.latest = {}
+        self.failed = 0
+
+    def expired(self, now):
+        """Идет ли сбой дольше timeout без ответов проверочных студентов."""
+        return self.active and now - self.probed >= self.timeout
+
+    def replace(self, tenant_id):
+        """Снимает студента с проверки; возвращает замену из отложенных.
+
+        None, если студент не проверочный или заменить его некем.
+        """
+        if tenant_id not in self.canaries:
+            return None
+        self.canaries.discard(tenant_id)
+        if not self.paused:
+            return None
+        replacement = self.paused.pop()
+        self.canaries.add(replacement)
+        return replacement
+
+    def admit(self, tenant_id):
+        """Можно ли опрашивать студента; иначе он откладывается."""
+        if not self.active or tenant_id in self.canaries:
+            return True
+        if len(self.canaries) < self.canary_count:
+            self.canaries.add(tenant_id)
+            return True
+        self.paused.add(tenant_id)
+        return False
+
+    def resume(self):
+        """Забирает отложенных за время сбоя студентов."""
+        paused = self.paused | self.canaries
+        self.paused = set()
+        self.canaries = set()
+        return paused
+
+    def discard(self, tenant_id):
+        """Забывает студента."""
+        self.paused.discard(tenant_id)
+        self.canaries.discard(tenant_id)
+        entry = self.latest.pop(tenant_id, None)
+        if entry is not None:
+            self.failed -= entry[1]
+
+    def snapshot(self):
+        """Сводка для проверки живости."""
+        return {
+            'active': self.active,
+            'since': self.since if self.active else None,
+            'probed': self.probed if self.active else None,
+            'failing': self.failed,
+            'polled': len(self.latest),
+            'canaries': len(self.canaries),
+            'paused': len(self.paused),
+        }
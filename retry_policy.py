@@ -0,0 +1,57 @@
+from enum import Enum
+from http import HTTPStatus
+
+import exceptions
+
+FAST_RETRY_PERIOD = 60
+MAX_BACKOFF_PERIOD = 4 * 3600
+
+
+class Action(Enum):
+    """Что делать с опросом после ошибки."""
+
+    RETRY_FAST = 'retry-fast'
+    BACKOFF = 'back-off'
+    FATAL = 'fatal-until-reconfigured'
+
+
+EXCEPTION_ACTIONS = {
+    exceptions.EndpointException: Action.BACKOFF,
+    exceptions.ResponseException: Action.BACKOFF,
+    exceptions.ParseException: Action.BACKOFF,
+    exceptions.MessageError: Action.BACKOFF,
+    exceptions.TenantConfigError: Action.FATAL,
+}
+
+STATUS_ACTIONS = {
+    HTTPStatus.BAD_REQUEST: Action.BACKOFF,
+    HTTPStatus.UNAUTHORIZED: Action.FATAL,
+    HTTPStatus.FORBIDDEN: Action.FATAL,
+    HTTPStatus.NOT_FOUND: Action.BACKOFF,
+    HTTPStatus.REQUEST_TIMEOUT: Action.RETRY_FAST,
+    HTTPStatus.TOO_MANY_REQUESTS: Action.BACKOFF,
+    HTTPStatus.BAD_GATEWAY: Action.RETRY_FAST,
+    HTTPStatus.GATEWAY_TIMEOUT: Action.RETRY_FAST,
+}
+
+
+def classify(error):
+    """Определяет реакцию на ошибку по ее классу и статус коду."""
+    if isinstance(error, exceptions.WrongStatusCode):
+        return STATUS_ACTIONS.get(error.status_code, Action.BACKOFF)
+    for error_class in type(error).__mro__:
+        if error_class in EXCEPTION_ACTIONS:
+            return EXCEPTION_ACTIONS[error_class]
+    return Action.BACKOFF
+
+
+def retry_delay(action, failures, period):
+    """Пауза перед следующим опросом; None, если опрос надо остановить.
+
+    failures - число ошибок подряд, включая текущую.
+    """
+    if action is Action.FATAL:
+        return None
+    if action is Action.RETRY_FAST:
+        return min(FAST_RETRY_PERIOD, period)
+    return min(period * 2 ** max(failures - 1, 0), MAX_BACKOFF_PERIOD)
@@ -0,0 +1,101 @@
+import heapq
+import itertools
+from collections import deque
+
+
+class PollSchedule:
+    """Очередь опросов студентов, упорядоченная по времени.
+
+    Для разбора отставания по срочности наступившие опросы переносятся из
+    кучи в очереди своих классов срочности, где ждут в порядке времени.
+    Каждый опрос переносится один раз, поэтому цикл опроса не сортирует
+    заново весь просроченный хвост.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        self._ready = {}
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, key, due):
+        """Ставит опрос в очередь или переносит уже запланированный."""
+        self.remove(key)
+        entry = [due, next(self._counter), key]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, key):
+        """Убирает опрос из очереди."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry[-1] = None
+
+    def due_time(self, key):
+        """Возвращает время запланированного опроса."""
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def next_due(self):
+        """Возвращает время ближайшего опроса."""
+        while self._heap and self._heap[0][-1] is None:
+            heapq.heappop(self._heap)
+        heads = [self._heap[0][0]] if self._heap else []
+        for queue in self._ready.values():
+            while queue and queue[0][-1] is None:
+                queue.popleft()
+            if queue:
+                heads.append(queue[0][0])
+        return min(heads, default=None)
+
+    def pop_due(self, now, limit=None, urgency=None):
+        """Забирает из очереди опросы, время которых наступило.
+
+        limit ограничивает число опросов; остальные остаются в очереди.
+        urgency - функция от ключа, возвращающая класс срочности: опросы
+        забираются сначала из класса с наименьшим значением.
+        """
+        if urgency is not None:
+            return self._pop_urgent(now, limit, urgency)
+        self._unready()
+        keys = []
+        while self._heap and self._heap[0][0] <= now:
+            if limit is not None and len(keys) >= limit:
+                break
+            entry = heapq.heappop(self._heap)
+            key = entry[-1]
+            if key is not None:
+                del self._entries[key]
+                keys.append(key)
+        return keys
+
+    def _pop_urgent(self, now, limit, urgency):
+        ready = self._ready
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if entry[-1] is not None:
+                ready.setdefault(urgency(entry[-1]), deque()).append(entry)
+        keys = []
+        for level in sorted(ready):
+            queue = ready[level]
+            while queue and (limit is None or len(keys) < limit):
+                key = queue.popleft()[-1]
+                if key is not None:
+                    del self._entries[key]
+                    keys.append(key)
+            if not queue:
+                del ready[level]
+        return keys
+
+    def _unready(self):
+        for queue in self._ready.values():
+            for entry in queue:
+                if entry[-1] is not None:
+                    heapq.heappush(self._heap, entry)
+        self._ready = {}
@@ -0,0 +1,29 @@
+import bisect
+import hashlib
+
+REPLICAS = 128
+
+
+def hash_key(key):
+    """Стабильный между процессами хеш строки."""
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Консистентное хеширование ключей по узлам."""
+
+    def __init__(self, nodes, replicas=REPLICAS):
+        self.nodes = tuple(nodes)
+        self._points = sorted(
+            (hash_key(f'{node}:{replica}'), node)
+            for node in self.nodes
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in self._points]
+
+    def node_for(self, key):
+        """Возвращает узел, которому принадлежит ключ."""
+        if not self._points:
+            raise LookupError('В кольце нет ни одного узла.')
+        index = bisect.bisect(self._hashes, hash_key(key))
+        return self._points[index % len(self._points)][1]
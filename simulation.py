@@ -0,0 +1,88 @@
+import argparse
+import random
+import time
+
+from budget import BudgetPlanner
+from clock import VirtualClock
+from stubs import PracticumStub, TelegramStub
+from tenants import StaticTenantRegistry, Tenant
+from worker import Worker
+
+DAY = 24 * 3600
+
+
+def add_random_history(api, token, rng, start, end):
+    """Генерирует отправки домашек и вердикты ревьюеров для токена."""
+    for number in range(rng.randint(1, 3)):
+        name = f'hw{number}'
+        at = rng.uniform(start, end)
+        at += rng.expovariate(1 / (6 * 3600))
+        api.add_status(token, at, name, 'reviewing')
+        at += rng.expovariate(1 / 3600)
+        verdict = rng.choices(('approved', 'rejected'), (3, 2))[0]
+        api.add_status(token, at, name, verdict, 'Комментарий ревьюера')
+
+
+def build(tenants, days, seed=0, outages=(), requests_per_minute=0):
+    """Собирает рабочий цикл против заглушек в виртуальном времени."""
+    rng = random.Random(seed)
+    clock = VirtualClock(start=1_700_000_000)
+    start = clock.time()
+    api = PracticumStub(clock, outages=[
+        (start + begin, start + end) for begin, end in outages
+    ])
+    bot = TelegramStub(clock)
+    tenant_list = []
+    for index in range(tenants):
+        tenant = Tenant(f'student{index}', f'token{index}', str(index))
+        add_random_history(api, tenant.practicum_token, rng,
+                           start, start + days * DAY)
+        tenant_list.append(tenant)
+    worker = Worker(
+        bot, StaticTenantRegistry(tenant_list), clock=clock, session=api
+    )
+    if requests_per_minute:
+        worker.budget = BudgetPlanner(requests_per_minute, worker.retry_period)
+    return worker, api, bot
+
+
+def simulate(tenants=1000, days=1, seed=0, outages=(),
+             requests_per_minute=0):
+    """Прогоняет days суток опроса и возвращает сводку."""
+    worker, api, bot = build(
+        tenants, days, seed, outages, requests_per_minute
+    )
+    clock = worker.clock
+    started = time.perf_counter()
+    worker.run(until=clock.time() + days * DAY)
+    return {
+        'tenants': tenants,
+        'virtual_seconds': days * DAY,
+        'wall_seconds': round(time.perf_counter() - started, 3),
+        'api_requests': api.requests,
+        'api_requests_per_minute': round(api.requests / (days * DAY / 60), 3),
+        'telegram_messages': len(bot.messages),
+        'notification_latency': worker.latency.overall.snapshot(),
+    }
+
+
+def main():
+    """Запуск симуляции из командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Симуляция опроса в виртуальном времени.'
+    )
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--days', type=float, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rpm', type=float, default=0,
+                        help='бюджет запросов к API в минуту')
+    args = parser.parse_args()
+    report = simulate(
+        args.tenants, args.days, args.seed, requests_per_minute=args.rpm
+    )
+    for key, value in report.items():
+        print(f'{key}: {value}')
+
+
+if __name__ == '__main__':
+    main()
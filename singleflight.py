@@ -0,0 +1,66 @@
+import threading
+import time
+
+CACHE_TTL = 5
+
+
+class _Call:
+    """Запрос, выполняющийся в данный момент."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Объединяет одинаковые одновременные запросы в один.
+
+    Пока запрос с ключом выполняется, остальные вызовы с тем же ключом ждут
+    его результата. Готовый результат еще ttl секунд отдается из кеша.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._cache = {}
+
+    def _evict(self, now):
+        cache = self._cache
+        while cache:
+            key = next(iter(cache))
+            if cache[key][0] > now:
+                break
+            del cache[key]
+
+    def do(self, key, func, *args):
+        """Выполняет func(*args) не более одного раза для ключа."""
+        with self._lock:
+            now = self.clock()
+            self._evict(now)
+            if key in self._cache:
+                return self._cache[key][1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func(*args)
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.ttl > 0:
+                    self._cache.pop(key, None)
+                    self._cache[key] = (self.clock() + self.ttl, call.result)
+            call.done.set()
+        return call.result
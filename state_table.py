@@ -0,0 +1,92 @@
+import hashlib
+from array import array
+
+NO_STATUS = -1
+
+COLUMNS = {
+    'cursor': ('q', 0),
+    'status': ('b', NO_STATUS),
+    'homework_fp': ('Q', 0),
+    'error_fp': ('Q', 0),
+    'error_time': ('d', 0.0),
+    'deadline': ('d', 0.0),
+    'failures': ('B', 0),
+    'weight': ('B', 0),
+}
+MAX_FAILURES = 255
+
+
+def fingerprint(*parts):
+    """64-битный хеш строк, стабильный между перезапусками."""
+    digest = hashlib.blake2b(
+        '\x1f'.join(map(str, parts)).encode(), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, 'big') or 1
+
+
+class StateTable:
+    """Состояния опроса студентов в колонках типизированных массивов.
+
+    Вместо словаря с текстом последнего сообщения на студента хранятся
+    курсор from_date, код последнего статуса, хеши имени последней работы и
+    последней ошибки, время уведомления об ошибке, срок следующего опроса,
+    число ошибок подряд и вес в бюджете запросов - около 40 байт на
+    студента. Освободившиеся строки
+    переиспользуются.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.free = []
+        for column, (typecode, _) in COLUMNS.items():
+            setattr(self, column, array(typecode))
+
+    def __contains__(self, tenant_id):
+        return tenant_id in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def slot(self, tenant_id):
+        """Номер строки студента."""
+        return self.index[tenant_id]
+
+    def add(self, tenant_id, **values):
+        """Добавляет студента; неизвестные поля игнорируются."""
+        if tenant_id in self.index:
+            self.remove(tenant_id)
+        if self.free:
+            slot = self.free.pop()
+            for column, (_, default) in COLUMNS.items():
+                getattr(self, column)[slot] = values.get(column, default)
+        else:
+            slot = len(self.cursor)
+            for column, (_, default) in COLUMNS.items():
+                getattr(self, column).append(values.get(column, default))
+        self.index[tenant_id] = slot
+        return slot
+
+    def remove(self, tenant_id):
+        """Удаляет студента, освобождая строку."""
+        slot = self.index.pop(tenant_id, None)
+        if slot is not None:
+            self.free.append(slot)
+
+    def row(self, tenant_id):
+        """Строка студента в виде словаря."""
+        slot = self.index[tenant_id]
+        return {column: getattr(self, column)[slot] for column in COLUMNS}
+
+    def dump(self):
+        """Все строки для сохранения на диск."""
+        return {tenant_id: self.row(tenant_id) for tenant_id in self.index}
+
+    def nbytes(self):
+        """Объем памяти, занятый колонками."""
+        return sum(
+            getattr(self, column).itemsize * len(getattr(self, column))
+            for column in COLUMNS
+        )
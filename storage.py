@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+
+
+def load_json(path, default):
+    """Читает JSON-файл; при ошибке возвращает default."""
+    try:
+        with open(path, encoding='utf-8') as state_file:
+            return json.load(state_file)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as error:
+        logging.error(f'Не удалось прочитать {path}: {error}')
+        return default
+
+
+def save_json(path, data):
+    """Атомарно записывает JSON-файл через временный файл."""
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as temp_file:
+            json.dump(data, temp_file, ensure_ascii=False)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class StateStore:
+    """Состояния опроса и история статусов студентов в общем файле SQLite.
+
+    Его делят процессы и узлы, между которыми переезжают студенты: владелец
+    записывает строки после каждого цикла опроса, а новый владелец
+    подхватывает их, не повторяет уже отправленные уведомления и отвечает
+    на /history.
+    """
+
+    BATCH = 500
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.db = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None,
+            check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS states ('
+            'tenant TEXT PRIMARY KEY, cursor INTEGER, status INTEGER, '
+            'homework_fp TEXT, error_fp TEXT, error_time REAL)'
+        )
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS history ('
+            'tenant TEXT PRIMARY KEY, data TEXT)'
+        )
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS outage ('
+            'id INTEGER PRIMARY KEY, active INTEGER, changed REAL)'
+        )
+
+    def _select(self, query, tenant_ids):
+        tenant_ids = list(tenant_ids)
+        for start in range(0, len(tenant_ids), self.BATCH):
+            batch = tenant_ids[start:start + self.BATCH]
+            yield from self.db.execute(
+                f'{query} WHERE tenant IN ({", ".join("?" * len(batch))})',
+                batch
+            )
+
+    def load(self, tenant_ids):
+        """Сохраненные строки студентов; неизвестные пропускаются."""
+        rows = {}
+        try:
+            with self._lock:
+                rows.update(
+                    (tenant_id, {
+                        'cursor': cursor, 'status': status,
+                        'homework_fp': int(homework_fp),
+                        'error_fp': int(error_fp), 'error_time': error_time,
+                    })
+                    for tenant_id, cursor, status, homework_fp, error_fp,
+                    error_time in self._select(
+                        'SELECT tenant, cursor, status, homework_fp, '
+                        'error_fp, error_time FROM states', tenant_ids
+                    )
+                )
+        except sqlite3.Error as error:
+            logging.error(f'Не удалось прочитать {self.path}: {error}')
+        return rows
+
+    def load_history(self, tenant_ids):
+        """История статусов студентов в формате HistoryBook.dump."""
+        try:
+            with self._lock:
+                return {
+                    tenant_id: json.loads(data)
+                    for tenant_id, data in self._select(
+                        'SELECT tenant, data FROM history', tenant_ids
+                    )
+                }
+        except (sqlite3.Error, ValueError) as error:
+            logging.error(f'Не удалось прочитать {self.path}: {error}')
+            return {}
+
+    def _write(self, write):
+        with self._lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                result = write()
+            except Exception:
+                self.db.execute('ROLLBACK')
+                raise
+            self.db.execute('COMMIT')
+        return result
+
+    def save(self, rows, history=None):
+        """Записывает строки и историю студентов.
+
+        Возвращает False при ошибке.
+        """
+        def write():
+            self.db.executemany(
+                'INSERT OR REPLACE INTO states VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (tenant_id, row['cursor'], row['status'],
+                     str(row['homework_fp']), str(row['error_fp']),
+                     row['error_time'])
+                    for tenant_id, row in rows.items()
+                ]
+            )
+            self.db.executemany(
+                'INSERT OR REPLACE INTO history VALUES (?, ?)',
+                [
+                    (tenant_id, json.dumps(homeworks, ensure_ascii=False))
+                    for tenant_id, homeworks in (history or {}).items()
+                ]
+            )
+
+        try:
+            self._write(write)
+        except sqlite3.Error as error:
+            logging.error(f'Состояние не сохранено в {self.path}: {error}')
+            return False
+        return True
+
+    def claim_outage(self, active, now, timeout):
+        """Отмечает начало (active) или конец сбоя API для всех процессов.
+
+        Возвращает True, если отметка изменила общее состояние и этот
+        процесс должен сообщить оператору; False - если о переходе уже
+        сообщил другой процесс. Отметке о сбое старше timeout секунд не
+        верят: ее владелец мог упасть, не дождавшись конца сбоя.
+        """
+        def write():
+            row = self.db.execute(
+                'SELECT active, changed FROM outage WHERE id = 0'
+            ).fetchone()
+            current = bool(row and row[0] and now - row[1] < timeout)
+            if current == active:
+                return False
+            self.db.execute(
+                'INSERT OR REPLACE INTO outage VALUES (0, ?, ?)',
+                (int(active), now)
+            )
+            return True
+
+        try:
+            return self._write(write)
+        except sqlite3.Error as error:
+            logging.error(f'Сбой не отмечен в {self.path}: {error}')
+            return True
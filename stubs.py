@@ -0,0 +1,198 @@
+import bisect
+import json
+import ssl
+import threading
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from clock import SystemClock
+
+HOMEWORK_STATUSES = ('reviewing', 'approved', 'rejected')
+
+
+def format_date(timestamp):
+    """Дата в формате поля date_updated API."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        '%Y-%m-%dT%H:%M:%SZ'
+    )
+
+
+class StubResponse:
+    """Ответ заглушки в объеме, который использует бот."""
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.content = json.dumps(data, ensure_ascii=False).encode()
+        self.headers = {'Content-Type': 'application/json'}
+
+    def json(self):
+        """Разбирает тело ответа."""
+        return json.loads(self.content)
+
+
+class PracticumStub:
+    """Заглушка API Практикум.Домашка с заранее заданной историей статусов.
+
+    Объект подменяет модуль requests: его можно передать в TenantContext
+    как session. Запросы можно делать из нескольких
+    потоков; delay задерживает каждый ответ, заменяя сетевую задержку.
+    """
+
+    def __init__(self, clock=None, outages=(), revoked=(), delay=0):
+        self.clock = clock or SystemClock()
+        self.outages = list(outages)
+        self.revoked = set(revoked)
+        self.delay = delay
+        self.timelines = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def add_status(self, token, at, homework_name, status, comment=''):
+        """Добавляет смену статуса домашки в момент at."""
+        timeline = self.timelines.setdefault(token, ([], []))
+        homework = {
+            'id': hash((token, homework_name)) & 0xFFFFFFF,
+            'homework_name': homework_name,
+            'status': status,
+            'reviewer_comment': comment,
+            'date_updated': format_date(at),
+            'lesson_name': homework_name,
+        }
+        index = bisect.bisect(timeline[0], at)
+        timeline[0].insert(index, at)
+        timeline[1].insert(index, homework)
+
+    def homeworks(self, token, from_date, now):
+        """Последние статусы домашек, измененных с from_date до now."""
+        times, events = self.timelines.get(token, ((), ()))
+        latest = {}
+        start = bisect.bisect_left(times, from_date)
+        for index in range(start, bisect.bisect_right(times, now)):
+            event = events[index]
+            latest.pop(event['homework_name'], None)
+            latest[event['homework_name']] = event
+        return list(reversed(latest.values()))
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        """Обрабатывает запрос так же, как requests.get."""
+        with self._lock:
+            self.requests += 1
+        if self.delay:
+            time.sleep(self.delay)
+        now = self.clock.time()
+        if any(start <= now < end for start, end in self.outages):
+            return StubResponse(HTTPStatus.INTERNAL_SERVER_ERROR, {})
+        token = headers['Authorization'].removeprefix('OAuth ')
+        if token in self.revoked or token not in self.timelines:
+            return StubResponse(HTTPStatus.UNAUTHORIZED, {
+                'code': 'not_authenticated',
+                'message': 'Учетные данные не были предоставлены.',
+                'source': '__response__'
+            })
+        return StubResponse(HTTPStatus.OK, {
+            'homeworks': self.homeworks(
+                token, int(params['from_date']), now
+            ),
+            'current_date': int(now)
+        })
+
+
+class TelegramStub:
+    """Заглушка бота, запоминающая отправленные сообщения."""
+
+    def __init__(self, clock=None):
+        self.clock = clock or SystemClock()
+        self.messages = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        """Запоминает сообщение вместо отправки."""
+        self.messages.append((self.clock.time(), chat_id, text))
+        return {'message_id': len(self.messages)}
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Отвечает пустым JSON, не закрывая соединение."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        """Отвечает 200 с пустым объектом."""
+        body = b'{}'
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+    def log_message(self, format, *args):
+        """Не пишет запросы в stderr."""
+
+
+def start_https_stub(certfile, host='127.0.0.1'):
+    """Запускает локальный HTTPS-сервер с сертификатом certfile."""
+    server = ThreadingHTTPServer((host, 0), KeepAliveHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(certfile)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TelegramApiHandler(KeepAliveHandler):
+    """Отвечает как метод sendMessage Bot API."""
+
+    def reply(self, status, data):
+        """Отправляет JSON-ответ."""
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        """Запоминает сообщение или отвечает 429, пока задан limited."""
+        length = int(self.headers.get('Content-Length', 0))
+        params = json.loads(self.rfile.read(length) or b'{}')
+        server = self.server
+        if server.delay:
+            time.sleep(server.delay)
+        if server.limited:
+            server.limited -= 1
+            self.reply(HTTPStatus.TOO_MANY_REQUESTS, {
+                'ok': False,
+                'error_code': 429,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1},
+            })
+            return
+        server.messages.append((params.get('chat_id'), params.get('text')))
+        self.reply(HTTPStatus.OK, {'ok': True, 'result': {
+            'message_id': len(server.messages),
+            'date': int(time.time()),
+            'chat': {'id': params.get('chat_id'), 'type': 'private'},
+            'text': params.get('text'),
+        }})
+
+
+def start_telegram_stub(host='127.0.0.1', delay=0):
+    """Запускает локальный HTTP-сервер с методом sendMessage.
+
+    Отправленные сообщения копятся в server.messages; server.limited
+    задает, на сколько запросов подряд ответить 429 с retry_after, а
+    server.delay - задержку ответа, заменяющую сетевую.
+    """
+    server = ThreadingHTTPServer((host, 0), TelegramApiHandler)
+    server.daemon_threads = True
+    server.messages = []
+    server.limited = 0
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,163 @@
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+
+import homework
+import network
+from budget import REQUESTS_PER_MINUTE, make_planner
+from hedging import make_hedger
+from sharding import HashRing
+from storage import StateStore
+from telegram_client import TelegramClient
+from tenants import TenantRegistry
+from worker import POLL_THREADS, TENANTS_FILE, Worker
+
+WORKERS = int(os.getenv('WORKERS', os.cpu_count() or 1))
+STATE_DB = os.getenv('STATE_DB', 'state.db')
+CHECK_PERIOD = 1
+
+
+def worker_name(index):
+    """Имя рабочего процесса, стабильное между перезапусками."""
+    return f'worker-{index}'
+
+
+def shard_filter(worker_id, members):
+    """Возвращает фильтр студентов, принадлежащих процессу."""
+    ring = HashRing(members)
+
+    def owns(tenant):
+        return ring.node_for(tenant.practicum_token) == worker_id
+
+    return owns
+
+
+def ignore_resize_signals():
+    """Игнорирует в рабочем процессе сигналы изменения размера пула.
+
+    Они предназначены супервизору, а действие по умолчанию для SIGTTIN и
+    SIGTTOU останавливает процесс: pkill -f supervisor.py заморозил бы
+    все шарды.
+    """
+    signal.signal(signal.SIGTTIN, signal.SIG_IGN)
+    signal.signal(signal.SIGTTOU, signal.SIG_IGN)
+
+
+def run_shard(worker_id, members, inbox):
+    """Опрашивает студентов своего шарда и слушает смену состава пула."""
+    ignore_resize_signals()
+    session = network.configure(
+        [homework.ENDPOINT, network.TELEGRAM_URL],
+        pool_size=network.POOL_SIZE + POLL_THREADS
+    )
+    worker = Worker(
+        TelegramClient(homework.TELEGRAM_TOKEN, session=session),
+        TenantRegistry(TENANTS_FILE),
+        session=session,
+        owns=shard_filter(worker_id, members),
+        budget=make_planner(homework.RETRY_PERIOD, len(members)),
+        hedger=make_hedger(POLL_THREADS),
+        threads=POLL_THREADS,
+        store=StateStore(STATE_DB)
+    )
+    while True:
+        worker.run_once(time.time())
+        try:
+            members = inbox.get(timeout=worker.seconds_to_wait(time.time()))
+        except queue.Empty:
+            continue
+        logging.info(f'{worker_id}: новый состав пула {members}')
+        worker.set_owner(shard_filter(worker_id, members), time.time())
+        if worker.budget is not None:
+            worker.budget.set_rate(REQUESTS_PER_MINUTE / len(members))
+
+
+class Supervisor:
+    """Запускает рабочие процессы и перезапускает упавшие."""
+
+    def __init__(self, size, target=run_shard):
+        self.target = target
+        self.context = multiprocessing.get_context('fork')
+        self.members = [worker_name(index) for index in range(size)]
+        self.wanted = size
+        self.processes = {}
+
+    def start(self, worker_id):
+        """Запускает рабочий процесс."""
+        inbox = self.context.Queue()
+        process = self.context.Process(
+            target=self.target,
+            args=(worker_id, list(self.members), inbox),
+            name=worker_id,
+            daemon=True
+        )
+        process.start()
+        self.processes[worker_id] = (process, inbox)
+        logging.info(f'Запущен {worker_id}, pid {process.pid}')
+
+    def stop(self, worker_id):
+        """Останавливает рабочий процесс."""
+        process, _ = self.processes.pop(worker_id)
+        process.terminate()
+        process.join()
+        logging.info(f'Остановлен {worker_id}')
+
+    def check(self):
+        """Перезапускает упавшие процессы."""
+        for worker_id, (process, _) in list(self.processes.items()):
+            if not process.is_alive():
+                logging.error(
+                    f'{worker_id} завершился с кодом {process.exitcode}, '
+                    'перезапуск'
+                )
+                self.start(worker_id)
+
+    def resize(self, size):
+        """Меняет размер пула; переезжает только затронутая часть шардов."""
+        size = max(size, 1)
+        self.wanted = size
+        old_members = set(self.members)
+        self.members = [worker_name(index) for index in range(size)]
+        for worker_id in old_members - set(self.members):
+            self.stop(worker_id)
+        for worker_id in self.members:
+            if worker_id not in self.processes:
+                self.start(worker_id)
+            else:
+                self.processes[worker_id][1].put(list(self.members))
+
+    def grow(self, *args):
+        """Обработчик SIGTTIN: добавить процесс."""
+        self.wanted += 1
+
+    def shrink(self, *args):
+        """Обработчик SIGTTOU: убрать процесс."""
+        self.wanted = max(self.wanted - 1, 1)
+
+    def run(self):
+        """Следит за пулом; SIGTTIN и SIGTTOU меняют число процессов."""
+        signal.signal(signal.SIGTTIN, self.grow)
+        signal.signal(signal.SIGTTOU, self.shrink)
+        for worker_id in self.members:
+            self.start(worker_id)
+        while True:
+            if self.wanted != len(self.members):
+                self.resize(self.wanted)
+            self.check()
+            time.sleep(CHECK_PERIOD)
+
+
+def main():
+    """Запускает пул рабочих процессов."""
+    if not homework.TELEGRAM_TOKEN:
+        logging.critical('Некорректные переменные окружения: TELEGRAM_TOKEN')
+        raise ValueError('Некорректные переменные окружения')
+    Supervisor(WORKERS).run()
+
+
+if __name__ == '__main__':
+    homework.configure_logging()
+    main()
@@ -0,0 +1,80 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import exceptions
+import json_codec
+import network
+
+TELEGRAM_CONCURRENCY = int(os.getenv('TELEGRAM_CONCURRENCY', 8))
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+API_URL = 'https://api.telegram.org'
+
+
+class TelegramClient:
+    """Клиент Bot API для отправки сообщений через пул соединений.
+
+    В отличие от TeleBot держит постоянные keep-alive соединения с
+    ограничением времени на каждый вызов и отправляет сообщения в
+    concurrency потоков. Подходит везде, где ожидается бот с методом
+    send_message(chat_id, text).
+    """
+
+    def __init__(self, token, session=None, api_url=API_URL,
+                 concurrency=TELEGRAM_CONCURRENCY,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+        self.url = f'{api_url.rstrip("/")}/bot{token}/'
+        self.session = session or network.make_session(
+            pool_size=max(concurrency, network.POOL_SIZE)
+        )
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(
+            concurrency, thread_name_prefix='telegram'
+        )
+
+    def call(self, method, **params):
+        """Вызывает метод Bot API и возвращает поле result ответа."""
+        try:
+            response = self.session.post(
+                self.url + method, json=params, timeout=self.timeout
+            )
+            data = json_codec.loads(response.content)
+        except (requests.RequestException, ValueError) as error:
+            raise exceptions.MessageError(
+                f'Telegram недоступен ({method}): {error}'
+            )
+        if isinstance(data, dict) and data.get('ok'):
+            return data.get('result')
+        return self.fail(method, response.status_code, data)
+
+    def fail(self, method, status_code, data):
+        """Превращает ответ с ошибкой в исключение."""
+        if not isinstance(data, dict):
+            data = {}
+        code = data.get('error_code', status_code)
+        message = (f'Telegram отклонил {method}: {code} '
+                   f'{data.get("description", "")}'.rstrip())
+        retry_after = (data.get('parameters') or {}).get('retry_after')
+        if retry_after is not None:
+            raise exceptions.RetryAfter(message, retry_after)
+        raise exceptions.MessageError(message)
+
+    def send_message(self, chat_id, text, **kwargs):
+        """Отправляет текст в чат."""
+        return self.call('sendMessage', chat_id=chat_id, text=text, **kwargs)
+
+    def map(self, func, items):
+        """Выполняет func для каждого элемента в потоках клиента."""
+        context = contextvars.copy_context()
+        return self.executor.map(
+            lambda item: context.copy().run(func, item), items
+        )
+
+    def close(self):
+        """Останавливает потоки и закрывает соединения."""
+        self.executor.shutdown()
+        self.session.close()
@@ -0,0 +1,127 @@
+import sys
+
+import homework
+from history import STATUS_CODES, STATUSES
+
+DEFAULT_LOCALE = 'ru'
+
+MESSAGES = {
+    'ru': 'Изменился статус проверки работы "{name}". {verdict}',
+    'en': 'Homework "{name}" review status changed. {verdict}',
+}
+VERDICTS = {
+    'ru': homework.HOMEWORK_VERDICTS,
+    'en': {
+        'approved': 'The reviewer liked everything. Hooray!',
+        'reviewing': 'The reviewer has started reviewing the work.',
+        'rejected': 'The reviewer has left some remarks.',
+    },
+}
+REPLIES = {
+    'ru': {
+        'status': 'Работа "{name}": {verdict} ({moment})',
+        'status_unknown': 'Статусы работ пока неизвестны.',
+        'interval': 'Статус проверяется раз в {minutes:g} мин.',
+        'history_title': 'Работа "{name}":',
+        'history_entry': '{moment} - {verdict}',
+        'history_comment': ' Комментарий: {comment}',
+        'history_empty': 'История статусов пока пуста.',
+        'refresh_stopped': (
+            'Опрос остановлен из-за ошибки в настройках, '
+            'статус проверить нельзя.'
+        ),
+        'refresh_outage': (
+            'API Практикума сейчас недоступно, статус будет проверен '
+            'после восстановления.'
+        ),
+        'refresh_accepted': 'Проверю статус в ближайшие секунды.',
+        'refresh_recent': 'Статус недавно проверялся, повторите позже.',
+        'command_failed': 'Не удалось принять команду, повторите позже.',
+    },
+    'en': {
+        'status': 'Homework "{name}": {verdict} ({moment})',
+        'status_unknown': 'Homework statuses are not known yet.',
+        'interval': 'The status is checked every {minutes:g} min.',
+        'history_title': 'Homework "{name}":',
+        'history_entry': '{moment} - {verdict}',
+        'history_comment': ' Comment: {comment}',
+        'history_empty': 'The status history is empty so far.',
+        'refresh_stopped': (
+            'Polling is stopped because of a configuration error, '
+            'the status cannot be checked.'
+        ),
+        'refresh_outage': (
+            'The Practicum API is unavailable right now, the status will '
+            'be checked after it recovers.'
+        ),
+        'refresh_accepted': 'I will check the status in a few seconds.',
+        'refresh_recent': 'The status was checked recently, try later.',
+        'command_failed': 'The command was not accepted, try later.',
+    },
+}
+LOCALES = tuple(MESSAGES)
+
+
+def compile_template(template, verdict):
+    """Разбивает шаблон на интернированные части вокруг имени работы."""
+    prefix, suffix = template.split('{name}')
+    return sys.intern(prefix), sys.intern(suffix.format(verdict=verdict))
+
+
+class TemplateRegistry:
+    """Предкомпилированные уведомления о смене статуса по языкам.
+
+    Для каждой пары (код статуса, язык) шаблон заранее собирается в две
+    интернированные строки, и при отправке остается лишь подставить имя
+    работы.
+    """
+
+    def __init__(self, messages=MESSAGES, verdicts=VERDICTS,
+                 replies=REPLIES, default_locale=DEFAULT_LOCALE):
+        self.default_locale = default_locale
+        self.verdicts = verdicts
+        self.replies = replies
+        self.compiled = {
+            (STATUS_CODES[status], locale): compile_template(
+                template, verdicts[locale][status]
+            )
+            for locale, template in messages.items()
+            for status in STATUSES
+        }
+
+    def render(self, code, locale, name):
+        """Текст уведомления о статусе code на языке locale."""
+        try:
+            prefix, suffix = self.compiled[code, locale]
+        except KeyError:
+            prefix, suffix = self.compiled[code, self.default_locale]
+        return f'{prefix}{name}{suffix}'
+
+    def render_once(self, rendered, code, locale, name):
+        """Текст render из кеша rendered, живущего один цикл опроса.
+
+        Студенты с общим токеном получают одинаковые уведомления, и при
+        рассылке в их чаты текст собирается один раз.
+        """
+        key = (code, locale, name)
+        text = rendered.get(key)
+        if text is None:
+            text = rendered[key] = self.render(code, locale, name)
+        return text
+
+    def verdict(self, status, locale):
+        """Вердикт ревьюера для статуса на языке locale."""
+        verdicts = self.verdicts.get(locale)
+        if verdicts is None:
+            verdicts = self.verdicts[self.default_locale]
+        return verdicts[status]
+
+    def reply(self, locale, key, **fields):
+        """Текст ответа на команду на языке locale."""
+        replies = self.replies.get(locale)
+        if replies is None:
+            replies = self.replies[self.default_locale]
+        return replies[key].format(**fields)
+
+
+TEMPLATES = TemplateRegistry()
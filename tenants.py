@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import exceptions
+from delivery import parse_window
+from templates import DEFAULT_LOCALE, LOCALES
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+REQUIRED_FIELDS = ('id', 'practicum_token', 'telegram_chat_id')
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """Студент, за домашками которого следит бот."""
+
+    id: str
+    practicum_token: str
+    telegram_chat_id: str
+    locale: str = DEFAULT_LOCALE
+    quiet_hours: tuple = None
+
+
+class TenantChanges(NamedTuple):
+    """Разница между двумя версиями реестра."""
+
+    added: tuple = ()
+    removed: tuple = ()
+    updated: tuple = ()
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.updated)
+
+
+def read_config(path):
+    """Читает файл реестра в формате JSON или YAML."""
+    try:
+        with open(path, encoding='utf-8') as config_file:
+            if path.endswith(('.yaml', '.yml')):
+                if yaml is None:
+                    raise exceptions.TenantConfigError(
+                        'Для чтения YAML установите пакет PyYAML.'
+                    )
+                return yaml.safe_load(config_file)
+            return json.load(config_file)
+    except (OSError, ValueError) as error:
+        raise exceptions.TenantConfigError(
+            f'Не удалось прочитать реестр {path}: {error}'
+        )
+
+
+def parse_tenants(config):
+    """Превращает содержимое файла реестра в словарь студентов."""
+    if not isinstance(config, dict) or not isinstance(
+            config.get('tenants'), list
+    ):
+        raise exceptions.TenantConfigError(
+            'Реестр должен содержать список "tenants".'
+        )
+    tenants = {}
+    for entry in config['tenants']:
+        if not isinstance(entry, dict):
+            raise exceptions.TenantConfigError(
+                f'Некорректная запись в реестре: {entry!r}'
+            )
+        missing = [field for field in REQUIRED_FIELDS if not entry.get(field)]
+        if missing:
+            raise exceptions.TenantConfigError(
+                f'В записи реестра нет полей: {", ".join(missing)}'
+            )
+        locale = str(entry.get('locale') or DEFAULT_LOCALE)
+        if locale not in LOCALES:
+            raise exceptions.TenantConfigError(
+                f'Неподдерживаемый язык "{locale}" в записи '
+                f'"{entry["id"]}", доступны: {", ".join(LOCALES)}'
+            )
+        tenant = Tenant(
+            locale=locale,
+            quiet_hours=parse_window(entry.get('quiet_hours')),
+            **{
+                field: str(entry[field]) for field in REQUIRED_FIELDS
+            }
+        )
+        if tenant.id in tenants:
+            raise exceptions.TenantConfigError(
+                f'Студент "{tenant.id}" указан в реестре дважды.'
+            )
+        tenants[tenant.id] = tenant
+    return tenants
+
+
+def diff_tenants(old, new):
+    """Сравнивает две версии реестра."""
+    return TenantChanges(
+        added=tuple(new[key] for key in new if key not in old),
+        removed=tuple(key for key in old if key not in new),
+        updated=tuple(
+            new[key] for key in new if key in old and old[key] != new[key]
+        ),
+    )
+
+
+class TenantRegistry:
+    """Реестр студентов, перечитываемый при изменении файла."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tenants = {}
+        self._mtime = None
+
+    def __iter__(self):
+        return iter(self.tenants.values())
+
+    def __len__(self):
+        return len(self.tenants)
+
+    def get(self, tenant_id):
+        """Возвращает студента по идентификатору."""
+        return self.tenants.get(tenant_id)
+
+    def refresh(self):
+        """Перечитывает файл, если он изменился, и возвращает разницу."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as error:
+            raise exceptions.TenantConfigError(
+                f'Файл реестра {self.path} недоступен: {error}'
+            )
+        if mtime == self._mtime:
+            return TenantChanges()
+        tenants = parse_tenants(read_config(self.path))
+        changes = diff_tenants(self.tenants, tenants)
+        self.tenants = tenants
+        self._mtime = mtime
+        if changes:
+            logging.info(
+                f'Реестр обновлен: добавлено {len(changes.added)}, '
+                f'удалено {len(changes.removed)}, '
+                f'изменено {len(changes.updated)}'
+            )
+        return changes
+
+
+class StaticTenantRegistry(TenantRegistry):
+    """Реестр с фиксированным списком студентов, без файла."""
+
+    def __init__(self, tenants):
+        super().__init__(None)
+        self._pending = {tenant.id: tenant for tenant in tenants}
+
+    def refresh(self):
+        """При первом вызове отдает всех студентов как добавленных."""
+        if self._pending is None:
+            return TenantChanges()
+        changes = diff_tenants(self.tenants, self._pending)
+        self.tenants = self._pending
+        self._pending = None
+        return changes
@@ -0,0 +1,16 @@
+from benchmarks.hot_path import all_cases, compare, make_payload
+
+
+class TestHotPathBenchmarks:
+
+    def test_payload_has_requested_size(self):
+        assert len(make_payload(100)['homeworks']) == 100
+
+    def test_every_case_runs(self):
+        for func in all_cases((0, 10)).values():
+            func()
+
+    def test_compare_reports_regressions(self):
+        baseline = {'a[1]': 1.0, 'b[1]': 1.0}
+        results = {'a[1]': 1.1, 'b[1]': 2.0, 'c[1]': 5.0}
+        assert compare(results, baseline, tolerance=0.25) == ['b[1]']
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import pytest
+
+from budget import (IDLE_WEIGHT, RECENT_CHANGE_WINDOW, REVIEWING_WEIGHT,
+                    BudgetPlanner, activity_weight)
+from commands import CommandHandler
+from history import STATUS_CODES
+from scheduler import PollSchedule
+from simulation import DAY, simulate
+from state_table import NO_STATUS
+from stubs import TelegramStub
+from tenants import StaticTenantRegistry, Tenant
+from worker import Worker
+
+
+class TestActivityWeight:
+
+    def test_idle_tenant_has_base_weight(self):
+        assert activity_weight(NO_STATUS, 0, DAY) == IDLE_WEIGHT
+
+    def test_reviewing_and_recent_change_raise_weight(self):
+        reviewing = STATUS_CODES['reviewing']
+        old = activity_weight(reviewing, 0, 10 * RECENT_CHANGE_WINDOW)
+        recent = activity_weight(reviewing, 100, 200)
+        assert old == REVIEWING_WEIGHT
+        assert recent > old
+
+
+class TestBudgetPlanner:
+
+    def test_ample_budget_keeps_desired_intervals(self):
+        planner = BudgetPlanner(600, retry_period=600, min_interval=60)
+        planner.change(0, 1)
+        planner.change(0, 4)
+        assert planner.interval(1) == 600
+        assert planner.interval(4) == 150
+
+    def test_scarce_budget_stretches_intervals_by_weight(self):
+        planner = BudgetPlanner(60, retry_period=600, min_interval=60)
+        for _ in range(1000):
+            planner.change(0, 1)
+        for _ in range(1000):
+            planner.change(0, 4)
+        demand = sum(
+            1000 / planner.interval(weight) for weight in (1, 4)
+        )
+        assert demand == pytest.approx(1)
+        assert planner.interval(1) == pytest.approx(4 * planner.interval(4))
+
+    def test_removed_tenant_releases_demand(self):
+        planner = BudgetPlanner(60, retry_period=600)
+        planner.change(0, 2)
+        planner.change(2, 0)
+        assert planner.demand == 0
+
+    def test_bucket_limits_bursts(self):
+        planner = BudgetPlanner(60, retry_period=600, burst_seconds=5)
+        assert planner.available(0) == 5
+        planner.spend(5)
+        assert planner.available(0) == 0
+        assert planner.next_token(0) == pytest.approx(1)
+        assert planner.available(2) == 2
+
+
+class TestBudgetedWorker:
+
+    def make_worker(self, count, requests_per_minute):
+        bot = TelegramStub()
+        tenants = [
+            Tenant(str(index), f't{index}', str(index))
+            for index in range(count)
+        ]
+        worker = Worker(
+            bot, StaticTenantRegistry(tenants),
+            budget=BudgetPlanner(requests_per_minute, 600, burst_seconds=5)
+        )
+        return bot, worker
+
+    def test_pop_due_respects_limit(self):
+        schedule = PollSchedule()
+        for key in 'abc':
+            schedule.add(key, 0)
+        assert schedule.pop_due(0, limit=2) == ['a', 'b']
+        assert list(schedule.pop_due(0)) == ['c']
+
+    def test_cycle_is_capped_by_budget(self, monkeypatch):
+        _, worker = self.make_worker(20, 60)
+        polled = []
+        monkeypatch.setattr(
+            worker, 'poll', lambda tenant: polled.append(tenant.id) or 600
+        )
+        worker.run_once(0)
+        assert len(polled) == 5
+        assert len(worker.schedule) == 20
+        assert worker.seconds_to_wait(0) == pytest.approx(1)
+
+    def test_status_reports_effective_interval(self):
+        bot, worker = self.make_worker(2000, 60)
+        worker.reload(0)
+        CommandHandler(bot, worker).status(
+            SimpleNamespace(chat=SimpleNamespace(id='1'))
+        )
+        assert 'раз в 33.3 мин.' in bot.messages[-1][2]
+        assert worker.health(0)['budget']['interval_scale'] > 1
+
+    def test_simulation_stays_within_budget(self):
+        report = simulate(
+            tenants=50, days=0.1, requests_per_minute=2
+        )
+        assert report['api_requests'] <= 2 * 0.1 * DAY / 60 + 10
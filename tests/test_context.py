@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+import exceptions
+import homework
+from simulation import build
+from stubs import PracticumStub, TelegramStub
+from tenants import StaticTenantRegistry, Tenant
+from worker import Worker
+
+HOUR = 3600
+
+
+def make_api(tokens, **kwargs):
+    api = PracticumStub(**kwargs)
+    for token in tokens:
+        api.add_status(token, 0, f'hw_{token}', 'approved')
+    return api
+
+
+class TestTenantContext:
+
+    def test_request_uses_context(self):
+        api = make_api(['a'])
+        context = homework.TenantContext('a', '1', session=api)
+        homeworks = homework.check_response(
+            homework.get_tenant_answer(context, 0)
+        )
+        assert homeworks[0]['homework_name'] == 'hw_a'
+
+    def test_wrong_status_is_raised(self):
+        context = homework.TenantContext('x', '1', session=make_api([]))
+        with pytest.raises(exceptions.WrongStatusCode):
+            homework.get_tenant_answer(context, 0)
+
+    def test_message_goes_to_context_chat(self):
+        bot = TelegramStub()
+        homework.send_tenant_message(
+            bot, homework.TenantContext('a', '42'), 'текст'
+        )
+        assert bot.messages[0][1:] == ('42', 'текст')
+
+    def test_environment_context(self, monkeypatch):
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '7')
+        context = homework.environment_context()
+        assert context.chat_id == '7'
+        assert context.headers is homework.HEADERS
+        assert context.endpoint == homework.ENDPOINT
+
+    def test_contexts_are_independent_across_threads(self):
+        api = make_api('abcd', delay=0.01)
+        results = {}
+
+        def poll(token):
+            context = homework.TenantContext(token, token, session=api)
+            results[token] = homework.get_tenant_answer(context, 0)
+
+        threads = [threading.Thread(target=poll, args=(token,))
+                   for token in 'abcd']
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert {
+            token: data['homeworks'][0]['homework_name']
+            for token, data in results.items()
+        } == {token: f'hw_{token}' for token in 'abcd'}
+
+
+class TestThreadedWorker:
+
+    def test_polls_in_parallel(self):
+        tokens = [f't{index}' for index in range(16)]
+        api = make_api(tokens, delay=0.05)
+        tenants = [Tenant(token, token, token) for token in tokens]
+        bot = TelegramStub()
+        worker = Worker(bot, StaticTenantRegistry(tenants), session=api,
+                        threads=8)
+        started = time.perf_counter()
+        worker.run_once(0)
+        elapsed = time.perf_counter() - started
+        assert elapsed < len(tokens) * api.delay / 2
+        assert api.requests == len(tokens)
+        assert sorted(chat_id for _, chat_id, _ in bot.messages) == sorted(
+            tokens
+        )
+        assert worker.backlog == 0
+        assert len(worker.schedule) == len(tokens)
+
+    def test_same_outcome_as_sequential(self):
+        reports = []
+        for threads in (0, 4):
+            worker, api, bot = build(tenants=20, days=1)
+            if threads:
+                worker = Worker(
+                    bot, worker.registry, session=api, clock=worker.clock,
+                    threads=threads
+                )
+            worker.run(until=worker.clock.time() + 24 * HOUR)
+            reports.append((api.requests, sorted(
+                (chat_id, text) for _, chat_id, text in bot.messages
+            )))
+        assert reports[0] == reports[1]
@@ -0,0 +1,87 @@
+import pytest
+
+from budget import REVIEWING, BudgetPlanner
+from degradation import IDLE_STRETCH, DegradationPolicy, Level
+from stubs import TelegramStub
+from tenants import StaticTenantRegistry, Tenant
+from worker import Worker
+
+
+class TestDegradationPolicy:
+
+    @pytest.mark.parametrize('lags, level', [
+        ([0], Level.NORMAL),
+        ([60], Level.DEGRADED),
+        ([600], Level.OVERLOADED),
+        ([600, 400], Level.OVERLOADED),
+        ([600, 200], Level.DEGRADED),
+        ([600, 10], Level.NORMAL),
+    ])
+    def test_levels_with_hysteresis(self, lags, level):
+        policy = DegradationPolicy(degraded=60, overloaded=600)
+        for lag in lags:
+            policy.update(lag)
+        assert policy.level == level
+
+
+def make_worker(budget=None):
+    tenants = [Tenant(name, f't{name}', name) for name in 'abc']
+    bot = TelegramStub()
+    worker = Worker(bot, StaticTenantRegistry(tenants), budget=budget)
+    worker.reload(0)
+    worker.states.status[worker.states.slot('c')] = REVIEWING
+    return bot, worker
+
+
+class TestLagAwareWorker:
+
+    def test_backlog_is_drained_by_urgency(self, monkeypatch):
+        _, worker = make_worker()
+        polled = []
+        monkeypatch.setattr(
+            worker, 'poll', lambda tenant: polled.append(tenant.id) or 600
+        )
+        worker.run_once(0)
+        assert polled == ['a', 'b', 'c']
+        polled.clear()
+        worker.run_once(700)
+        assert polled == ['c', 'a', 'b']
+        assert worker.health(700)['degradation'] == 'DEGRADED'
+
+    def test_budget_leftovers_keep_their_deadlines(self):
+        _, worker = make_worker(BudgetPlanner(6, 600, burst_seconds=10))
+        assert worker.take_due(100) == ['c']
+        assert worker.schedule.due_time('a') == 0
+        assert len(worker.schedule) == 2
+
+    def test_budget_queue_is_drained_by_urgency_without_lag(self):
+        _, worker = make_worker(BudgetPlanner(6, 600, burst_seconds=10))
+        assert worker.take_due(0) == ['a']
+        assert worker.budget.exhausted_since == 0
+        assert worker.take_due(700) == ['c']
+        assert worker.degradation.level == Level.NORMAL
+        assert worker.take_due(710) == ['b']
+        assert worker.budget.exhausted_since is None
+
+    def test_lag_before_budget_exhaustion_counts(self):
+        _, worker = make_worker(BudgetPlanner(6, 600, burst_seconds=10))
+        worker.take_due(100)
+        worker.take_due(800)
+        assert worker.degradation.level == Level.DEGRADED
+
+    def test_error_notifications_are_shed(self):
+        bot, worker = make_worker()
+        worker.degradation.update(100)
+        tenant = worker.registry.get('a')
+        worker.notify_error(tenant, worker.states.slot('a'), ValueError('x'))
+        assert bot.messages == []
+
+    def test_idle_intervals_are_stretched_when_overloaded(self):
+        _, worker = make_worker()
+        worker.degradation.update(1000)
+        assert worker.next_interval(worker.states.slot('a')) == (
+            IDLE_STRETCH * worker.retry_period
+        )
+        assert worker.next_interval(worker.states.slot('c')) == (
+            worker.retry_period
+        )
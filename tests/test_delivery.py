@@ -0,0 +1,114 @@
+import pytest
+
+import exceptions
+from clock import VirtualClock
+from delivery import (MAX_MESSAGE_LENGTH, SEPARATOR, Outbox, in_window, pack,
+                      parse_window)
+from stubs import PracticumStub, TelegramStub
+from tenants import StaticTenantRegistry, Tenant, parse_tenants
+from worker import Worker
+
+HOUR = 3600
+
+
+class Recorder:
+
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+
+    def __call__(self, chat_id, text):
+        if self.fail:
+            raise exceptions.MessageError('нет связи')
+        self.sent.append((chat_id, text))
+
+
+class TestPack:
+
+    def test_merges_texts(self):
+        assert list(pack(['a', 'b'])) == ['a' + SEPARATOR + 'b']
+
+    def test_respects_limit(self):
+        texts = ['x' * 3000, 'y' * 3000]
+        assert list(pack(texts)) == texts
+
+    def test_splits_long_text(self):
+        chunks = list(pack(['x' * (MAX_MESSAGE_LENGTH + 1)]))
+        assert [len(chunk) for chunk in chunks] == [MAX_MESSAGE_LENGTH, 1]
+
+
+class TestQuietHours:
+
+    def test_parse_window(self):
+        assert parse_window('23-8') == (23, 8)
+        assert parse_window('') is None
+        with pytest.raises(exceptions.TenantConfigError):
+            parse_window('25-8')
+
+    def test_window_over_midnight(self):
+        assert in_window((23, 8), 2 * HOUR)
+        assert not in_window((23, 8), 12 * HOUR)
+
+    def test_registry_field(self):
+        tenants = parse_tenants({'tenants': [{
+            'id': 'a', 'practicum_token': 't', 'telegram_chat_id': 1,
+            'quiet_hours': '22-7',
+        }]})
+        assert tenants['a'].quiet_hours == (22, 7)
+
+
+class TestOutbox:
+
+    def test_one_message_per_chat(self):
+        outbox = Outbox()
+        outbox.add('1', 'a', 0)
+        outbox.add('1', 'b', 0)
+        outbox.add('2', 'c', 0)
+        send = Recorder()
+        assert outbox.flush(send, 0) == 2
+        assert send.sent == [('1', 'a' + SEPARATOR + 'b'), ('2', 'c')]
+        assert not outbox
+
+    def test_digest_is_held_until_window_ends(self):
+        outbox = Outbox()
+        night = 2 * HOUR
+        outbox.add('1', 'reviewing', night, urgent=False, window=(23, 8))
+        outbox.add('1', 'approved', night, window=(23, 8))
+        send = Recorder()
+        outbox.flush(send, night)
+        assert send.sent == [('1', 'approved')]
+        outbox.add('1', 'error', night + 1, urgent=False, window=(23, 8))
+        outbox.flush(send, night + 1)
+        assert len(send.sent) == 1
+        outbox.flush(send, 9 * HOUR)
+        assert send.sent[-1] == ('1', 'reviewing' + SEPARATOR + 'error')
+        assert not outbox
+
+    def test_failed_delivery_is_retried(self):
+        outbox = Outbox()
+        outbox.add('1', 'a', 0)
+        assert outbox.flush(Recorder(fail=True), 0) == 0
+        send = Recorder()
+        outbox.flush(send, 1)
+        assert send.sent == [('1', 'a')]
+
+
+class TestBatchedWorker:
+
+    def test_changes_in_one_poll_are_combined(self):
+        clock = VirtualClock(start=1000)
+        api = PracticumStub(clock)
+        api.add_status('token', 900, 'hw1', 'reviewing')
+        bot = TelegramStub(clock)
+        worker = Worker(
+            bot, StaticTenantRegistry([Tenant('a', 'token', '1')]),
+            clock=clock, session=api
+        )
+        worker.run_once(clock.time())
+        api.add_status('token', 1100, 'hw1', 'approved')
+        api.add_status('token', 1200, 'hw2', 'reviewing')
+        clock.now = 1000 + worker.retry_period
+        worker.run_once(clock.time())
+        assert len(bot.messages) == 2
+        text = bot.messages[-1][2]
+        assert text.index('"hw1"') < text.index('"hw2"')
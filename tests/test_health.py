@@ -0,0 +1,95 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from clock import VirtualClock
+from health import start_health_server
+from stubs import PracticumStub, TelegramStub
+from tenants import StaticTenantRegistry, Tenant
+from worker import HEALTH_MAX_AGE, Worker
+
+
+@pytest.fixture
+def worker():
+    clock = VirtualClock(start=1000)
+    api = PracticumStub(clock)
+    api.add_status('token', 900, 'hw1', 'reviewing')
+    return Worker(
+        TelegramStub(clock),
+        StaticTenantRegistry([Tenant('a', 'token', '1')]),
+        clock=clock,
+        session=api
+    )
+
+
+def get(server, path='/health'):
+    url = f'http://127.0.0.1:{server.server_port}{path}'
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, None
+
+
+class TestHealth:
+
+    def test_fresh_worker_is_healthy(self, worker):
+        worker.run_once(worker.clock.time())
+        report = worker.health(worker.clock.time())
+        assert report['healthy']
+        assert report['last_success_age'] == 0
+        assert report['last_send_age'] == 0
+        assert report['poll_backlog'] == 0
+        assert report['breaker'] == {'backing_off': 0, 'stopped': 0}
+        assert report['transfer']['responses'] == 1
+        assert list(report['transfer']['heaviest']) == ['a']
+
+    def test_stuck_worker_is_unhealthy(self, worker):
+        worker.run_once(worker.clock.time())
+        worker.clock.sleep(HEALTH_MAX_AGE + 1)
+        assert not worker.health(worker.clock.time())['healthy']
+
+    def test_report_waits_for_worker_lock(self, worker):
+        worker.run_once(worker.clock.time())
+        reports = []
+        with worker.lock:
+            reader = threading.Thread(
+                target=lambda: reports.append(
+                    worker.health(worker.clock.time())
+                )
+            )
+            reader.start()
+            reader.join(0.05)
+            assert not reports
+        reader.join(1)
+        assert reports[0]['tenants'] == 1
+
+    def test_report_during_delivery(self, worker):
+        reports = []
+        send_chat = worker.send_chat
+
+        def send_and_report(chat_id, text, tenant_ids=()):
+            reports.append(worker.health(worker.clock.time()))
+            send_chat(chat_id, text, tenant_ids)
+
+        worker.send_chat = send_and_report
+        worker.run_once(worker.clock.time())
+        assert reports[0]['outbox'] == 0
+        assert worker.health(worker.clock.time())['last_send_age'] == 0
+
+    def test_http_endpoint(self, worker):
+        server = start_health_server(worker, port=0, host='127.0.0.1')
+        try:
+            worker.run_once(worker.clock.time())
+            status, report = get(server)
+            assert status == 200
+            assert report['tenants'] == 1
+            worker.clock.sleep(HEALTH_MAX_AGE + 1)
+            assert get(server)[0] == 503
+            assert get(server, '/other')[0] == 404
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,102 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from hedging import Hedger, LatencyWindow
+
+
+def warmed_hedger(ratio=1, latency=0.01):
+    latencies = LatencyWindow(size=100, min_samples=10)
+    for _ in range(100):
+        latencies.add(latency)
+    return Hedger(ratio=ratio, latencies=latencies)
+
+
+class SlowFirstCall:
+
+    def __init__(self, slow=0.5):
+        self.slow = slow
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, value):
+        with self.lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            time.sleep(self.slow)
+            return 'primary'
+        return 'hedge'
+
+
+class TestLatencyWindow:
+
+    def test_needs_enough_samples(self):
+        latencies = LatencyWindow(min_samples=3)
+        latencies.add(1)
+        assert latencies.quantile(0.95) is None
+
+    def test_quantile(self):
+        latencies = LatencyWindow(size=100, min_samples=1)
+        for value in range(100):
+            latencies.add(value)
+        assert latencies.quantile(0.95) == 94
+
+
+class TestHedger:
+
+    def test_slow_request_is_hedged(self):
+        hedger = warmed_hedger()
+        started = time.perf_counter()
+        assert hedger.call(SlowFirstCall(), 1) == 'hedge'
+        assert time.perf_counter() - started < 0.3
+        assert (hedger.hedges, hedger.wins) == (1, 1)
+        assert hedger.snapshot()['win_rate'] == 1
+
+    def test_fast_request_is_not_hedged(self):
+        hedger = warmed_hedger(latency=1)
+        func = SlowFirstCall(slow=0)
+        assert hedger.call(func, 1) == 'primary'
+        assert func.calls == 1
+        assert hedger.hedges == 0
+
+    def test_hedges_are_capped_by_ratio(self):
+        hedger = warmed_hedger(ratio=0)
+        func = SlowFirstCall(slow=0.05)
+        assert hedger.call(func, 1) == 'primary'
+        assert func.calls == 1
+        assert hedger.snapshot()['hedge_rate'] == 0
+
+    def test_error_of_both_attempts_is_raised(self):
+        hedger = warmed_hedger()
+
+        def broken(value):
+            time.sleep(0.05)
+            raise ValueError(value)
+
+        with pytest.raises(ValueError):
+            hedger.call(broken, 1)
+
+    def test_concurrent_hedges_stay_within_ratio(self):
+        hedger = warmed_hedger(ratio=0.05, latency=0.001)
+        hedger.executor = ThreadPoolExecutor(32)
+        hedger.requests = 19
+        barrier = threading.Barrier(16)
+
+        def slow(value):
+            time.sleep(0.05)
+            return value
+
+        def client():
+            barrier.wait()
+            hedger.call(slow, 1)
+
+        threads = [threading.Thread(target=client) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert hedger.requests == 35
+        assert hedger.hedges <= 0.05 * 35
@@ -0,0 +1,173 @@
+import threading
+from types import SimpleNamespace
+
+import requests
+
+from commands import CommandHandler, format_history
+from history import HistoryBook, parse_date
+from stubs import StubResponse, TelegramStub
+from tenants import StaticTenantRegistry, Tenant
+from worker import Worker
+
+
+def homework(status, date, name='hw1.zip', comment=''):
+    return {
+        'homework_name': name,
+        'status': status,
+        'date_updated': date,
+        'reviewer_comment': comment,
+    }
+
+
+def chat_message(chat_id):
+    return SimpleNamespace(chat=SimpleNamespace(id=chat_id))
+
+
+class TestHistoryBook:
+
+    def test_ring_buffer_keeps_last_entries(self):
+        book = HistoryBook(size=3)
+        for minute in range(5):
+            status = 'reviewing' if minute % 2 else 'rejected'
+            book.record(
+                'a', homework(status, f'2024-01-01T10:0{minute}:00Z'), 0
+            )
+        entries = book.get('a')['hw1.zip']
+        assert len(entries) == 3
+        assert entries[-1][1] == parse_date('2024-01-01T10:04:00Z', 0)
+
+    def test_same_status_is_recorded_once(self):
+        book = HistoryBook()
+        item = homework('reviewing', '2024-01-01T10:00:00Z')
+        assert book.record('a', item, 0)
+        assert not book.record('a', item, 0)
+
+    def test_oldest_homeworks_are_evicted(self):
+        book = HistoryBook(max_homeworks=2)
+        for name in ('hw1', 'hw2', 'hw3'):
+            book.record('a', homework('approved', None, name), 0)
+        assert list(book.get('a')) == ['hw2', 'hw3']
+
+    def test_dump_and_load(self):
+        book = HistoryBook()
+        book.record('a', homework('approved', None, comment='Ок'), 100)
+        restored = HistoryBook()
+        restored.load(book.dump(['a']))
+        assert restored.get('a') == {'hw1.zip': [('approved', 100, 'Ок')]}
+
+
+class TestHistoryCommand:
+
+    def test_history_is_served_without_api(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError('API не должен вызываться')
+
+        monkeypatch.setattr(requests, 'get', fail)
+        bot = TelegramStub()
+        tenant = Tenant('a', 'token', '42')
+        worker = Worker(bot, StaticTenantRegistry([tenant]))
+        worker.reload(0)
+        worker.history.record(
+            'a', homework('reviewing', '2024-02-13T14:40:00Z'), 0
+        )
+        CommandHandler(bot, worker).history(chat_message(42))
+        _, chat_id, text = bot.messages[-1]
+        assert chat_id == 42
+        assert '13.02.2024 14:40 UTC' in text
+        assert 'Работа взята на проверку ревьюером.' in text
+
+    def test_unknown_chat(self):
+        bot = TelegramStub()
+        worker = Worker(bot, StaticTenantRegistry([]))
+        CommandHandler(bot, worker).history(chat_message(1))
+        assert 'не подписан' in bot.messages[-1][2]
+
+    def test_empty_history(self):
+        assert format_history({}) == 'История статусов пока пуста.'
+
+
+class TestStatePersistence:
+
+    def test_state_and_history_survive_restart(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: StubResponse(200, {
+                'homeworks': [homework('approved', '2024-01-01T00:00:00Z')],
+                'current_date': 1,
+            })
+        )
+        path = str(tmp_path / 'state.json')
+        tenant = Tenant('a', 'token', '1')
+        worker = Worker(
+            TelegramStub(), StaticTenantRegistry([tenant]), state_file=path
+        )
+        worker.run_once(0)
+        worker.save_state()
+
+        restarted = Worker(
+            TelegramStub(), StaticTenantRegistry([tenant]), state_file=path
+        )
+        restarted.load_state()
+        restarted.reload(0)
+        assert restarted.states.row('a') == worker.states.row('a')
+        assert restarted.history.get('a') == worker.history.get('a')
+
+
+class TestStatusAndRefreshCommands:
+
+    def make_worker(self):
+        bot = TelegramStub()
+        worker = Worker(bot, StaticTenantRegistry([Tenant('a', 't', '42')]))
+        worker.reload(0)
+        return bot, worker
+
+    def test_status_shows_latest_entry(self):
+        bot, worker = self.make_worker()
+        worker.history.record(
+            'a', homework('reviewing', '2024-02-13T14:40:00Z'), 0
+        )
+        worker.history.record(
+            'a', homework('approved', '2024-02-13T16:00:00Z'), 0
+        )
+        CommandHandler(bot, worker).status(chat_message(42))
+        text = bot.messages[-1][2]
+        assert 'ревьюеру всё понравилось' in text
+        assert 'взята на проверку' not in text
+
+    def test_refresh_goes_through_schedule(self):
+        bot, worker = self.make_worker()
+        worker.schedule.add('a', 600)
+        worker.clock.time = lambda: 100
+        CommandHandler(bot, worker).refresh(chat_message(42))
+        assert worker.schedule.due_time('a') == 600
+        worker.apply_refreshes(100)
+        assert worker.schedule.due_time('a') == 100
+
+    def test_refresh_is_rate_limited(self):
+        bot, worker = self.make_worker()
+        assert worker.request_refresh('a', 0)
+        assert not worker.request_refresh('a', 30)
+        assert worker.request_refresh('a', 61)
+
+    def test_refresh_of_stopped_tenant_is_not_promised(self):
+        bot, worker = self.make_worker()
+        worker.stopped.add('a')
+        CommandHandler(bot, worker).refresh(chat_message(42))
+        assert 'остановлен' in bot.messages[-1][2]
+        assert worker.refresh_queue.empty()
+
+    def test_commands_wait_for_worker_lock(self):
+        bot, worker = self.make_worker()
+        handler = CommandHandler(bot, worker)
+        with worker.lock:
+            readers = [
+                threading.Thread(target=command, args=(chat_message(42),))
+                for command in (handler.status, handler.refresh)
+            ]
+            for reader in readers:
+                reader.start()
+            readers[0].join(0.05)
+            assert bot.messages == []
+        for reader in readers:
+            reader.join(1)
+        assert len(bot.messages) == 2
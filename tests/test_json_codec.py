@@ -0,0 +1,71 @@
+import json
+
+import pytest
+import requests
+
+import exceptions
+import homework
+import json_codec
+import tests.check_utils as check_utils
+
+PAYLOADS = [
+    b'{"homeworks": [{"homework_name": "hw", "status": "approved"}],'
+    b' "current_date": 1}',
+    b'{"homeworks": []}',
+    b'{}',
+    b'{"homeworks": {}}',
+    b'{"homeworks": "hw"}',
+    b'[]',
+    b'"homeworks"',
+    b'1',
+    b'null',
+    '{"homeworks": [{"homework_name": "дз", "status": "x"}]}'.encode(),
+]
+
+
+def make_response(raw):
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = 'utf-8'
+    response._content = raw
+    return response
+
+
+def outcome(func, *args):
+    try:
+        return 'ok', func(*args)
+    except Exception as error:
+        return type(error), str(error)
+
+
+def check_decoded(decode, raw):
+    return outcome(lambda: homework.check_response(decode(raw)))
+
+
+class TestJsonCodec:
+
+    def test_auto_prefers_orjson(self):
+        expected = 'orjson' if json_codec.orjson else 'json'
+        assert json_codec.get_decoder('auto') is json_codec.DECODERS[
+            expected
+        ]
+
+    def test_unknown_decoder_falls_back(self):
+        assert json_codec.get_decoder('missing') is json.loads
+
+    @pytest.mark.parametrize('name', list(json_codec.DECODERS))
+    @pytest.mark.parametrize('raw', PAYLOADS)
+    def test_check_response_errors_are_identical(self, name, raw):
+        decoder = json_codec.DECODERS[name]
+        assert check_decoded(decoder, raw) == check_decoded(
+            lambda body: make_response(body).json(), raw
+        )
+
+    @pytest.mark.parametrize('raw', [b'', b'{', b'<html>'])
+    def test_invalid_json_raises_response_exception(self, raw):
+        with pytest.raises(exceptions.ResponseException):
+            homework.decode_response(make_response(raw))
+
+    def test_response_without_content_uses_json_method(self):
+        response = check_utils.MockResponseGET(data={'homeworks': []})
+        assert homework.decode_response(response) == {'homeworks': []}
@@ -0,0 +1,112 @@
+import json
+import logging
+
+from json_logging import (
+    ContextFilter, JsonFormatter, RepeatFilter, TextFormatter, log_context
+)
+
+
+def make_record(message, created, level=logging.DEBUG, **fields):
+    record = logging.LogRecord(
+        'root', level, __file__, 1, message, None, None, 'poll'
+    )
+    record.created = created
+    for key, value in fields.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestRepeatFilter:
+
+    def test_identical_events_are_collapsed(self):
+        repeat_filter = RepeatFilter(period=300)
+        passed = [
+            repeat_filter.filter(make_record('idle', second, tenant='a'))
+            for second in range(0, 600, 10)
+        ]
+        assert passed.count(True) == 2
+        summary = make_record('idle', 600, tenant='a')
+        assert repeat_filter.filter(summary)
+        assert summary.repeated == 29
+
+    def test_tenant_volume_is_bounded(self):
+        repeat_filter = RepeatFilter(period=300, tenant_limit=5)
+        passed = [
+            repeat_filter.filter(make_record(f'event {n}', n, tenant='a'))
+            for n in range(100)
+        ]
+        assert passed.count(True) == 5
+        assert repeat_filter.filter(make_record('other', 5, tenant='b'))
+        later = make_record('event', 400, tenant='a')
+        assert repeat_filter.filter(later)
+        assert later.dropped == 95
+
+    def test_expired_keys_are_evicted_oldest_first(self):
+        repeat_filter = RepeatFilter(period=300, tracked=3)
+        repeat_filter.filter(make_record('idle', 0, tenant='a'))
+        repeat_filter.filter(make_record('idle', 10, tenant='a'))
+        for n in range(10):
+            repeat_filter.filter(make_record(f'new {n}', 400 + n, tenant=n))
+        assert len(repeat_filter.events) == 10
+        assert ('a', logging.DEBUG, 'idle') not in repeat_filter.events
+        for n in range(5):
+            repeat_filter.filter(make_record(f'late {n}', 800 + n))
+        assert len(repeat_filter.events) == 5
+        assert len(repeat_filter.tenants) == 3
+
+    def test_active_keys_are_kept_past_the_limit(self):
+        repeat_filter = RepeatFilter(period=300, tracked=3)
+        for n in range(10):
+            repeat_filter.filter(make_record('idle', n, tenant=n))
+        assert repeat_filter.filter(make_record('idle', 400, tenant=0))
+        assert not repeat_filter.filter(make_record('idle', 9, tenant=9))
+
+    def test_critical_always_passes(self):
+        repeat_filter = RepeatFilter(period=300, tenant_limit=0)
+        record = make_record('stop', 0, level=logging.CRITICAL, tenant='a')
+        assert repeat_filter.filter(record)
+
+
+class TestJsonFormatter:
+
+    def test_record_with_context(self):
+        record = make_record('Сбой', 0, level=logging.ERROR,
+                             exception_class='WrongStatusCode')
+        with log_context(tenant='a', homework='hw1.zip'):
+            ContextFilter().filter(record)
+        data = json.loads(JsonFormatter().format(record))
+        assert data['message'] == 'Сбой'
+        assert data['level'] == 'ERROR'
+        assert data['tenant'] == 'a'
+        assert data['homework'] == 'hw1.zip'
+        assert data['exception_class'] == 'WrongStatusCode'
+        assert 'latency_ms' not in data
+
+    def test_context_is_restored(self):
+        with log_context(tenant='a'):
+            with log_context(homework='hw'):
+                pass
+            record = make_record('x', 0)
+            ContextFilter().filter(record)
+        assert record.tenant == 'a'
+        assert not hasattr(record, 'homework')
+
+
+class TestTextFormatter:
+
+    def test_context_fields_are_appended(self):
+        record = make_record('Сбой в работе программы', 0,
+                             level=logging.ERROR, repeated=3,
+                             exception_class='WrongStatusCode')
+        with log_context(tenant='a'):
+            ContextFilter().filter(record)
+        text = TextFormatter('%(levelname)s - %(message)s').format(record)
+        assert text == (
+            'ERROR - Сбой в работе программы '
+            '[tenant=a exception_class=WrongStatusCode repeated=3]'
+        )
+
+    def test_record_without_context(self):
+        text = TextFormatter('%(message)s').format(make_record('x', 0))
+        assert text == 'x'
+
@@ -0,0 +1,88 @@
+import pytest
+
+from delivery import SEPARATOR, Outbox, pack_entries
+from latency import Histogram, LatencyTracker
+from simulation import build
+
+HOUR = 3600
+
+
+class TestHistogram:
+
+    def test_empty(self):
+        assert Histogram().quantile(0.5) is None
+        assert Histogram().snapshot()['count'] == 0
+
+    def test_quantiles_are_interpolated(self):
+        histogram = Histogram()
+        for value in range(1, 601):
+            histogram.observe(value)
+        assert histogram.quantile(0.5) == pytest.approx(300, abs=1)
+        assert histogram.quantile(0.99) == pytest.approx(594, abs=1)
+        assert histogram.snapshot()['mean'] == 300.5
+
+    def test_overflow_reports_maximum(self):
+        histogram = Histogram()
+        histogram.observe(10 ** 6)
+        assert histogram.quantile(0.5) == 10 ** 6
+
+
+class TestLatencyTracker:
+
+    def test_per_tenant_and_overall(self):
+        tracker = LatencyTracker()
+        tracker.observe('a', 10, 0)
+        tracker.observe('b', 1000, 0)
+        tracker.observe('b', -5, 0)
+        assert len(tracker.overall) == 3
+        assert len(tracker.tenants['b']) == 2
+        assert list(tracker.snapshot(0)['slowest']) == ['b', 'a']
+        tracker.forget('b')
+        assert 'b' not in tracker.tenants
+
+    def test_burn_rate(self):
+        tracker = LatencyTracker(slo=600, objective=0.9)
+        for minute in range(10):
+            tracker.observe('a', 60, minute * 60)
+        tracker.observe('a', 3600, 600)
+        assert tracker.burn_rate(HOUR, 600) == pytest.approx(1 / 11 / 0.1,
+                                                             abs=0.001)
+        assert tracker.burn_rate(HOUR, 600 + 2 * HOUR) is None
+
+    def test_old_minutes_are_dropped(self):
+        tracker = LatencyTracker(windows={'1h': HOUR})
+        tracker.observe('a', 60, 0)
+        tracker.observe('a', 60, 2 * HOUR)
+        assert len(tracker.minutes) == 1
+
+
+class TestMarks:
+
+    def test_marks_follow_packed_texts(self):
+        chunks = list(pack_entries(
+            [('a', (1,)), ('b', (2,)), ('x' * 10, (3,))], limit=6
+        ))
+        assert chunks == [
+            ('a' + SEPARATOR + 'b', (1, 2)), ('xxxxxx', ()), ('xxxx', (3,))
+        ]
+
+    def test_on_sent_gets_ack_time(self):
+        outbox = Outbox()
+        outbox.add('1', 'a', 0, marks=(('t', 5),))
+        acks = []
+        outbox.flush(lambda chat_id, text: None, 0, clock=lambda: 42,
+                     on_sent=lambda marks, ack: acks.append((marks, ack)))
+        assert acks == [((('t', 5),), 42)]
+
+
+class TestWorkerLatency:
+
+    def test_latency_is_measured_after_first_sync(self):
+        worker, api, bot = build(tenants=3, days=1)
+        worker.run(until=worker.clock.time() + 2 * 24 * HOUR)
+        initial = len(worker.registry)
+        measured = len(worker.latency.overall)
+        assert 0 < measured <= len(bot.messages) - initial
+        assert worker.latency.overall.maximum <= worker.retry_period + 1
+        assert worker.health(worker.clock.time())['latency']['overall'][
+            'count'] == measured
@@ -0,0 +1,216 @@
+import threading
+from types import SimpleNamespace
+
+import requests
+
+import leases as leases_module
+from budget import BudgetPlanner
+from commands import CommandQueue, SharedCommandHandler
+from leases import LEADER_SHARD, SHARDS, LeaseManager, renew, shard_of
+from storage import StateStore
+from stubs import StubResponse, TelegramStub
+from tenants import StaticTenantRegistry, Tenant
+from worker import Worker
+
+
+def make_nodes(tmp_path, *names, ttl=30):
+    path = str(tmp_path / 'leases.db')
+    return [LeaseManager(path, node_id=name, ttl=ttl) for name in names]
+
+
+class CountingBot:
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.sent.append(chat_id)
+
+
+def make_worker(tmp_path, tenants, node):
+    bot = CountingBot()
+    worker = Worker(
+        bot, StaticTenantRegistry(tenants), owns=node.owns,
+        store=StateStore(str(tmp_path / 'leases.db'))
+    )
+    return worker, bot
+
+
+class TestLeaseManager:
+
+    def test_single_node_takes_all_shards(self, tmp_path):
+        node, = make_nodes(tmp_path, 'a')
+        assert node.heartbeat(0)
+        assert len(node.owned) == SHARDS
+        assert not node.heartbeat(5)
+
+    def test_shards_are_split_without_overlap(self, tmp_path):
+        first, second = make_nodes(tmp_path, 'a', 'b')
+        first.heartbeat(0)
+        second.heartbeat(1)
+        first.heartbeat(2)
+        second.heartbeat(3)
+        assert not first.owned & second.owned
+        assert len(first.owned) == len(second.owned) == SHARDS // 2
+
+    def test_leases_move_to_survivor(self, tmp_path):
+        first, second = make_nodes(tmp_path, 'a', 'b', ttl=30)
+        first.heartbeat(0)
+        second.heartbeat(1)
+        first.heartbeat(2)
+        second.heartbeat(3)
+        second.heartbeat(40)
+        assert len(second.owned) == SHARDS
+
+    def test_release_frees_shards(self, tmp_path):
+        first, second = make_nodes(tmp_path, 'a', 'b')
+        first.heartbeat(0)
+        first.release()
+        second.heartbeat(1)
+        assert len(second.owned) == SHARDS
+
+    def test_extended_leases_survive_a_long_cycle(self, tmp_path):
+        first, second = make_nodes(tmp_path, 'a', 'b', ttl=30)
+        first.heartbeat(0)
+        second.heartbeat(1)
+        first.heartbeat(2)
+        first.extend(first.db, 25)
+        second.heartbeat(40)
+        assert len(second.owned) == SHARDS // 2
+        assert not first.owned & second.owned
+
+    def test_keep_alive_extends_from_thread(self, tmp_path):
+        node, = make_nodes(tmp_path, 'a', ttl=30)
+        node.heartbeat(0)
+        stop = node.keep_alive(SimpleNamespace(time=lambda: 100),
+                               period=0.01)
+        try:
+            for _ in range(100):
+                expires = node.db.execute(
+                    'SELECT MIN(expires) FROM leases'
+                ).fetchone()[0]
+                if expires == 130:
+                    break
+                threading.Event().wait(0.01)
+        finally:
+            stop.set()
+        assert expires == 130
+
+    def test_owns_tenant_of_leased_shard(self, tmp_path):
+        node, = make_nodes(tmp_path, 'a')
+        tenant = Tenant('a', 'token', '1')
+        assert not node.owns(tenant)
+        node.heartbeat(0)
+        assert node.owns(tenant)
+        assert 0 <= shard_of(tenant) < SHARDS
+
+    def test_new_owner_does_not_repeat_notifications(self, tmp_path,
+                                                     monkeypatch):
+        monkeypatch.setattr(
+            requests, 'get', lambda *args, **kwargs: StubResponse(200, {
+                'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+                'current_date': 1000198000
+            })
+        )
+        tenants = [Tenant(f'id-{i}', f'token-{i}', f'{i}') for i in range(20)]
+        first, second = make_nodes(tmp_path, 'a', 'b', ttl=30)
+        first_worker, first_bot = make_worker(tmp_path, tenants, first)
+        second_worker, second_bot = make_worker(tmp_path, tenants, second)
+        first.heartbeat(0)
+        first_worker.run_once(0)
+        assert len(first_bot.sent) == len(tenants)
+
+        second.heartbeat(40)
+        second_worker.run_once(40)
+        assert len(second_worker.states) == len(tenants)
+        assert second_bot.sent == []
+
+
+    def test_budget_is_split_between_live_nodes(self, tmp_path,
+                                                monkeypatch):
+        monkeypatch.setattr(leases_module, 'REQUESTS_PER_MINUTE', 120)
+        first, second = make_nodes(tmp_path, 'a', 'b', ttl=30)
+        worker = Worker(
+            None, StaticTenantRegistry([]), budget=BudgetPlanner(120, 600)
+        )
+        renew(worker, first, 0)
+        assert worker.budget.rate == 2
+        second.heartbeat(1)
+        renew(worker, first, 2)
+        assert worker.budget.rate == 1
+        renew(worker, first, 40)
+        assert worker.budget.rate == 2
+
+
+class PollingBot(TelegramStub):
+
+    def __init__(self):
+        super().__init__()
+        self.stopped = threading.Event()
+        self.handlers = []
+
+    def register_message_handler(self, handler, commands):
+        self.handlers.append(commands)
+
+    def polling(self, non_stop):
+        self.stopped.clear()
+        self.stopped.wait()
+
+    def stop_polling(self):
+        self.stopped.set()
+
+
+class TestSharedCommands:
+
+    def make_node(self, tmp_path, name, tenants):
+        path = str(tmp_path / 'leases.db')
+        leases = LeaseManager(path, node_id=name)
+        bot = PollingBot()
+        worker = Worker(
+            bot, StaticTenantRegistry(tenants), owns=leases.owns
+        )
+        worker.clock.time = lambda: 0
+        handler = SharedCommandHandler(
+            bot, worker, leases, CommandQueue(path)
+        )
+        return leases, worker, handler, bot
+
+    def test_owner_answers_command_read_by_leader(self, tmp_path):
+        tenants = [Tenant(f'id-{i}', f'token-{i}', '42') for i in range(8)]
+        nodes = [self.make_node(tmp_path, name, tenants) for name in 'ab']
+        for now in range(4):
+            leases, worker, _, _ = nodes[now % 2]
+            leases.heartbeat(now)
+        for leases, worker, _, _ in nodes:
+            worker.reload(0)
+        (_, _, leader, leader_bot), (_, _, other, other_bot) = nodes
+        assert LEADER_SHARD in leader.leases.owned
+        leader.handle(SimpleNamespace(chat=SimpleNamespace(id=42)), 'refresh')
+        leader.handle(SimpleNamespace(chat=SimpleNamespace(id=7)), 'status')
+        assert leader_bot.messages[-1][1:] == (
+            7, 'Этот чат не подписан на уведомления.'
+        )
+        leader.process(0)
+        other.process(0)
+        replies = [
+            message[1:] for bot in (leader_bot, other_bot)
+            for message in bot.messages if message[1] == '42'
+        ]
+        assert replies == [('42', 'Проверю статус в ближайшие секунды.')] * 2
+        assert leader.queue.take(set(range(SHARDS)), 0) == []
+
+    def test_only_leader_reads_updates(self, tmp_path):
+        first, second = (
+            self.make_node(tmp_path, name, []) for name in 'ab'
+        )
+        first[0].heartbeat(0)
+        second[0].heartbeat(1)
+        first[2].lead()
+        second[2].lead()
+        assert first[2].thread is not None
+        assert second[2].thread is None
+        first[0].release()
+        first[2].lead()
+        assert first[2].thread is None
+        assert first[3].stopped.is_set()
+
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from network import DnsCache, ResumingSSLContext, make_session, prewarm
+from stubs import start_https_stub
+
+CERT = os.path.join(os.path.dirname(__file__), 'localhost.pem')
+
+
+class FakeResolver:
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, host, port, *args, **kwargs):
+        self.calls += 1
+        return [(host, port)]
+
+
+class TestDnsCache:
+
+    def test_answers_are_cached_until_ttl(self):
+        now = [0]
+        resolver = FakeResolver()
+        cache = DnsCache(ttl=60, resolve=resolver, clock=lambda: now[0])
+        cache.getaddrinfo('example.com', 443)
+        cache.getaddrinfo('example.com', 443)
+        assert resolver.calls == 1
+        now[0] = 61
+        cache.getaddrinfo('example.com', 443)
+        assert resolver.calls == 2
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_keys_include_port(self):
+        resolver = FakeResolver()
+        cache = DnsCache(resolve=resolver)
+        cache.getaddrinfo('example.com', 80)
+        cache.getaddrinfo('example.com', 443)
+        assert resolver.calls == 2
+
+
+@pytest.fixture
+def https_server():
+    server = start_https_stub(CERT)
+    yield f'https://localhost:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+class TestWarmConnections:
+
+    def test_prewarm_opens_pooled_connections(self, https_server):
+        context = ResumingSSLContext()
+        session = make_session(ssl_context=context)
+        session.verify = CERT
+        session.trust_env = False
+        assert prewarm(session, [https_server], count=2) == 2
+        assert context.handshakes == 2
+        session.get(https_server, timeout=1)
+        assert context.handshakes == 2
+
+    def test_tls_session_is_resumed(self, https_server):
+        context = ResumingSSLContext()
+        for _ in range(2):
+            session = make_session(ssl_context=context)
+            session.verify = CERT
+            session.trust_env = False
+            assert session.get(https_server, timeout=1).status_code == 200
+            session.close()
+        assert context.handshakes == 2
+        assert context.resumed == 1
@@ -0,0 +1,150 @@
+import pytest
+
+import exceptions
+from outage import RECOVERY_SPREAD, OutageDetector, is_upstream
+from simulation import build
+from storage import StateStore
+from tenants import StaticTenantRegistry
+from worker import Worker
+
+HOUR = 3600
+
+
+class TestOutageDetector:
+
+    @pytest.mark.parametrize('error, upstream', [
+        (exceptions.EndpointException('timeout'), True),
+        (exceptions.WrongStatusCode('500', 500), True),
+        (exceptions.WrongStatusCode('429', 429), True),
+        (exceptions.WrongStatusCode('401', 401), False),
+        (exceptions.ParseException('status'), False),
+    ])
+    def test_upstream_errors(self, error, upstream):
+        assert is_upstream(error) is upstream
+
+    def test_needs_many_failing_tenants(self):
+        detector = OutageDetector(tenants=3, ratio=0.5, canaries=2)
+        assert not detector.record('a', 0, True)
+        assert not detector.record('b', 1, False)
+        assert not detector.record('c', 2, True)
+        assert detector.record('d', 3, True)
+        assert detector.active
+        assert detector.canaries == {'d', 'c'}
+
+    def test_old_results_leave_window(self):
+        detector = OutageDetector(tenants=2, ratio=0, window=60)
+        detector.record('a', 0, True)
+        assert not detector.record('b', 100, True)
+
+    def test_only_canaries_are_admitted(self):
+        detector = OutageDetector(tenants=1, ratio=0, canaries=1)
+        detector.record('a', 0, True)
+        assert detector.admit('a')
+        assert not detector.admit('b')
+        assert detector.record('a', 60, False)
+        assert not detector.active
+        assert detector.resume() == {'a', 'b'}
+        assert detector.admit('b')
+
+    def test_lost_canary_is_replaced_by_paused(self):
+        detector = OutageDetector(tenants=1, ratio=0, canaries=1)
+        detector.record('a', 0, True)
+        assert not detector.admit('b')
+        assert detector.replace('b') is None
+        assert detector.replace('a') == 'b'
+        assert detector.canaries == {'b'}
+        assert detector.replace('b') is None
+        assert detector.canaries == set()
+
+    def test_outage_without_probes_expires(self):
+        detector = OutageDetector(tenants=1, ratio=0, timeout=100)
+        detector.record('a', 0, True)
+        detector.record('a', 50, True)
+        assert not detector.expired(149)
+        assert detector.expired(150)
+        detector.end()
+        assert not detector.expired(1000)
+
+
+class TestOutageInWorker:
+
+    def run(self, tenants=10):
+        worker, api, bot = build(tenants, days=1,
+                                 outages=[(HOUR, 3 * HOUR)])
+        worker.outage = OutageDetector(tenants=5, ratio=0.8)
+        worker.operator_chat_id = 'ops'
+        start = worker.clock.time()
+        worker.run(until=start + HOUR)
+        before = api.requests
+        worker.run(until=start + 3 * HOUR)
+        during = api.requests - before
+        worker.run(until=start + 3 * HOUR + RECOVERY_SPREAD + 1)
+        return worker, bot, during
+
+    def test_one_alert_and_no_student_errors(self):
+        _, bot, _ = self.run()
+        assert not any(
+            'Сбой в работе программы' in text for _, _, text in bot.messages
+        )
+        alerts = [text for _, chat_id, text in bot.messages
+                  if chat_id == 'ops']
+        assert len(alerts) == 2
+        assert alerts[0].startswith('Сбой API Практикума')
+        assert alerts[1].startswith('API Практикума снова доступно')
+
+    def test_only_canaries_are_polled(self):
+        _, _, during = self.run(tenants=50)
+        canary_polls = 3 * 2 * HOUR // 600
+        assert during <= 5 + canary_polls
+
+    def test_recovery_is_staggered(self):
+        worker, _, _ = self.run()
+        recovered = worker.clock.time() - RECOVERY_SPREAD - 1
+        assert not worker.outage.active
+        assert not worker.failing
+        deadlines = sorted(worker.states.deadline)
+        assert all(deadline > recovered for deadline in deadlines)
+        assert len(set(deadlines)) == len(deadlines)
+
+    def test_forgotten_canaries_are_replaced(self):
+        worker, _, _ = build(10, days=1, outages=[(HOUR, 3 * HOUR)])
+        worker.outage = OutageDetector(tenants=5, ratio=0.8,
+                                       timeout=10 * HOUR)
+        start = worker.clock.time()
+        worker.run(until=start + 2 * HOUR)
+        assert worker.outage.active
+        for tenant_id in list(worker.outage.canaries):
+            worker.forget(tenant_id)
+        worker.run(until=start + 3 * HOUR + 2 * worker.retry_period)
+        assert not worker.outage.active
+
+    def test_outage_without_canaries_expires(self):
+        worker, _, bot = build(10, days=1, outages=[(HOUR, 10 * HOUR)])
+        worker.outage = OutageDetector(tenants=5, ratio=0.8, timeout=HOUR)
+        worker.operator_chat_id = 'ops'
+        start = worker.clock.time()
+        worker.run(until=start + 2 * HOUR)
+        for tenant_id in list(worker.states):
+            worker.forget(tenant_id)
+        worker.run(until=start + 4 * HOUR)
+        assert not worker.outage.active
+        assert 'не подтвержден' in bot.messages[-1][2]
+
+
+    def test_shared_store_sends_one_alert_per_transition(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        workers = [
+            Worker(None, StaticTenantRegistry([]), store=StateStore(path),
+                   operator_chat_id='ops')
+            for _ in range(2)
+        ]
+        for now, active in ((0, True), (100, False), (500, True)):
+            for worker in workers:
+                worker.alert_operator('text', now, active=active)
+        assert [len(worker.outbox) for worker in workers] == [3, 0]
+
+    def test_stale_outage_mark_is_ignored(self, tmp_path):
+        store = StateStore(str(tmp_path / 'state.db'))
+        assert store.claim_outage(True, 0, timeout=100)
+        assert not store.claim_outage(True, 50, timeout=100)
+        assert store.claim_outage(True, 150, timeout=100)
@@ -0,0 +1,30 @@
+import pytest
+
+import exceptions
+from retry_policy import Action, classify, retry_delay
+
+
+class TestRetryPolicy:
+
+    @pytest.mark.parametrize('error, action', [
+        (exceptions.WrongStatusCode('', 401), Action.FATAL),
+        (exceptions.WrongStatusCode('', 403), Action.FATAL),
+        (exceptions.WrongStatusCode('', 400), Action.BACKOFF),
+        (exceptions.WrongStatusCode('', 504), Action.RETRY_FAST),
+        (exceptions.WrongStatusCode('', 500), Action.BACKOFF),
+        (exceptions.WrongStatusCode(''), Action.BACKOFF),
+        (exceptions.EndpointException(), Action.BACKOFF),
+        (exceptions.MessageError(), Action.BACKOFF),
+        (KeyError(), Action.BACKOFF),
+    ])
+    def test_classify(self, error, action):
+        assert classify(error) is action
+
+    def test_backoff_grows_and_is_capped(self):
+        delays = [retry_delay(Action.BACKOFF, n, 600) for n in range(1, 8)]
+        assert delays[:3] == [600, 1200, 2400]
+        assert max(delays) == delays[-1] <= 4 * 3600
+
+    def test_fatal_stops_polling(self):
+        assert retry_delay(Action.FATAL, 1, 600) is None
+        assert retry_delay(Action.RETRY_FAST, 5, 600) == 60
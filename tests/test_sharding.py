@@ -0,0 +1,159 @@
+import os
+import signal
+import time
+
+import pytest
+import requests
+
+from sharding import HashRing
+from supervisor import Supervisor, ignore_resize_signals, shard_filter
+from storage import StateStore
+from stubs import StubResponse
+from tenants import StaticTenantRegistry, Tenant
+from worker import Worker
+
+KEYS = [f'token-{index}' for index in range(2000)]
+
+
+def crash(worker_id, members, inbox):
+    raise SystemExit(1)
+
+
+def idle(worker_id, members, inbox):
+    inbox.get()
+
+
+def deaf(worker_id, members, inbox):
+    ignore_resize_signals()
+    inbox.put('ready')
+    time.sleep(10)
+
+
+def process_state(pid):
+    with open(f'/proc/{pid}/stat') as stat:
+        return stat.read().rsplit(')', 1)[1].split()[0]
+
+
+class TestHashRing:
+
+    def test_keys_are_spread_over_nodes(self):
+        ring = HashRing(['a', 'b', 'c', 'd'])
+        owners = [ring.node_for(key) for key in KEYS]
+        for node in ring.nodes:
+            assert 300 < owners.count(node) < 700
+
+    def test_adding_node_moves_only_its_slice(self):
+        old_ring = HashRing(['a', 'b', 'c'])
+        new_ring = HashRing(['a', 'b', 'c', 'd'])
+        moved = [
+            key for key in KEYS
+            if old_ring.node_for(key) != new_ring.node_for(key)
+        ]
+        assert all(new_ring.node_for(key) == 'd' for key in moved)
+        assert len(moved) < len(KEYS) / 2
+
+
+class CountingBot:
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.sent.append(chat_id)
+
+
+@pytest.fixture
+def approved(monkeypatch):
+    monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: StubResponse(
+        200, {
+            'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+            'current_date': 1000198000
+        }
+    ))
+
+
+class TestShardedWorker:
+
+    def test_worker_keeps_only_own_shard(self):
+        tenants = [Tenant(key, key, '1') for key in KEYS[:200]]
+        members = ['worker-0', 'worker-1']
+        worker = Worker(
+            None, StaticTenantRegistry(tenants),
+            owns=shard_filter('worker-0', members)
+        )
+        worker.reload(0)
+        owned = set(worker.states)
+        assert 0 < len(owned) < len(tenants)
+
+        members.append('worker-2')
+        worker.set_owner(shard_filter('worker-0', members), 10)
+        assert set(worker.states) <= owned
+        for tenant_id in set(worker.states):
+            assert worker.schedule.due_time(tenant_id) == 0
+
+    def test_moved_tenants_are_not_notified_again(self, tmp_path, approved):
+        tenants = [Tenant(key, key, key) for key in KEYS[:50]]
+        path = tmp_path / 'state.db'
+        bot = CountingBot()
+        first = Worker(
+            bot, StaticTenantRegistry(tenants),
+            owns=shard_filter('worker-0', ['worker-0']),
+            store=StateStore(path)
+        )
+        first.run_once(0)
+        assert len(bot.sent) == len(tenants)
+
+        members = ['worker-0', 'worker-1']
+        first.set_owner(shard_filter('worker-0', members), 10)
+        second_bot = CountingBot()
+        second = Worker(
+            second_bot, StaticTenantRegistry(tenants),
+            owns=shard_filter('worker-1', members),
+            store=StateStore(path)
+        )
+        second.run_once(10)
+        first.run_once(10)
+        assert len(second.states) > 0
+        assert second_bot.sent == []
+        assert len(bot.sent) == len(tenants)
+        moved = next(iter(second.states))
+        assert list(second.history.get(moved)) == ['hw1']
+
+
+class TestSupervisor:
+
+    def test_crashed_worker_is_restarted(self):
+        supervisor = Supervisor(1, target=crash)
+        supervisor.start('worker-0')
+        first, _ = supervisor.processes['worker-0']
+        first.join()
+        supervisor.check()
+        second, _ = supervisor.processes['worker-0']
+        assert second.pid != first.pid
+        second.join()
+
+    def test_resize_notifies_survivors(self):
+        supervisor = Supervisor(2, target=idle)
+        for worker_id in supervisor.members:
+            supervisor.start(worker_id)
+        supervisor.resize(1)
+        assert list(supervisor.processes) == ['worker-0']
+        process, _ = supervisor.processes['worker-0']
+        deadline = time.time() + 1
+        while process.is_alive() and time.time() < deadline:
+            time.sleep(0.01)
+        assert not process.is_alive()
+
+    def test_resize_signals_do_not_stop_workers(self):
+        supervisor = Supervisor(1, target=deaf)
+        supervisor.start('worker-0')
+        process, inbox = supervisor.processes['worker-0']
+        try:
+            assert inbox.get(timeout=1) == 'ready'
+            os.kill(process.pid, signal.SIGTTIN)
+            os.kill(process.pid, signal.SIGTTOU)
+            time.sleep(0.05)
+            assert process_state(process.pid) != 'T'
+        finally:
+            process.kill()
+            process.join()
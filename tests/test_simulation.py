@@ -0,0 +1,60 @@
+from clock import VirtualClock
+from simulation import DAY, build, simulate
+from stubs import PracticumStub
+
+
+class TestVirtualClock:
+
+    def test_sleep_moves_time_forward(self):
+        clock = VirtualClock(start=100)
+        clock.sleep(600)
+        clock.sleep(-5)
+        assert clock.time() == 700
+
+
+class TestPracticumStub:
+
+    def test_returns_latest_status_since_from_date(self):
+        clock = VirtualClock(start=0)
+        api = PracticumStub(clock)
+        api.add_status('t', 10, 'hw', 'reviewing')
+        api.add_status('t', 20, 'hw', 'approved')
+        headers = {'Authorization': 'OAuth t'}
+        clock.now = 15
+        data = api.get('', headers=headers, params={'from_date': 0}).json()
+        assert [hw['status'] for hw in data['homeworks']] == ['reviewing']
+        clock.now = 30
+        data = api.get('', headers=headers, params={'from_date': 15}).json()
+        assert [hw['status'] for hw in data['homeworks']] == ['approved']
+
+    def test_unknown_token_is_unauthorized(self):
+        api = PracticumStub(VirtualClock())
+        response = api.get(
+            '', headers={'Authorization': 'OAuth x'}, params={'from_date': 0}
+        )
+        assert response.status_code == 401
+
+
+class TestSimulation:
+
+    def test_day_of_polling_runs_in_virtual_time(self):
+        report = simulate(tenants=20, days=1)
+        assert report['api_requests'] == 20 * DAY // 600
+        assert report['telegram_messages'] > 0
+        assert report['wall_seconds'] < report['virtual_seconds']
+
+    def test_every_verdict_is_delivered(self):
+        worker, api, bot = build(tenants=10, days=1)
+        worker.run(until=worker.clock.time() + 3 * DAY)
+        for tenant in worker.registry:
+            delivered = [
+                text for _, chat_id, text in bot.messages
+                if chat_id == tenant.telegram_chat_id
+            ]
+            _, events = api.timelines[tenant.practicum_token]
+            assert events[-1]['homework_name'] in delivered[-1]
+
+    def test_outage_backs_off(self):
+        normal = simulate(tenants=5, days=1)
+        with_outage = simulate(tenants=5, days=1, outages=[(0, DAY / 2)])
+        assert with_outage['api_requests'] < normal['api_requests']
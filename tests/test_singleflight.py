@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_share_one_request(self):
+        flights = SingleFlight(ttl=0)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_fetch():
+            calls.append(1)
+            started.set()
+            release.wait(1)
+            return {'homeworks': []}
+
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(flights.do('key', slow_fetch))
+        )
+        leader.start()
+        started.wait(1)
+        followers = [
+            threading.Thread(
+                target=lambda: results.append(flights.do('key', slow_fetch))
+            )
+            for _ in range(5)
+        ]
+        for follower in followers:
+            follower.start()
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(1)
+        assert len(calls) == 1
+        assert len(results) == 6
+        assert all(result is results[0] for result in results)
+
+    def test_result_cached_until_ttl(self):
+        clock = FakeClock()
+        flights = SingleFlight(ttl=5, clock=clock)
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return len(calls)
+
+        assert flights.do('key', fetch) == 1
+        clock.now = 4
+        assert flights.do('key', fetch) == 1
+        assert flights.do('other', fetch) == 2
+        clock.now = 6
+        assert flights.do('key', fetch) == 3
+
+    def test_errors_are_not_cached(self):
+        flights = SingleFlight(ttl=5)
+
+        def broken():
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            flights.do('key', broken)
+        assert flights.do('key', lambda: 'ok') == 'ok'
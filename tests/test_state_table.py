@@ -0,0 +1,47 @@
+from state_table import COLUMNS, NO_STATUS, StateTable, fingerprint
+
+
+class TestStateTable:
+
+    def test_new_row_has_defaults(self):
+        table = StateTable()
+        table.add('a')
+        assert table.row('a') == {
+            column: default for column, (_, default) in COLUMNS.items()
+        }
+        assert table.row('a')['status'] == NO_STATUS
+
+    def test_unknown_fields_are_ignored(self):
+        table = StateTable()
+        table.add('a', cursor=5, message='legacy')
+        assert table.row('a')['cursor'] == 5
+
+    def test_removed_slot_is_reused(self):
+        table = StateTable()
+        table.add('a', cursor=1)
+        table.add('b')
+        table.remove('a')
+        table.add('c')
+        assert table.slot('c') == 0
+        assert table.row('c')['cursor'] == 0
+        assert set(table) == {'b', 'c'}
+        assert len(table) == 2
+
+    def test_dump_round_trip(self):
+        table = StateTable()
+        table.add('a', cursor=7, failures=3, error_fp=fingerprint('e'))
+        restored = StateTable()
+        for tenant_id, row in table.dump().items():
+            restored.add(tenant_id, **row)
+        assert restored.row('a') == table.row('a')
+
+    def test_row_size_is_fixed(self):
+        table = StateTable()
+        for index in range(1000):
+            table.add(str(index))
+        assert table.nbytes() <= 1000 * 48
+
+    def test_fingerprint_is_stable(self):
+        assert fingerprint('hw', 'approved') == fingerprint('hw', 'approved')
+        assert fingerprint('hw', 'approved') != fingerprint('hw', 'rejected')
+        assert fingerprint('') != 0
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+import exceptions
+import homework
+from delivery import Outbox
+from stubs import start_telegram_stub
+from telegram_client import TelegramClient
+
+
+@pytest.fixture
+def server():
+    server = start_telegram_stub()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    client = TelegramClient(
+        'token', api_url=f'http://127.0.0.1:{server.server_port}',
+        concurrency=8
+    )
+    client.session.trust_env = False
+    yield client
+    client.close()
+
+
+class TestTelegramClient:
+
+    def test_send_message(self, server, client):
+        result = client.send_message(42, 'привет')
+        assert result['message_id'] == 1
+        assert server.messages == [(42, 'привет')]
+
+    def test_keeps_send_message_contract(self, server, client,
+                                         monkeypatch):
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 7)
+        homework.send_message(client, 'статус')
+        assert server.messages == [(7, 'статус')]
+
+    def test_retry_after(self, server, client):
+        server.limited = 2
+        with pytest.raises(exceptions.RetryAfter) as error:
+            client.send_message(42, 'текст')
+        assert error.value.retry_after == 1
+        with pytest.raises(exceptions.RetryAfter):
+            homework.send_chat_message(client, 42, 'текст')
+
+    def test_unreachable_api(self):
+        client = TelegramClient('token', api_url='http://127.0.0.1:9',
+                                timeout=0.5)
+        client.session.trust_env = False
+        with pytest.raises(exceptions.MessageError):
+            client.send_message(42, 'текст')
+
+    def test_hundreds_of_sends_per_second(self, server, client):
+        count = 300
+        started = time.perf_counter()
+        list(client.map(lambda chat: client.send_message(chat, 'x'),
+                        range(count)))
+        elapsed = time.perf_counter() - started
+        assert len(server.messages) == count
+        assert count / elapsed > 200
+
+
+class TestOutboxRetryAfter:
+
+    def test_pauses_until_retry_after(self, server, client):
+        outbox = Outbox()
+        for chat_id in range(3):
+            outbox.add(chat_id, 'статус', 0)
+        server.limited = 1
+        sent = outbox.flush(client.send_message, 0, client.map)
+        assert sent == 2
+        assert outbox.paused_until == 1
+        assert outbox.flush(client.send_message, 0.5, client.map) == 0
+        assert outbox.flush(client.send_message, 1, client.map) == 1
+        assert not outbox
+        assert sorted(chat for chat, _ in server.messages) == [0, 1, 2]
@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import homework
+from commands import CommandHandler
+from history import STATUS_CODES
+from stubs import StubResponse, TelegramStub
+from templates import LOCALES, REPLIES, TEMPLATES
+from tenants import StaticTenantRegistry, Tenant
+from worker import Worker
+
+
+class TestTemplates:
+
+    @pytest.mark.parametrize('status', list(homework.HOMEWORK_VERDICTS))
+    def test_russian_matches_parse_status(self, status):
+        item = {'homework_name': 'hw.zip', 'status': status}
+        assert TEMPLATES.render(
+            STATUS_CODES[status], 'ru', 'hw.zip'
+        ) == homework.parse_status(item)
+
+    def test_every_locale_has_every_status(self):
+        for locale in LOCALES:
+            for code in STATUS_CODES.values():
+                assert (code, locale) in TEMPLATES.compiled
+
+    def test_every_locale_has_every_reply(self):
+        for locale in LOCALES:
+            assert REPLIES[locale].keys() == REPLIES['ru'].keys()
+
+    def test_unknown_locale_falls_back_to_default(self):
+        code = STATUS_CODES['approved']
+        assert TEMPLATES.render(code, 'xx', 'a') == TEMPLATES.render(
+            code, 'ru', 'a'
+        )
+
+
+class TestLocalizedNotifications:
+
+    def test_message_is_rendered_in_chat_locale(self, monkeypatch):
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: StubResponse(200, {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 1,
+            })
+        )
+        bot = TelegramStub()
+        worker = Worker(bot, StaticTenantRegistry([
+            Tenant('a', 'ta', '1'), Tenant('b', 'tb', '2', locale='en'),
+        ]))
+        worker.run_once(0)
+        worker.run_once(worker.retry_period)
+        texts = {chat_id: text for _, chat_id, text in bot.messages}
+        assert len(bot.messages) == 2
+        assert texts['1'].startswith('Изменился статус')
+        assert texts['2'] == (
+            'Homework "hw" review status changed. '
+            'The reviewer liked everything. Hooray!'
+        )
+
+    def test_fan_out_renders_once_per_cycle(self, monkeypatch):
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: StubResponse(200, {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 1,
+            })
+        )
+        rendered = []
+        render = TEMPLATES.render
+        monkeypatch.setattr(
+            TEMPLATES, 'render',
+            lambda *args: rendered.append(args) or render(*args)
+        )
+        bot = TelegramStub()
+        worker = Worker(bot, StaticTenantRegistry([
+            Tenant(f'id-{index}', 'shared', str(index))
+            for index in range(5)
+        ]))
+        worker.run_once(0)
+        assert len(bot.messages) == 5
+        assert len({text for _, _, text in bot.messages}) == 1
+        assert len(rendered) == 1
+
+    def test_command_replies_in_chat_locale(self):
+        bot = TelegramStub()
+        worker = Worker(bot, StaticTenantRegistry([
+            Tenant('a', 'ta', '42', locale='en'),
+        ]))
+        worker.reload(0)
+        worker.history.record('a', {
+            'homework_name': 'hw', 'status': 'approved',
+            'date_updated': '2024-02-13T14:40:00Z',
+        }, 0)
+        handler = CommandHandler(bot, worker)
+        message = SimpleNamespace(chat=SimpleNamespace(id=42))
+        handler.status(message)
+        handler.history(message)
+        status, history = [text for _, _, text in bot.messages[-2:]]
+        assert status.startswith(
+            'Homework "hw": The reviewer liked everything. Hooray!'
+        )
+        assert 'The status is checked every' in status
+        assert history == (
+            'Homework "hw":\n13.02.2024 14:40 UTC - '
+            'The reviewer liked everything. Hooray!'
+        )
@@ -0,0 +1,111 @@
+import json
+import os
+
+import pytest
+
+import exceptions
+from scheduler import PollSchedule
+from tenants import Tenant, TenantRegistry
+
+
+def write_registry(path, tenants, mtime=None):
+    path.write_text(json.dumps({'tenants': tenants}), encoding='utf-8')
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def tenant_entry(tenant_id, token='token'):
+    return {
+        'id': tenant_id,
+        'practicum_token': token,
+        'telegram_chat_id': 100
+    }
+
+
+class TestTenantRegistry:
+
+    def test_first_refresh_adds_all(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        write_registry(path, [tenant_entry('a'), tenant_entry('b')])
+        registry = TenantRegistry(str(path))
+        changes = registry.refresh()
+        assert [tenant.id for tenant in changes.added] == ['a', 'b']
+        assert registry.get('a') == Tenant('a', 'token', '100')
+
+    def test_unchanged_file_is_not_reloaded(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        write_registry(path, [tenant_entry('a')], mtime=10)
+        registry = TenantRegistry(str(path))
+        registry.refresh()
+        assert not registry.refresh()
+
+    def test_incremental_changes(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        write_registry(
+            path, [tenant_entry('a'), tenant_entry('b')], mtime=10
+        )
+        registry = TenantRegistry(str(path))
+        registry.refresh()
+        write_registry(
+            path, [tenant_entry('a', 'rotated'), tenant_entry('c')], mtime=20
+        )
+        changes = registry.refresh()
+        assert [tenant.id for tenant in changes.added] == ['c']
+        assert changes.removed == ('b',)
+        assert [tenant.id for tenant in changes.updated] == ['a']
+
+    @pytest.mark.parametrize('tenants', [
+        [{'id': 'a'}],
+        [tenant_entry('a'), tenant_entry('a')],
+        ['a'],
+        [{**tenant_entry('a'), 'locale': 'xx'}],
+    ])
+    def test_invalid_registry(self, tmp_path, tenants):
+        path = tmp_path / 'tenants.json'
+        write_registry(path, tenants)
+        with pytest.raises(exceptions.TenantConfigError):
+            TenantRegistry(str(path)).refresh()
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(exceptions.TenantConfigError):
+            TenantRegistry(str(tmp_path / 'missing.json')).refresh()
+
+
+class TestPollSchedule:
+
+    def test_pop_due_in_order(self):
+        schedule = PollSchedule()
+        schedule.add('b', 20)
+        schedule.add('a', 10)
+        schedule.add('c', 30)
+        assert schedule.pop_due(25) == ['a', 'b']
+        assert schedule.next_due() == 30
+        assert len(schedule) == 1
+
+    def test_remove_and_reschedule(self):
+        schedule = PollSchedule()
+        schedule.add('a', 10)
+        schedule.add('b', 10)
+        schedule.remove('a')
+        schedule.add('b', 50)
+        assert schedule.pop_due(20) == []
+        assert schedule.next_due() == 50
+        assert 'a' not in schedule
+
+    def test_pop_due_by_urgency_classifies_each_key_once(self):
+        schedule = PollSchedule()
+        for index in range(6):
+            schedule.add(index, index)
+        classified = []
+
+        def urgency(key):
+            classified.append(key)
+            return key % 2
+
+        assert schedule.pop_due(10, 2, urgency) == [0, 2]
+        assert schedule.pop_due(10, 2, urgency) == [4, 1]
+        schedule.remove(3)
+        assert schedule.next_due() == 5
+        assert sorted(classified) == list(range(6))
+        assert schedule.pop_due(10) == [5]
+        assert len(schedule) == 0
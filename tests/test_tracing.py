@@ -0,0 +1,98 @@
+import json
+
+from clock import VirtualClock
+from stubs import PracticumStub, TelegramStub
+from tenants import StaticTenantRegistry, Tenant
+from tracing import Tracer
+from worker import Worker
+
+
+def make_worker(tracer, revoked=()):
+    clock = VirtualClock(start=1000)
+    api = PracticumStub(clock, revoked=revoked)
+    api.add_status('token', 900, 'hw1', 'approved')
+    worker = Worker(
+        TelegramStub(clock),
+        StaticTenantRegistry([Tenant('a', 'token', '1')]),
+        clock=clock,
+        session=api,
+        tracer=tracer
+    )
+    worker.reload(clock.time())
+    return worker
+
+
+def read_traces(path):
+    with open(path, encoding='utf-8') as trace_file:
+        return [json.loads(line) for line in trace_file]
+
+
+def spans_of(trace):
+    return trace['resourceSpans'][0]['scopeSpans'][0]['spans']
+
+
+class TestTracing:
+
+    def test_poll_trace_has_child_spans(self, tmp_path):
+        path = tmp_path / 'traces.jsonl'
+        worker = make_worker(Tracer(str(path), sample_rate=1))
+        worker.run_once(worker.clock.time())
+        traces = read_traces(path)
+        assert len(traces) == 2
+        spans = {span['name']: span for span in spans_of(traces[0])}
+        assert set(spans) == {
+            'poll', 'get_api_answer', 'check_response', 'parse_status'
+        }
+        root = spans['poll']
+        assert 'parentSpanId' not in root
+        for name in ('get_api_answer', 'parse_status'):
+            assert spans[name]['parentSpanId'] == root['spanId']
+            assert spans[name]['traceId'] == root['traceId']
+        assert spans['check_response']['parentSpanId'] == root['spanId']
+        deliver, send = spans_of(traces[1])
+        assert deliver['name'] == 'deliver'
+        assert deliver['links'] == [
+            {'traceId': root['traceId'], 'spanId': root['spanId']}
+        ]
+        assert send['name'] == 'send_message'
+        assert send['parentSpanId'] == deliver['spanId']
+        assert send['attributes'] == [
+            {'key': 'tenant.ids', 'value': {'stringValue': 'a'}}
+        ]
+        attributes = {
+            item['key']: item['value'] for item in root['attributes']
+        }
+        assert attributes['tenant.id'] == {'stringValue': 'a'}
+
+    def test_deliver_of_sampled_poll_is_written(self, tmp_path):
+        path = tmp_path / 'traces.jsonl'
+        tracer = Tracer(str(path), sample_rate=1)
+        worker = make_worker(tracer)
+        with tracer.span('poll') as poll:
+            worker.send(worker.registry.get('a'), 'text')
+        tracer.sample_rate = 0
+        worker.deliver(worker.clock.time())
+        deliver = spans_of(read_traces(path)[-1])[0]
+        assert deliver['name'] == 'deliver'
+        assert deliver['links'][0]['spanId'] == poll.span_id
+
+    def test_error_is_recorded(self, tmp_path):
+        path = tmp_path / 'traces.jsonl'
+        worker = make_worker(
+            Tracer(str(path), sample_rate=1), revoked=('token',)
+        )
+        worker.run_once(worker.clock.time())
+        root = spans_of(read_traces(path)[0])[0]
+        assert root['name'] == 'poll'
+        assert root['status']['code'] == 2
+
+    def test_unsampled_traces_are_not_written(self, tmp_path):
+        path = tmp_path / 'traces.jsonl'
+        worker = make_worker(Tracer(str(path), sample_rate=0))
+        worker.run_once(worker.clock.time())
+        assert read_traces(path) == []
+
+    def test_disabled_tracer(self):
+        worker = make_worker(Tracer(None, sample_rate=1))
+        worker.run_once(worker.clock.time())
+        assert worker.states.row('a')['homework_fp']
@@ -0,0 +1,77 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from transfer import ACCEPT_ENCODING, TransferStats
+
+PAYLOAD = json.dumps({
+    'homeworks': [
+        {'homework_name': f'hw{index}.zip', 'status': 'approved'}
+        for index in range(500)
+    ],
+    'current_date': 1
+}).encode()
+
+
+class GzipHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.server.seen_encoding = self.headers.get('Accept-Encoding')
+        body = gzip.compress(PAYLOAD)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gzip_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GzipHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestTransferStats:
+
+    def test_accept_encoding_lists_gzip(self):
+        assert 'gzip' in ACCEPT_ENCODING.split(',')
+
+    def test_wire_and_decoded_bytes(self, gzip_server):
+        url = f'http://127.0.0.1:{gzip_server.server_port}/'
+        response = requests.get(
+            url, headers={'Accept-Encoding': ACCEPT_ENCODING}, timeout=1
+        )
+        stats = TransferStats()
+        wire, decoded = stats.record('student', response)
+        assert gzip_server.seen_encoding == ACCEPT_ENCODING
+        assert decoded == len(PAYLOAD)
+        assert wire == len(gzip.compress(PAYLOAD))
+        assert stats.totals()['compression_ratio'] > 5
+        assert stats.snapshot()['heaviest']['student']['responses'] == 1
+        stats.forget('student')
+        assert stats.snapshot()['heaviest'] == {}
+        assert stats.totals()['responses'] == 1
+
+    def test_heaviest_tenants_in_snapshot(self):
+        stats = TransferStats()
+        for size in range(10):
+            response = SimpleNamespace(
+                content=b'x' * size, headers={}, raw=None
+            )
+            stats.record(f'tenant-{size}', response)
+        heaviest = stats.snapshot()['heaviest']
+        assert list(heaviest) == [f'tenant-{size}' for size in (9, 8, 7, 6, 5)]
+        assert heaviest['tenant-9']['wire_bytes'] == 9
@@ -0,0 +1,93 @@
+import pytest
+import requests
+
+import tests.check_utils as check_utils
+from stubs import StubResponse
+from tenants import StaticTenantRegistry, Tenant, TenantChanges
+from worker import Worker
+
+
+@pytest.fixture
+def response_data():
+    return {
+        'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+        'current_date': 1000198000
+    }
+
+
+@pytest.fixture
+def mock_api(monkeypatch, response_data):
+    calls = []
+
+    def mock_get(url, headers=None, params=None, **kwargs):
+        calls.append(headers['Authorization'])
+        return StubResponse(200, response_data)
+
+    monkeypatch.setattr(requests, 'get', mock_get)
+    return calls
+
+
+class TestWorker:
+
+    def test_polls_each_tenant_with_own_token(self, mock_api):
+        tenants = [Tenant('a', 'ta', '1'), Tenant('b', 'tb', '2')]
+        bot = check_utils.MockTelegramBot()
+        worker = Worker(bot, StaticTenantRegistry(tenants))
+        worker.reload(0)
+        worker.run_once(0)
+        assert mock_api == ['OAuth ta', 'OAuth tb']
+        assert bot.chat_id == '2'
+        assert worker.schedule.next_due() == worker.retry_period
+
+    def test_removed_tenant_does_not_disturb_others(self, mock_api):
+        tenants = [Tenant('a', 'ta', '1'), Tenant('b', 'tb', '2')]
+        worker = Worker(
+            check_utils.MockTelegramBot(), StaticTenantRegistry(tenants)
+        )
+        worker.reload(0)
+        worker.run_once(0)
+        worker.apply_changes(TenantChanges(removed=('a',)), 10)
+        assert 'a' not in worker.states
+        assert worker.states.row('b')['homework_fp']
+        assert worker.schedule.due_time('b') == worker.retry_period
+
+    def test_rotated_token_is_polled_immediately(self, mock_api):
+        tenant = Tenant('a', 'ta', '1')
+        worker = Worker(
+            check_utils.MockTelegramBot(), StaticTenantRegistry([tenant])
+        )
+        worker.reload(0)
+        worker.run_once(0)
+        worker.apply_changes(
+            TenantChanges(updated=(Tenant('a', 'new', '1'),)), 10
+        )
+        assert worker.schedule.due_time('a') == 10
+
+    def test_shared_token_is_fetched_once(self, mock_api):
+        tenants = [Tenant('a', 'same', '1'), Tenant('b', 'same', '2')]
+        bot = check_utils.MockTelegramBot()
+        worker = Worker(bot, StaticTenantRegistry(tenants))
+        worker.reload(0)
+        worker.run_once(0)
+        assert mock_api == ['OAuth same']
+        assert worker.states.row('a') == worker.states.row('b')
+
+    def test_revoked_token_stops_polling_until_rotated(self, monkeypatch):
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(
+                http_status=401, data={}
+            )
+        )
+        tenant = Tenant('a', 'revoked', '1')
+        bot = check_utils.MockTelegramBot()
+        worker = Worker(bot, StaticTenantRegistry([tenant]))
+        worker.reload(0)
+        worker.run_once(0)
+        assert 'a' not in worker.schedule
+        assert '401' in bot.text
+        worker.apply_changes(
+            TenantChanges(updated=(Tenant('a', 'new', '1'),)), 100
+        )
+        assert worker.schedule.due_time('a') == 100
+        assert worker.states.row('a')['failures'] == 0
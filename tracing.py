@@ -0,0 +1,197 @@
+import contextvars
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+TRACE_FILE = os.getenv('TRACE_FILE')
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0.01))
+TRACE_MAX_BYTES = 10 * 1024 * 1024
+TRACE_BACKUP_COUNT = 5
+SERVICE_NAME = 'homework_bot'
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_ERROR = 2
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+def otel_value(value):
+    """Значение атрибута в формате OTLP/JSON."""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class NoopSpan:
+    """Заглушка для трасс, не попавших в выборку."""
+
+    def set(self, key, value):
+        """Ничего не делает."""
+
+    def record_error(self, error):
+        """Ничего не делает."""
+
+    def link(self):
+        """Трасса не записывается, ссылаться не на что."""
+        return None
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class Span:
+    """Участок трассы с атрибутами и временем выполнения."""
+
+    __slots__ = (
+        'name', 'kind', 'trace_id', 'span_id', 'parent_id', 'attributes',
+        'start_ns', 'end_ns', 'error', 'children', 'links',
+    )
+
+    def __init__(self, name, kind, trace_id, parent_id, attributes,
+                 links=()):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = random.getrandbits(64).to_bytes(8, 'big').hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self.children = []
+        self.links = list(links)
+
+    def set(self, key, value):
+        """Добавляет атрибут."""
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_error(self, error):
+        """Отмечает участок как завершившийся ошибкой."""
+        self.error = error
+        self.attributes['exception.type'] = type(error).__name__
+
+    def link(self):
+        """Ссылка на участок из другой трассы: (trace_id, span_id)."""
+        return self.trace_id, self.span_id
+
+    def to_otel(self):
+        """Участок в формате OTLP/JSON."""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [
+                {'key': key, 'value': otel_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            'status': {},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.links:
+            span['links'] = [
+                {'traceId': trace_id, 'spanId': span_id}
+                for trace_id, span_id in self.links
+            ]
+        if self.error is not None:
+            span['status'] = {
+                'code': STATUS_CODE_ERROR, 'message': str(self.error)
+            }
+        return span
+
+
+def current_span():
+    """Текущий участок трассы или заглушка."""
+    return _current_span.get() or NOOP_SPAN
+
+
+class Tracer:
+    """Трассировка с выборкой и записью в ротируемый JSON Lines файл.
+
+    Каждая строка файла - одна трасса в формате запроса экспорта
+    OTLP/JSON (resourceSpans), который читает файловый ресивер
+    OpenTelemetry Collector.
+    """
+
+    def __init__(self, path=TRACE_FILE, sample_rate=TRACE_SAMPLE_RATE,
+                 max_bytes=TRACE_MAX_BYTES, backup_count=TRACE_BACKUP_COUNT):
+        self.sample_rate = sample_rate if path else 0
+        self._logger = None
+        if path:
+            handler = RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count,
+                encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger = logging.Logger(f'tracing:{path}')
+            self._logger.addHandler(handler)
+
+    @contextmanager
+    def span(self, name, attributes=None, kind=SPAN_KIND_INTERNAL,
+             links=()):
+        """Открывает участок; выборку трассы решает корневой участок.
+
+        links - ссылки (trace_id, span_id) на участки других трасс.
+        Корневой участок со ссылками записывается всегда, чтобы трассы,
+        попавшие в выборку, не теряли продолжения.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            if not links and (not self.sample_rate
+                              or random.random() >= self.sample_rate):
+                token = _current_span.set(NOOP_SPAN)
+                try:
+                    yield NOOP_SPAN
+                finally:
+                    _current_span.reset(token)
+                return
+            trace_id = random.getrandbits(128).to_bytes(16, 'big').hex()
+            span = Span(name, kind, trace_id, None, attributes, links)
+        elif parent is NOOP_SPAN:
+            yield NOOP_SPAN
+            return
+        else:
+            span = Span(
+                name, kind, parent.trace_id, parent.span_id, attributes,
+                links
+            )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as error:
+            span.record_error(error)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            if parent is None:
+                self.export(span)
+            else:
+                parent.children.append(span)
+                parent.children.extend(span.children)
+                span.children = []
+
+    def export(self, root):
+        """Записывает трассу одной строкой."""
+        spans = [root.to_otel()] + [
+            child.to_otel() for child in root.children
+        ]
+        self._logger.info(json.dumps({'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': otel_value(SERVICE_NAME)}
+            ]},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': spans}],
+        }]}, ensure_ascii=False))
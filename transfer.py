@@ -0,0 +1,77 @@
+import heapq
+from collections import defaultdict
+
+from urllib3.util import request as urllib3_request
+
+# urllib3 перечисляет только те кодировки, которые умеет распаковать:
+# gzip и deflate всегда, br и zstd - при установленных brotli и zstandard.
+# requests распаковывает тело потоково, по мере чтения из сокета.
+ACCEPT_ENCODING = urllib3_request.ACCEPT_ENCODING
+HEAVIEST_TENANTS = 5
+
+
+def response_sizes(response):
+    """Возвращает размер ответа на проводе и после распаковки."""
+    decoded = len(response.content)
+    raw = getattr(response, 'raw', None)
+    if raw is not None and hasattr(raw, 'tell'):
+        return raw.tell(), decoded
+    headers = getattr(response, 'headers', None) or {}
+    wire = headers.get('Content-Length')
+    return (int(wire) if wire else decoded), decoded
+
+
+class TransferStats:
+    """Счетчики трафика API: общие и по обслуживаемым студентам."""
+
+    def __init__(self):
+        self.tenants = defaultdict(lambda: [0, 0, 0])
+        self.wire = 0
+        self.decoded = 0
+        self.responses = 0
+
+    def record(self, tenant_id, response):
+        """Учитывает один ответ API."""
+        wire, decoded = response_sizes(response)
+        counters = self.tenants[tenant_id]
+        counters[0] += wire
+        counters[1] += decoded
+        counters[2] += 1
+        self.wire += wire
+        self.decoded += decoded
+        self.responses += 1
+        return wire, decoded
+
+    def forget(self, tenant_id):
+        """Удаляет счетчики студента; общие счетчики не меняются."""
+        self.tenants.pop(tenant_id, None)
+
+    def totals(self):
+        """Суммарный трафик с запуска процесса."""
+        wire = self.wire
+        return {
+            'responses': self.responses,
+            'wire_bytes': wire,
+            'decoded_bytes': self.decoded,
+            'compression_ratio': (
+                round(self.decoded / wire, 2) if wire else None
+            ),
+        }
+
+    def snapshot(self):
+        """Сводка для проверки живости: итоги и самые тяжелые студенты."""
+        heaviest = heapq.nlargest(
+            HEAVIEST_TENANTS, self.tenants.items(),
+            key=lambda item: item[1][0]
+        )
+        return {
+            **self.totals(),
+            'heaviest': {
+                tenant_id: {
+                    'wire_bytes': wire,
+                    'decoded_bytes': decoded,
+                    'responses': responses,
+                }
+                for tenant_id, (wire, decoded, responses) in heaviest
+            },
+        }
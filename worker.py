@@ -0,0 +1,814 @@
+import contextvars
+import functools
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import telebot
+
+import exceptions
+import homework
+import network
+import retry_policy
+from budget import REVIEWING, activity_weight, make_planner
+from clock import SystemClock
+from commands import CommandHandler, CommandQueue, SharedCommandHandler
+from degradation import DegradationPolicy
+from delivery import Outbox
+from hedging import make_hedger
+from health import HEALTH_PORT, start_health_server
+from json_logging import log_context
+from history import STATUS_CODES, HistoryBook, parse_date
+from latency import LatencyTracker
+from leases import LeaseManager, run_with_leases
+from outage import (OPERATOR_CHAT_ID, RECOVERY_SPREAD, OutageDetector,
+                    is_upstream)
+from scheduler import PollSchedule
+from singleflight import SingleFlight
+from state_table import MAX_FAILURES, StateTable, fingerprint
+from storage import StateStore, load_json, save_json
+from telegram_client import TelegramClient
+from templates import TEMPLATES
+from tenants import TenantRegistry
+from tracing import SPAN_KIND_CLIENT, Tracer, current_span
+from transfer import TransferStats
+
+TENANTS_FILE = os.getenv('TENANTS_FILE', 'tenants.json')
+LEASE_DB = os.getenv('LEASE_DB')
+STATE_FILE = os.getenv('STATE_FILE', 'state.json')
+RELOAD_PERIOD = 10
+SAVE_PERIOD = 60
+REFRESH_INTERVAL = 60
+HEALTH_MAX_AGE = int(os.getenv('HEALTH_MAX_AGE', 600))
+POLL_THREADS = int(os.getenv('POLL_THREADS', 0))
+
+
+def updated_at(homework_item):
+    """Время смены статуса из date_updated; 0, если его нет."""
+    return parse_date(homework_item.get('date_updated'), 0)
+
+
+def owns_all(tenant):
+    """Фильтр шарда по умолчанию: процесс обслуживает всех студентов."""
+    return True
+
+
+class Worker:
+    """Опрашивает API Практикум.Домашка для всех студентов из реестра."""
+
+    def __init__(self, bot, registry, retry_period=homework.RETRY_PERIOD,
+                 owns=owns_all, clock=None, session=None, state_file=None,
+                 tracer=None, budget=None, hedger=None, outage=None,
+                 operator_chat_id=OPERATOR_CHAT_ID, threads=0, store=None):
+        self.bot = bot
+        self.registry = registry
+        self.retry_period = retry_period
+        self.owns = owns
+        self.clock = clock or SystemClock()
+        self.session = session
+        self.schedule = PollSchedule()
+        self.states = StateTable()
+        self.saved_states = {}
+        self.state_file = state_file
+        self.store = store
+        self.dirty = set()
+        self.history = HistoryBook()
+        self.rendered = {}
+        self.next_reload = 0
+        self.next_save = 0
+        self.refreshed = {}
+        self.refresh_queue = queue.SimpleQueue()
+        self.started = self.clock.time()
+        self.last_cycle = None
+        self.last_success = None
+        self.last_send = None
+        self.backlog = 0
+        self.failing = set()
+        self.stopped = set()
+        self.flights = SingleFlight(clock=self.clock.time)
+        self.transfer = TransferStats()
+        self.tracer = tracer or Tracer(None)
+        self.budget = budget
+        self.hedger = hedger
+        self.degradation = DegradationPolicy()
+        self.outbox = Outbox()
+        self.outage = outage or OutageDetector()
+        self.operator_chat_id = operator_chat_id
+        self.upstream_errors = []
+        self.senders = {}
+        self.links = []
+        self.latency = LatencyTracker()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            threads, thread_name_prefix='poll'
+        ) if threads else None
+
+    def track(self, tenant_id, now):
+        """Начинает опрос студента, восстанавливая сохраненное состояние."""
+        saved = self.saved_states.pop(tenant_id, None) or {}
+        slot = self.states.add(tenant_id, **{**saved, 'weight': 0})
+        self.reweigh(slot, now)
+        self.reschedule(tenant_id, max(now, self.states.deadline[slot]))
+
+    def track_all(self, tenant_ids, now):
+        """Начинает опрос студентов, подтягивая их строки из self.store."""
+        if self.store is not None and tenant_ids:
+            self.saved_states.update(self.store.load(tenant_ids))
+            self.history.load(self.store.load_history(tenant_ids))
+        for tenant_id in tenant_ids:
+            self.track(tenant_id, now)
+
+    def reschedule(self, tenant_id, due):
+        """Назначает следующий опрос студента."""
+        self.schedule.add(tenant_id, due)
+        self.states.deadline[self.states.slot(tenant_id)] = due
+
+    def reweigh(self, slot, now, active=True):
+        """Пересчитывает вес студента в бюджете запросов."""
+        if self.budget is None:
+            return
+        states = self.states
+        weight = activity_weight(
+            states.status[slot], states.cursor[slot], now
+        ) if active else 0
+        self.budget.change(states.weight[slot], weight)
+        states.weight[slot] = weight
+
+    def poll_interval(self, tenant_id):
+        """Эффективный интервал опроса студента."""
+        weight = self.states.weight[self.states.slot(tenant_id)]
+        if self.budget is None or not weight:
+            return self.retry_period
+        return self.budget.interval(weight)
+
+    def forget(self, tenant_id):
+        """Прекращает опрос студента."""
+        self.schedule.remove(tenant_id)
+        if tenant_id in self.states:
+            self.reweigh(self.states.slot(tenant_id), 0, active=False)
+        self.states.remove(tenant_id)
+        self.history.forget(tenant_id)
+        self.failing.discard(tenant_id)
+        self.stopped.discard(tenant_id)
+        self.replace_canary(tenant_id)
+        self.outage.discard(tenant_id)
+        self.latency.forget(tenant_id)
+        self.transfer.forget(tenant_id)
+
+    def apply_changes(self, changes, now):
+        """Применяет изменения реестра, не трогая остальных студентов."""
+        added = []
+        for tenant_id in changes.removed:
+            self.forget(tenant_id)
+        for tenant in changes.added + changes.updated:
+            if not self.owns(tenant):
+                self.forget(tenant.id)
+            elif tenant.id in self.states:
+                slot = self.states.slot(tenant.id)
+                self.states.failures[slot] = 0
+                self.reweigh(slot, now)
+                self.stopped.discard(tenant.id)
+                self.reschedule(tenant.id, now)
+            else:
+                added.append(tenant.id)
+        self.track_all(added, now)
+
+    def set_owner(self, owns, now):
+        """Меняет фильтр шарда, затрагивая только переехавших студентов."""
+        self.flush_states()
+        self.owns = owns
+        added = []
+        for tenant in self.registry:
+            if not owns(tenant):
+                self.forget(tenant.id)
+            elif tenant.id not in self.states:
+                added.append(tenant.id)
+        self.track_all(added, now)
+
+    def request_refresh(self, tenant_id, now):
+        """Просит опросить студента вне очереди.
+
+        Вызывается из потока команд; сам опрос ставит в расписание цикл
+        опроса. Возвращает False, если предыдущий запрос был недавно.
+        """
+        last = self.refreshed.get(tenant_id)
+        if last is not None and now - last < REFRESH_INTERVAL:
+            return False
+        self.refreshed[tenant_id] = now
+        self.refresh_queue.put(tenant_id)
+        return True
+
+    def apply_refreshes(self, now):
+        """Переносит запрошенные опросы на текущий момент."""
+        while True:
+            try:
+                tenant_id = self.refresh_queue.get_nowait()
+            except queue.Empty:
+                return
+            if tenant_id in self.schedule:
+                self.reschedule(tenant_id, now)
+
+    def load_state(self):
+        """Читает сохраненные состояния опроса и историю статусов."""
+        data = load_json(self.state_file, {})
+        self.saved_states = {
+            tenant_id: {'cursor': state.get('timestamp', 0), **state}
+            for tenant_id, state in data.get('states', {}).items()
+        }
+        self.history.load(data.get('history', {}))
+
+    def save_state(self):
+        """Сохраняет состояния опроса и историю статусов на диск."""
+        try:
+            save_json(self.state_file, {
+                'states': self.states.dump(),
+                'history': self.history.dump(self.states),
+            })
+        except OSError as error:
+            logging.error(f'Состояние не сохранено: {error}')
+
+    def flush_states(self):
+        """Записывает в self.store строки и историю, изменившиеся за цикл."""
+        dirty, self.dirty = self.dirty, set()
+        if self.store is None or not dirty:
+            return
+        rows = {
+            tenant_id: self.states.row(tenant_id)
+            for tenant_id in dirty if tenant_id in self.states
+        }
+        if not self.store.save(rows, self.history.dump(rows)):
+            self.dirty |= dirty
+
+    def reload(self, now):
+        """Перечитывает реестр студентов."""
+        self.next_reload = now + RELOAD_PERIOD
+        try:
+            changes = self.registry.refresh()
+        except exceptions.TenantConfigError as error:
+            logging.error(f'Реестр не обновлен: {error}')
+            return
+        self.apply_changes(changes, now)
+
+    def context_for(self, tenant):
+        """Контекст запросов студента."""
+        return homework.TenantContext(
+            tenant.practicum_token, tenant.telegram_chat_id,
+            tenant_id=tenant.id, session=self.session
+        )
+
+    def fetch(self, context, timestamp):
+        """Запрашивает и проверяет список домашек студента из контекста."""
+        with self.tracer.span(
+                'get_api_answer', {'http.from_date': timestamp},
+                kind=SPAN_KIND_CLIENT
+        ) as span:
+            started = time.perf_counter()
+            if self.hedger is None:
+                response = homework.send_tenant_request(context, timestamp)
+            else:
+                response = self.hedger.call(
+                    homework.send_tenant_request, context, timestamp
+                )
+            with self.lock:
+                wire, decoded = self.transfer.record(
+                    context.tenant_id, response
+                )
+            total = time.perf_counter() - started
+            logging.debug(
+                'Получен ответ API',
+                extra={'latency_ms': round(total * 1000, 3)}
+            )
+            ttfb = getattr(response, 'elapsed', None)
+            if ttfb is not None:
+                ttfb = ttfb.total_seconds()
+                span.set('http.ttfb_ms', round(ttfb * 1000, 3))
+                span.set('http.download_ms', round((total - ttfb) * 1000, 3))
+            span.set('http.status_code', response.status_code)
+            span.set('http.response.wire_bytes', wire)
+            span.set('http.response.decoded_bytes', decoded)
+            data = homework.decode_response(response)
+        with self.tracer.span('check_response'):
+            return homework.check_response(data)
+
+    def send(self, tenant, message, urgent=True, marks=()):
+        """Ставит сообщение студенту в очередь отправки.
+
+        Запоминает студента чата и участок трассы опроса, чтобы связать с
+        ними трассу отправки.
+        """
+        self.senders.setdefault(tenant.telegram_chat_id, set()).add(
+            tenant.id
+        )
+        link = current_span().link()
+        if link is not None:
+            self.links.append(link)
+        self.outbox.add(
+            tenant.telegram_chat_id, message, self.clock.time(),
+            urgent=urgent, window=tenant.quiet_hours, marks=marks
+        )
+
+    def send_chat(self, chat_id, text, tenant_ids=()):
+        """Отправляет сообщение в чат."""
+        attributes = {'tenant.ids': ','.join(sorted(tenant_ids))}
+        with self.tracer.span(
+                'send_message', attributes if tenant_ids else None,
+                kind=SPAN_KIND_CLIENT
+        ):
+            homework.send_chat_message(self.bot, chat_id, text)
+
+    def deliver(self, now):
+        """Отправляет уведомления, накопленные за цикл опроса.
+
+        Трасса deliver ссылается на трассы опросов, поставивших
+        уведомления в очередь, а send_message несет студентов чата.
+        """
+        if not self.outbox:
+            return
+        with self.lock:
+            senders, self.senders = self.senders, {}
+            links, self.links = self.links, []
+        with self.tracer.span('deliver', links=links) as span:
+            sent = self.outbox.flush(
+                lambda chat_id, text: self.send_chat(
+                    chat_id, text, senders.get(chat_id, ())
+                ),
+                now, getattr(self.bot, 'map', map),
+                clock=self.clock.time, on_sent=self.delivered,
+                lock=self.lock
+            )
+            span.set('delivery.messages', sent)
+        with self.lock:
+            outbox = self.outbox
+            for chat_id, tenant_ids in senders.items():
+                if chat_id in outbox.pending or chat_id in outbox.held:
+                    self.senders.setdefault(chat_id, set()).update(
+                        tenant_ids
+                    )
+        if sent:
+            self.last_send = self.clock.time()
+
+    def delivered(self, marks, ack):
+        """Учитывает задержку доставленных уведомлений о статусе."""
+        for tenant_id, updated in marks:
+            self.latency.observe(tenant_id, ack - updated, ack)
+
+    def notify_error(self, tenant, slot, error):
+        """Сообщает студенту об ошибке не чаще, чем раз в интервал.
+
+        Ошибки API откладываются до конца цикла: если к этому времени
+        объявлен сбой API, студентам о них не сообщается.
+        """
+        states = self.states
+        error_message = f'Сбой в работе программы: {error}'
+        error_fp = fingerprint(error_message)
+        logging.error(
+            error_message,
+            extra={'exception_class': type(error).__name__}
+        )
+        if self.degradation.shed_errors:
+            return
+        if states.error_fp[slot] == error_fp and (
+                self.clock.time() - states.error_time[slot]
+        ) <= homework.ERROR_NOTIFICATION_INTERVAL:
+            return
+        if is_upstream(error):
+            if not self.outage.active:
+                self.upstream_errors.append((tenant, error_message, error_fp))
+            return
+        self.send_error(tenant, slot, error_message, error_fp)
+
+    def send_error(self, tenant, slot, error_message, error_fp):
+        """Ставит в очередь уведомление об ошибке."""
+        self.send(tenant, error_message, urgent=False)
+        self.states.error_fp[slot] = error_fp
+        self.states.error_time[slot] = self.clock.time()
+        self.dirty.add(tenant.id)
+
+    def release_errors(self):
+        """Отправляет отложенные ошибки API, если сбой не объявлен."""
+        errors, self.upstream_errors = self.upstream_errors, []
+        if self.outage.active:
+            return
+        for tenant, error_message, error_fp in errors:
+            slot = self.states.index.get(tenant.id)
+            if slot is not None:
+                self.send_error(tenant, slot, error_message, error_fp)
+
+    def alert_operator(self, text, now, active, log=logging.critical):
+        """Сообщает оператору о начале (active) или конце сбоя API.
+
+        Процессы и узлы с общим self.store видят один и тот же сбой, и
+        оператору пишет только первый из них.
+        """
+        log(text)
+        if not self.operator_chat_id:
+            return
+        if self.store is not None and not self.store.claim_outage(
+                active, now, self.outage.timeout
+        ):
+            return
+        self.outbox.add(self.operator_chat_id, text, now)
+
+    def replace_canary(self, tenant_id):
+        """Заменяет выбывшего проверочного студента одним из отложенных."""
+        replacement = self.outage.replace(tenant_id)
+        if replacement is not None and replacement in self.states:
+            self.reschedule(replacement, self.clock.time())
+
+    def observe(self, tenant_id, error=None):
+        """Учитывает результат опроса в детекторе сбоя API.
+
+        Ошибка не на стороне API ничего не говорит о сбое, и проверочного
+        студента с такой ошибкой заменяет другой.
+        """
+        if error is not None and not is_upstream(error):
+            self.replace_canary(tenant_id)
+            return
+        now = self.clock.time()
+        if not self.outage.record(tenant_id, now, error is not None):
+            return
+        if self.outage.active:
+            self.outage_started(now)
+        else:
+            self.outage_ended(now)
+
+    def outage_started(self, now):
+        """Переводит опрос в режим сбоя API.
+
+        Проверочные студенты опрашиваются не реже раза в retry_period,
+        поочередно через равные промежутки.
+        """
+        outage = self.outage
+        canaries = sorted(outage.canaries)
+        for index, tenant_id in enumerate(canaries):
+            due = now + self.retry_period * (index + 1) / len(canaries)
+            if due < (self.schedule.due_time(tenant_id) or due):
+                self.reschedule(tenant_id, due)
+        self.alert_operator(
+            f'Сбой API Практикума: ошибки у {outage.failed} из '
+            f'{len(outage.latest)} студентов. Уведомления студентов об '
+            f'ошибках отключены, опрос продолжается только для проверочных '
+            f'студентов ({len(outage.canaries)}).', now, active=True
+        )
+
+    def resume_polling(self, now):
+        """Возвращает отложенных студентов в расписание после сбоя.
+
+        Опросы распределяются равномерно в течение RECOVERY_SPREAD секунд.
+        Возвращает число возобновленных студентов.
+        """
+        resumed = sorted(
+            (self.outage.resume() | self.failing) - self.stopped
+        )
+        resumed = [
+            tenant_id for tenant_id in resumed if tenant_id in self.states
+        ]
+        for index, tenant_id in enumerate(resumed):
+            self.reschedule(
+                tenant_id,
+                now + RECOVERY_SPREAD * (index + 1) / len(resumed)
+            )
+        return len(resumed)
+
+    def outage_ended(self, now):
+        """Возобновляет опрос после сбоя."""
+        resumed = self.resume_polling(now)
+        self.alert_operator(
+            f'API Практикума снова доступно, сбой длился '
+            f'{round((now - self.outage.since) / 60, 1):g} мин. Опрос '
+            f'{resumed} студентов возобновится в течение '
+            f'{RECOVERY_SPREAD} с.', now, active=False, log=logging.info
+        )
+
+    def outage_expired(self, now):
+        """Завершает сбой, который нечем подтвердить."""
+        self.outage.end()
+        resumed = self.resume_polling(now)
+        self.alert_operator(
+            f'Сбой API Практикума не подтвержден проверочными опросами за '
+            f'{round(self.outage.timeout / 60, 1):g} мин. Опрос {resumed} '
+            f'студентов возобновится в течение {RECOVERY_SPREAD} с.', now,
+            active=False, log=logging.warning
+        )
+
+    def poll(self, tenant):
+        """Проверяет статус домашки одного студента в отдельной трассе."""
+        with log_context(tenant=tenant.id):
+            with self.tracer.span('poll', {'tenant.id': tenant.id}) as span:
+                delay = self.poll_tenant(tenant)
+                span.set('poll.next_delay', delay)
+                return delay
+
+    def send_status(self, tenant, name, status, updated=0):
+        """Ставит в очередь уведомление о статусе работы.
+
+        updated - время смены статуса для замера задержки уведомления;
+        0, если задержку не считать.
+        """
+        self.send(
+            tenant,
+            TEMPLATES.render_once(
+                self.rendered, STATUS_CODES[status], tenant.locale, name
+            ),
+            urgent=status != 'reviewing',
+            marks=((tenant.id, updated),) if updated else ()
+        )
+
+    def notify_status(self, tenant, slot, latest, updated=0):
+        """Сообщает о статусе последней работы, если он изменился."""
+        states = self.states
+        name = latest.get('homework_name')
+        with log_context(homework=name):
+            with self.tracer.span('parse_status', {
+                'homework.name': name,
+                'homework.status': latest.get('status'),
+            }):
+                name, status = homework.validate_status(latest)
+            code = STATUS_CODES[status]
+            homework_fp = fingerprint(name)
+            if (states.status[slot] != code
+                    or states.homework_fp[slot] != homework_fp):
+                self.send_status(tenant, name, status, updated)
+                states.cursor[slot] = int(self.clock.time())
+                states.status[slot] = code
+                states.homework_fp[slot] = homework_fp
+                states.error_fp[slot] = 0
+                self.dirty.add(tenant.id)
+
+    def poll_tenant(self, tenant):
+        """Проверяет статус домашки одного студента.
+
+        Запрос к API выполняется без блокировки, а состояние опроса
+        меняется под self.lock, поэтому студентов можно опрашивать из
+        нескольких потоков. Возвращает паузу до следующего опроса или None,
+        если опрос остановлен до исправления настроек студента.
+        """
+        context = self.context_for(tenant)
+        with self.lock:
+            cursor = self.states.cursor[self.states.slot(tenant.id)]
+        try:
+            homeworks = self.flights.do(
+                (context.token, cursor), self.fetch, context, cursor
+            )
+        except Exception as error:
+            with self.lock:
+                return self.poll_failed(tenant, error)
+        with self.lock:
+            try:
+                return self.poll_succeeded(tenant, cursor, homeworks)
+            except Exception as error:
+                return self.poll_failed(tenant, error)
+
+    def poll_succeeded(self, tenant, cursor, homeworks):
+        """Обрабатывает ответ API и ставит уведомления в очередь."""
+        states = self.states
+        slot = states.slot(tenant.id)
+        states.failures[slot] = 0
+        now = self.last_success = self.clock.time()
+        self.failing.discard(tenant.id)
+        self.observe(tenant.id)
+        fresh = [
+            item for item in homeworks
+            if self.history.record(tenant.id, item, now)
+        ]
+        if fresh:
+            self.dirty.add(tenant.id)
+        if not homeworks:
+            logging.debug('Статус не обновлен')
+            return self.next_interval(slot)
+        if cursor:
+            for item in reversed(fresh):
+                if item is not homeworks[0]:
+                    self.send_status(tenant, item['homework_name'],
+                                     item['status'], updated_at(item))
+        self.notify_status(
+            tenant, slot, homeworks[0],
+            updated_at(homeworks[0]) if cursor else 0
+        )
+        return self.next_interval(slot)
+
+    def poll_failed(self, tenant, error):
+        """Учитывает ошибку опроса и выбирает паузу до повтора."""
+        states = self.states
+        slot = states.slot(tenant.id)
+        current_span().record_error(error)
+        failures = min(states.failures[slot] + 1, MAX_FAILURES)
+        states.failures[slot] = failures
+        self.failing.add(tenant.id)
+        self.observe(tenant.id, error)
+        self.notify_error(tenant, slot, error)
+        delay = retry_policy.retry_delay(
+            retry_policy.classify(error), failures, self.retry_period
+        )
+        if delay is None:
+            self.stopped.add(tenant.id)
+            self.reweigh(slot, 0, active=False)
+            self.replace_canary(tenant.id)
+            logging.critical(
+                f'{tenant.id}: опрос остановлен до исправления настроек',
+                extra={'exception_class': type(error).__name__}
+            )
+        return delay
+
+    def next_interval(self, slot):
+        """Пауза до следующего опроса после успешного ответа."""
+        interval = self.retry_period
+        if self.budget is not None:
+            self.reweigh(slot, self.clock.time())
+            interval = self.budget.interval(self.states.weight[slot])
+        if self.states.status[slot] != REVIEWING:
+            interval *= self.degradation.idle_stretch
+        return interval
+
+    def urgency(self, tenant_id, now):
+        """Класс срочности просроченного опроса: срочные первыми."""
+        slot = self.states.index.get(tenant_id)
+        if slot is None:
+            return 0
+        return -activity_weight(
+            self.states.status[slot], self.states.cursor[slot], now
+        )
+
+    def take_due(self, now):
+        """Забирает из расписания опросы, которые пора выполнить.
+
+        При отставании просроченные опросы забираются по классам
+        срочности, а не выходящие в бюджет остаются в расписании.
+        Ожидание токенов бюджета в отставание не входит, но очередь на
+        токены тоже разбирается по срочности.
+        """
+        next_due = self.schedule.next_due()
+        lag = 0
+        if next_due is not None:
+            lag = max(now - next_due, 0)
+            if self.budget is not None:
+                lag = max(lag - self.budget.wait(now, next_due), 0)
+        self.degradation.update(lag)
+        if self.outage.expired(now):
+            self.outage_expired(now)
+        limit = None if self.budget is None else self.budget.available(now)
+        urgency = None
+        if self.degradation.prioritize or (
+                self.budget is not None
+                and self.budget.exhausted_since is not None
+        ):
+            urgency = functools.partial(self.urgency, now=now)
+        due = self.schedule.pop_due(now, limit, urgency)
+        popped = len(due)
+        if self.outage.active:
+            due = [tenant_id for tenant_id in due
+                   if self.outage.admit(tenant_id)]
+        if self.budget is not None:
+            next_due = self.schedule.next_due()
+            self.budget.track_exhaustion(
+                now, popped >= limit and next_due is not None
+                and next_due <= now
+            )
+            self.budget.spend(len(due))
+        return due
+
+    def poll_due(self, tenant_id, now):
+        """Опрашивает студента из расписания и назначает следующий опрос."""
+        try:
+            tenant = self.registry.get(tenant_id)
+            with self.lock:
+                if tenant is None or not self.outage.admit(tenant_id):
+                    return
+            delay = self.poll(tenant)
+            with self.lock:
+                if delay is not None and self.outage.active:
+                    delay = min(delay, self.retry_period)
+                if delay is not None:
+                    self.reschedule(tenant_id, now + delay)
+        finally:
+            with self.lock:
+                self.backlog -= 1
+
+    def run_once(self, now):
+        """Опрашивает студентов, время которых наступило.
+
+        Расписание, реестр и очереди меняются под self.lock, чтобы их
+        могли читать потоки команд и проверки живости.
+        """
+        with self.lock:
+            self.rendered.clear()
+            if now >= self.next_reload:
+                self.reload(now)
+            self.apply_refreshes(now)
+        if self.state_file and now >= self.next_save:
+            self.next_save = now + SAVE_PERIOD
+            self.save_state()
+        with self.lock:
+            due = self.take_due(now)
+            self.backlog = len(due)
+        if self.executor is None:
+            for tenant_id in due:
+                self.poll_due(tenant_id, now)
+        else:
+            context = contextvars.copy_context()
+            for _ in self.executor.map(
+                    lambda tenant_id: context.copy().run(
+                        self.poll_due, tenant_id, now
+                    ),
+                    due
+            ):
+                pass
+        with self.lock:
+            self.backlog = 0
+            self.release_errors()
+        self.deliver(now)
+        self.flush_states()
+        self.last_cycle = self.clock.time()
+
+    def health(self, now):
+        """Сводка для проверки живости процесса."""
+        def age(moment):
+            return None if moment is None else round(now - moment, 3)
+
+        last_cycle = self.last_cycle
+        reference = self.started if last_cycle is None else last_cycle
+        with self.lock:
+            return {
+                'healthy': now - reference <= HEALTH_MAX_AGE,
+                'last_cycle_age': age(last_cycle),
+                'last_success_age': age(self.last_success),
+                'last_send_age': age(self.last_send),
+                'poll_backlog': self.backlog,
+                'refresh_queue': self.refresh_queue.qsize(),
+                'outbox': len(self.outbox),
+                'tenants': len(self.states),
+                'breaker': {
+                    'backing_off': len(self.failing),
+                    'stopped': len(self.stopped),
+                },
+                'budget': self.budget and self.budget.snapshot(),
+                'hedging': self.hedger and self.hedger.snapshot(),
+                'lag': round(self.degradation.lag, 3),
+                'degradation': self.degradation.level.name,
+                'outage': self.outage.snapshot(),
+                'latency': self.latency.snapshot(now),
+                'transfer': self.transfer.snapshot(),
+            }
+
+    def seconds_to_wait(self, now):
+        """Считает паузу до ближайшего опроса или перечитывания реестра."""
+        next_event = self.next_reload
+        next_due = self.schedule.next_due()
+        if next_due is not None and self.budget is not None:
+            next_due = max(next_due, self.budget.next_token(now))
+        if next_due is not None:
+            next_event = min(next_event, next_due)
+        return max(next_event - now, 0)
+
+    def run(self, until=None):
+        """Цикл опроса; until ограничивает его по времени часов."""
+        clock = self.clock
+        try:
+            while until is None or clock.time() < until:
+                self.run_once(clock.time())
+                clock.sleep(self.seconds_to_wait(clock.time()))
+        finally:
+            if self.state_file:
+                self.save_state()
+
+
+def main():
+    """Запускает опрос всех студентов из файла реестра."""
+    if not homework.TELEGRAM_TOKEN:
+        logging.critical('Некорректные переменные окружения: TELEGRAM_TOKEN')
+        raise ValueError('Некорректные переменные окружения')
+    bot = telebot.TeleBot(token=homework.TELEGRAM_TOKEN)
+    session = network.configure(
+        [homework.ENDPOINT, network.TELEGRAM_URL],
+        pool_size=network.POOL_SIZE + POLL_THREADS
+    )
+    worker = Worker(
+        TelegramClient(homework.TELEGRAM_TOKEN, session=session),
+        TenantRegistry(TENANTS_FILE),
+        session=session,
+        state_file=STATE_FILE,
+        tracer=Tracer(),
+        budget=make_planner(homework.RETRY_PERIOD),
+        hedger=make_hedger(POLL_THREADS),
+        threads=POLL_THREADS,
+        store=StateStore(LEASE_DB) if LEASE_DB else None
+    )
+    worker.load_state()
+    if HEALTH_PORT:
+        start_health_server(worker)
+    if LEASE_DB:
+        leases = LeaseManager(LEASE_DB)
+        run_with_leases(worker, leases, SharedCommandHandler(
+            bot, worker, leases, CommandQueue(LEASE_DB)
+        ))
+    else:
+        CommandHandler(bot, worker).start()
+        worker.run()
+
+
+if __name__ == '__main__':
+    homework.configure_logging()
+    main()